@@ -0,0 +1,88 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Startup benchmark for importing the openclean_notebook package. Uses the
+`python -X importtime` output of a fresh interpreter to measure the cumulative
+import time of a module and fails if the time exceeds the import budget.
+
+Run the benchmark using:
+
+    pytest benchmarks/bench_import.py
+
+or print the import times for all checked modules with:
+
+    python benchmarks/bench_import.py
+
+Budgets (in milliseconds) can be overridden via environment variables of the
+form OPENCLEAN_IMPORT_BUDGET_<NAME>, e.g., OPENCLEAN_IMPORT_BUDGET_PACKAGE.
+"""
+
+from typing import Dict, Tuple
+
+import os
+import pytest
+import subprocess
+import sys
+
+
+"""Import statements, the measured module, and the default import budget in
+milliseconds. The engine import is dominated by openclean-core (which loads
+pandas, scipy, and histore). Budgets are about 25% above the import times that
+were measured on a development machine (engine 800 ms, spreadsheet 900 ms).
+Set the environment variables below on slower machines.
+"""
+IMPORTS = {
+    'package': ('import openclean_notebook', 'openclean_notebook', 10),
+    'engine': ('import openclean_notebook.engine', 'openclean_notebook.engine', 1000),
+    'spreadsheet': (
+        'import openclean_notebook.controller.spreadsheet.base',
+        'openclean_notebook.controller.spreadsheet.base',
+        1150
+    )
+}
+
+
+def importtime(statement: str) -> Dict[str, int]:
+    """Get the cumulative import time (in microseconds) for all modules that
+    are loaded by the given statement in a fresh interpreter.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        check=True,
+        capture_output=True,
+        text=True
+    )
+    times = dict()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def measure(name: str) -> Tuple[float, float]:
+    """Get the import time and the budget (both in milliseconds) for the
+    import with the given name.
+    """
+    statement, module, budget = IMPORTS[name]
+    env = 'OPENCLEAN_IMPORT_BUDGET_{}'.format(name.upper())
+    budget = float(os.environ.get(env, budget))
+    return importtime(statement)[module] / 1000, budget
+
+
+@pytest.mark.parametrize('name', list(IMPORTS))
+def test_import_budget(name):
+    """Fail if importing a module exceeds the import budget."""
+    elapsed, budget = measure(name)
+    assert elapsed <= budget, '{} import took {:.1f} ms (budget {:.1f} ms)'.format(name, elapsed, budget)
+
+
+if __name__ == '__main__':
+    for name in IMPORTS:
+        elapsed, budget = measure(name)
+        print('{:<12} {:>10.1f} ms  (budget {:.1f} ms)'.format(name, elapsed, budget))
@@ -0,0 +1,68 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Benchmarks for the sequential and the parallel datamart profiler. The
+benchmarks use pytest-benchmark and are not part of the unit tests. Run them
+explicitly using:
+
+    pytest benchmarks/bench_profiling.py
+
+Group results by the number of columns to compare how the parallel profiler
+scales with the number of columns and workers:
+
+    pytest benchmarks/bench_profiling.py --benchmark-group-by=param:columns
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from openclean_notebook.metadata.datamart import DatamartProfiler
+from openclean_notebook.metadata.parallel import ParallelProfiler
+
+
+"""Number of rows in the profiled datasets."""
+ROWS = 10000
+
+
+def generate(rows: int, columns: int) -> pd.DataFrame:
+    """Generate a data frame with alternating integer, float, and string
+    columns.
+    """
+    rng = np.random.default_rng(42)
+    data = dict()
+    for i in range(columns):
+        if i % 3 == 0:
+            data['C{}'.format(i)] = rng.integers(0, 1000, size=rows)
+        elif i % 3 == 1:
+            data['C{}'.format(i)] = rng.random(size=rows)
+        else:
+            data['C{}'.format(i)] = rng.choice(['a', 'b', 'c', 'd'], size=rows)
+    return pd.DataFrame(data=data)
+
+
+@pytest.mark.parametrize('columns', [4, 16, 64])
+def test_sequential_profiler(benchmark, columns):
+    """Profile all columns in a single process."""
+    df = generate(ROWS, columns)
+    benchmark.extra_info['workers'] = 1
+    benchmark.pedantic(DatamartProfiler().profile, args=(df,), rounds=3)
+
+
+@pytest.mark.parametrize('workers', [2, 4, 8])
+@pytest.mark.parametrize('columns', [4, 16, 64])
+def test_parallel_profiler(benchmark, columns, workers):
+    """Profile column partitions in a process pool."""
+    df = generate(ROWS, columns)
+    profiler = ParallelProfiler(workers=workers)
+    # Start the worker processes before running the benchmark.
+    profiler.profile(df.iloc[:10])
+    benchmark.extra_info['workers'] = workers
+    try:
+        benchmark.pedantic(profiler.profile, args=(df,), rounds=3)
+    finally:
+        profiler.close()
@@ -0,0 +1,166 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Benchmarks for the request path of the spreadsheet view on synthetic
+datasets. Measures the latency of fetch requests, of requests with actions
+(update, inscol, rollback, and commit), of profiling a dataset snapshot, and
+of converting a snapshot into its compact representation. The peak memory
+for each benchmarked call is stored in the 'peak_memory' field of the extra
+info of each benchmark (see benchmarks/conftest.py for the options that
+control the size of the generated datasets).
+
+Run the benchmarks explicitly and store the results (in .benchmarks/) using:
+
+    pytest benchmarks/bench_spreadsheet.py --benchmark-autosave
+
+Compare the results of a later run with the last stored results using:
+
+    pytest benchmarks/bench_spreadsheet.py --benchmark-compare --benchmark-compare-fail=mean:25%
+"""
+
+from typing import Dict, Optional
+
+import pytest
+
+from openclean_notebook.cache import frame_size
+from openclean_notebook.compact import compact_frame
+from openclean_notebook.controller.spreadsheet.base import spreadsheet_api
+from openclean_notebook.engine import OpencleanAPI
+
+import openclean_notebook.controller.spreadsheet.data as ds
+
+
+"""Update function for string columns (see benchmarks/conftest.py)."""
+NORMALIZE = {'name': 'normalize', 'namespace': 'bench'}
+
+
+def request(handle: Dict, fetch: Dict, action: Optional[Dict] = None) -> Dict:
+    """Get a spreadsheet API request for the generated dataset."""
+    r = {'dataset': handle, 'fetch': fetch}
+    if action is not None:
+        r['action'] = action
+    return r
+
+
+def restore(engine: OpencleanAPI, name: str) -> int:
+    """Rollback all changes to the generated dataset. Returns the identifier
+    of the first dataset version.
+    """
+    dataset = engine.dataset(name)
+    base = dataset.log()[0].version
+    if dataset.version() != base:
+        dataset.rollback(base)
+        engine.invalidate(name)
+    return base
+
+
+# -- Fetch requests -----------------------------------------------------------
+
+@pytest.mark.parametrize('snapshot_cache', ['cold', 'warm'])
+def test_fetch_page(measure, engine, handle, snapshot_cache):
+    """Fetch the first page of rows. For a cold snapshot cache, the snapshot
+    is checked out for each request.
+    """
+    def setup():
+        if snapshot_cache == 'cold':
+            engine.invalidate(handle['name'])
+
+    measure(lambda: spreadsheet_api(request(handle, fetch={'limit': 10})), setup=setup)
+
+
+def test_fetch_binary_page(measure, engine, handle, nrows):
+    """Fetch a page of rows from the middle of the dataset in binary format."""
+    fetch = {'limit': 10, 'offset': nrows // 2, 'format': 'binary'}
+    measure(lambda: spreadsheet_api(request(handle, fetch=fetch)))
+
+
+def test_fetch_sorted_page(measure, engine, handle):
+    """Fetch the first page of rows sorted by a string column."""
+    fetch = {'limit': 10, 'sortBy': {'column': 'C2', 'descending': True}}
+    measure(lambda: spreadsheet_api(request(handle, fetch=fetch)))
+
+
+def test_compact_snapshot(measure, benchmark, engine, handle):
+    """Get the compact representation of the dataset snapshot. The memory
+    for the plain and the compact snapshot and the fraction of memory that is
+    saved are stored in the 'plain_bytes', 'compact_bytes', and 'savings'
+    fields of the extra info for the benchmark.
+    """
+    df = engine.dataset(handle['name']).checkout()
+    plain, compact = frame_size(df), frame_size(compact_frame(df))
+    benchmark.extra_info['plain_bytes'] = plain
+    benchmark.extra_info['compact_bytes'] = compact
+    benchmark.extra_info['savings'] = 1 - compact / plain
+    measure(lambda: compact_frame(df))
+
+
+def test_fetch_metadata(measure, engine, handle):
+    """Profile all columns of the dataset snapshot. Existing profiling results
+    are removed before each call.
+    """
+    dataset = engine.dataset(handle['name'])
+    version = dataset.version()
+    df = engine.snapshot(handle['name'])
+
+    def setup():
+        metadata = dataset.metadata(version=version)
+        for key in ['profiling', ds.COLUMN_PROFILES]:
+            if metadata.has_annotation(key=key):
+                metadata.delete_annotation(key=key)
+
+    measure(lambda: ds.fetch_metadata(df=df, dataset=dataset, version=version), setup=setup)
+
+
+# -- Actions ------------------------------------------------------------------
+
+def test_update(measure, engine, handle):
+    """Update a string column using a library function."""
+    action = {'type': 'update', 'payload': {'columns': [2], 'func': NORMALIZE}}
+    measure(
+        lambda: spreadsheet_api(request(handle, fetch={'limit': 10}, action=action)),
+        setup=lambda: restore(engine, handle['name'])
+    )
+
+
+def test_inscol(measure, engine, handle):
+    """Insert a column with a constant value."""
+    action = {'type': 'inscol', 'payload': {'names': ['X'], 'values': [1]}}
+    measure(
+        lambda: spreadsheet_api(request(handle, fetch={'limit': 10}, action=action)),
+        setup=lambda: restore(engine, handle['name'])
+    )
+
+
+def test_rollback(measure, engine, handle):
+    """Rollback an update of a string column."""
+    name = handle['name']
+    base = restore(engine, name)
+    normalize = engine.library.functions().get(**NORMALIZE)
+
+    def setup():
+        restore(engine, name)
+        engine.dataset(name).update(columns='C2', func=normalize)
+        engine.invalidate(name)
+
+    action = {'type': 'rollback', 'payload': base}
+    measure(lambda: spreadsheet_api(request(handle, fetch={'limit': 10}, action=action)), setup=setup)
+
+
+def test_commit(measure, engine, handle):
+    """Commit an update on a sample of 1000 rows to the full dataset. Each
+    call commits to the dataset that results from the previous commit.
+    """
+    name = handle['name']
+    restore(engine, name)
+    normalize = engine.library.functions().get(**NORMALIZE)
+
+    def setup():
+        engine.sample(name, n=1000, random_state=42)
+        engine.dataset(name).update(columns='C2', func=normalize)
+
+    action = {'type': 'commit'}
+    measure(lambda: spreadsheet_api(request(handle, fetch={'limit': 10}, action=action)), setup=setup)
@@ -0,0 +1,68 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Benchmarks for evaluating update functions on a column with few distinct
+values. Compares the row-wise evaluation of library functions with memoized
+and vectorized evaluation. Only the evaluation of the update function is
+measured (not the construction of the updated data frame). Run the benchmarks
+explicitly using:
+
+    pytest benchmarks/bench_update.py
+"""
+
+from openclean.engine.action import UpdateOp
+from openclean.engine.object.function import FunctionHandle
+
+import pandas as pd
+import pytest
+
+from openclean_notebook.library import VectorizedFunctionHandle, to_eval
+
+
+"""Number of rows and distinct values in the benchmark column."""
+ROWS = 100000
+DISTINCT = 40
+
+
+def normalize(value):
+    """Update function that normalizes borough names."""
+    return value.strip().upper()
+
+
+def normalize_series(values):
+    """Vectorized version of the update function."""
+    return values.str.strip().str.upper()
+
+
+@pytest.fixture
+def df():
+    """Data frame with a single column of repeated values."""
+    values = [' borough {} '.format(i % DISTINCT) for i in range(ROWS)]
+    return pd.DataFrame(data={'A': values}, dtype=object)
+
+
+def action(func: FunctionHandle) -> UpdateOp:
+    """Get an update operation for the benchmark column."""
+    return UpdateOp(schema=['A'], columns='A', func=func)
+
+
+def test_rowwise_update(benchmark, df):
+    """Evaluate the update function for each row."""
+    op = action(FunctionHandle(func=normalize))
+    benchmark(to_eval(op).eval, df)
+
+
+def test_memoized_update(benchmark, df):
+    """Evaluate the update function once for each distinct value."""
+    op = action(FunctionHandle(func=normalize))
+    benchmark(to_eval(op, memo_size=1000).eval, df)
+
+
+def test_vectorized_update(benchmark, df):
+    """Evaluate the vectorized update function for all rows."""
+    op = action(VectorizedFunctionHandle(func=normalize_series))
+    benchmark(to_eval(op).eval, df)
@@ -0,0 +1,67 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Benchmarks for validating spreadsheet API requests. Compares the generic
+Json schema validator that resolves references at validation time with the
+compiled request validator. Run the benchmarks explicitly using:
+
+    pytest benchmarks/bench_validation.py --benchmark-group-by=param:request_type
+"""
+
+from jsonschema import Draft7Validator, RefResolver
+
+import importlib.resources as pkg_resources
+import json
+import os
+import pytest
+
+from openclean_notebook.controller.spreadsheet.validation import RequestValidator
+
+import openclean_notebook.controller.spreadsheet as pkg
+
+
+"""Requests that are validated by the benchmarks."""
+DATASET = {'database': '0000', 'name': 'DS'}
+REQUESTS = {
+    'fetch': {'dataset': DATASET, 'fetch': {'offset': 100, 'limit': 10}},
+    'metadata': {'dataset': DATASET, 'fetch': {'includeMetadata': True, 'format': 'binary'}},
+    'update': {
+        'dataset': DATASET,
+        'fetch': {'limit': 10},
+        'action': {
+            'type': 'update',
+            'payload': {
+                'columns': [0, 1],
+                'func': {'name': 'upper', 'namespace': 'string'},
+                'args': [{'name': 'value', 'value': 1}]
+            }
+        }
+    }
+}
+
+
+def reference_validator() -> Draft7Validator:
+    """Get the Json schema validator for requests that resolves references."""
+    schemafile = os.path.abspath(os.path.join(pkg.__file__, 'schema.json'))
+    schema = json.load(pkg_resources.open_text(pkg, 'schema.json'))
+    resolver = RefResolver('file:///{}'.format(schemafile), schema)
+    return Draft7Validator(schema=schema['definitions']['request'], resolver=resolver)
+
+
+@pytest.mark.parametrize('request_type', list(REQUESTS))
+def test_reference_validator(benchmark, request_type):
+    """Validate requests with the generic Json schema validator."""
+    validator = reference_validator()
+    benchmark(validator.validate, REQUESTS[request_type])
+
+
+@pytest.mark.parametrize('request_type', list(REQUESTS))
+def test_request_validator(benchmark, request_type):
+    """Validate requests with the compiled request validator."""
+    schema = json.load(pkg_resources.open_text(pkg, 'schema.json'))
+    validator = RequestValidator(schema=schema, definition='request', validator=reference_validator())
+    benchmark(validator.validate, REQUESTS[request_type])
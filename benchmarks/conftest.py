@@ -0,0 +1,196 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Fixtures for benchmarks on synthetic datasets. The sizes of the generated
+datasets and the archive managers are controlled by command line options:
+
+    --bench-rows=10000,100000       Number of rows in the generated datasets.
+    --bench-columns=5,50            Number of columns in the generated datasets.
+    --bench-managers=volatile,persistent
+                                    Archive managers for the engine.
+    --bench-compact=false,true      Engines with plain and/or compact snapshots.
+    --bench-rounds=3                Number of rounds for each benchmark.
+
+Benchmarks that use the 'nrows', 'ncols', 'manager', and 'compact' fixtures
+are run for all combinations of the given values. The defaults are small
+enough to run on a laptop. The full scale of the suite is:
+
+    --bench-rows=10000,100000,1000000,10000000 --bench-columns=5,50,200
+
+Note that the largest datasets require tens of gigabytes of memory.
+"""
+
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+import tracemalloc
+
+from openclean_notebook.engine import DB, OpencleanAPI
+
+import openclean_notebook.controller.spreadsheet.data as ds
+
+
+"""Name of the generated dataset in the benchmark engines."""
+DS_NAME = 'DS'
+
+"""Archive managers for benchmark engines."""
+PERSISTENT = 'persistent'
+VOLATILE = 'volatile'
+
+
+def pytest_addoption(parser):
+    """Add command line options for the size of generated datasets."""
+    group = parser.getgroup('synthetic datasets')
+    group.addoption('--bench-rows', default='10000,100000', help='Number of rows in generated datasets')
+    group.addoption('--bench-columns', default='5,50', help='Number of columns in generated datasets')
+    group.addoption('--bench-managers', default='volatile,persistent', help='Archive managers for the engine')
+    group.addoption('--bench-compact', default='false', help='Compact snapshots for the engine (false,true)')
+    group.addoption('--bench-rounds', default='3', help='Number of rounds for each benchmark')
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize benchmarks by dataset size and archive manager. Engines
+    are shared by all benchmarks in a module that use the same parameters.
+    """
+    options = [
+        ('nrows', '--bench-rows', int),
+        ('ncols', '--bench-columns', int),
+        ('manager', '--bench-managers', str),
+        ('compact', '--bench-compact', lambda v: v.strip().lower() == 'true')
+    ]
+    for name, option, cast in options:
+        if name in metafunc.fixturenames:
+            values = [cast(v) for v in metafunc.config.getoption(option).split(',')]
+            metafunc.parametrize(name, values, scope='module')
+
+
+# -- Fixtures -----------------------------------------------------------------
+
+@pytest.fixture(scope='module')
+def engine(manager, nrows, ncols, compact, tmp_path_factory) -> OpencleanAPI:
+    """Engine with a generated dataset. The dataset is maintained by a
+    persistent archive manager in a temporary directory or by a volatile
+    archive manager. The engine keeps compact snapshots if the compact flag
+    is True. The engine library contains the update function
+    'bench:normalize' for string columns.
+    """
+    if manager == PERSISTENT:
+        engine = DB(basedir=str(tmp_path_factory.mktemp('archive')), create=True, compact=compact)
+    else:
+        engine = DB(compact=compact)
+    engine.register.eval('normalize', namespace='bench')(normalize)
+    engine.create(source=generate(rows=nrows, columns=ncols), name=DS_NAME)
+    return engine
+
+
+@pytest.fixture
+def handle(engine) -> Dict:
+    """Serialized reference to the generated dataset for API requests."""
+    return ds.serialize(name=DS_NAME, engine=engine.identifier)
+
+
+@pytest.fixture
+def measure(benchmark, request) -> Callable:
+    """Get a function that runs a benchmark for a function without arguments
+    (see :func:`run`). The number of rounds is taken from the command line.
+    """
+    rounds = int(request.config.getoption('--bench-rounds'))
+
+    def measure_func(func: Callable, setup: Optional[Callable] = None):
+        run(benchmark=benchmark, func=func, rounds=rounds, setup=setup)
+
+    return measure_func
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def generate(rows: int, columns: int, seed: Optional[int] = 42) -> pd.DataFrame:
+    """Generate a data frame with alternating integer, float, and string
+    columns. String columns contain values from a small vocabulary and about
+    one percent of missing values.
+
+    Parameters
+    ----------
+    rows: int
+        Number of rows.
+    columns: int
+        Number of columns.
+    seed: int, default=42
+        Seed for the random number generator.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(['borough {}'.format(i) for i in range(50)] + [None], dtype=object)
+    weights = np.full(len(vocabulary), 0.99 / (len(vocabulary) - 1))
+    weights[-1] = 0.01
+    data = dict()
+    for i in range(columns):
+        if i % 3 == 0:
+            data['C{}'.format(i)] = rng.integers(0, 1000, size=rows)
+        elif i % 3 == 1:
+            data['C{}'.format(i)] = rng.random(size=rows)
+        else:
+            data['C{}'.format(i)] = rng.choice(vocabulary, size=rows, p=weights)
+    return pd.DataFrame(data=data)
+
+
+def normalize(value):
+    """Update function for string columns that leaves missing values as they
+    are.
+    """
+    return value.strip().upper() if isinstance(value, str) else value
+
+
+def peak_memory(func: Callable) -> int:
+    """Get the peak memory (in bytes) that is allocated while calling the
+    given function. Memory is traced using tracemalloc, which also traces
+    the memory for NumPy arrays.
+
+    Parameters
+    ----------
+    func: callable
+        Function without arguments.
+
+    Returns
+    -------
+    int
+    """
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run(benchmark, func: Callable, rounds: int, setup: Optional[Callable] = None):
+    """Run a benchmark for a function without arguments. The peak memory for
+    one (untimed) call of the function is stored in the 'peak_memory' field of
+    the extra info for the benchmark. The setup function is called before each
+    call of the benchmarked function and is not timed.
+
+    Parameters
+    ----------
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture
+        Benchmark fixture.
+    func: callable
+        Benchmarked function.
+    rounds: int
+        Number of timed rounds.
+    setup: callable, default=None
+        Function that prepares the state for the benchmarked function.
+    """
+    if setup is not None:
+        setup()
+    benchmark.extra_info['peak_memory'] = peak_memory(func)
+    benchmark.pedantic(func, setup=setup, rounds=rounds, iterations=1)
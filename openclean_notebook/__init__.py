@@ -5,4 +5,17 @@
 # openclean is released under the Revised BSD License. See file LICENSE for
 # full license details.
 
-from openclean_notebook.engine import DB  # noqa: F401
+"""The openclean notebook package provides user-interface components for
+openclean in notebook environments. The engine factory :func:`DB` is imported
+on first access in order to keep the package import lightweight (PEP 562).
+"""
+
+from typing import Any
+
+
+def __getattr__(name: str) -> Any:
+    """Import the engine factory when it is accessed for the first time."""
+    if name == 'DB':
+        from openclean_notebook.engine import DB
+        return DB
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
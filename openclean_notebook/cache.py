@@ -0,0 +1,207 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""In-memory caches for objects that are expensive to generate while serving
+requests from user-interface components, e.g., dataset snapshots that are
+checked out for every page that is displayed in the spreadsheet view.
+
+Cache entries are identified by tuples. The first elements of the key are
+expected to identify the engine and the dataset that the cached object belongs
+to. This allows to invalidate all entries for a dataset whenever the dataset
+is modified.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+
+import pandas as pd
+import sys
+import threading
+
+
+"""Default memory budget (in bytes) for cached dataset snapshots."""
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
+
+"""Default memory budget (in bytes) for prefetched pages of dataset views."""
+DEFAULT_PAGE_CACHE_SIZE = 16 * 1024 * 1024
+
+"""Default memory budget (in bytes) for the rows of dataset view windows that
+are known to clients (for delta responses).
+"""
+DEFAULT_WINDOW_CACHE_SIZE = 16 * 1024 * 1024
+
+
+@dataclass
+class CacheStats:
+    """Counters for cache hits, misses and evicted entries."""
+    # Number of successful cache lookups.
+    hits: int = 0
+    # Number of cache lookups for objects that were not in the cache.
+    misses: int = 0
+    # Number of entries that were removed to stay within the memory budget.
+    evictions: int = 0
+
+
+class MemoryCache(object):
+    """Least-recently-used cache with a memory budget. The size of each cached
+    object is computed by a user-provided function when the object is added to
+    the cache. Objects that are larger than the memory budget are not cached.
+
+    The cache is thread-safe since entries may be added by background workers
+    while requests are being served.
+    """
+    def __init__(self, capacity: int, sizeof: Optional[Callable] = None):
+        """Initialize the memory budget and the function that computes the
+        size of cached objects.
+
+        Parameters
+        ----------
+        capacity: int
+            Maximum memory (in bytes) for all cached objects. A value of zero
+            disables the cache.
+        sizeof: callable, default=None
+            Function that returns the size of a given object in bytes. Uses
+            `sys.getsizeof` by default.
+        """
+        self.capacity = capacity
+        self.sizeof = sizeof if sizeof is not None else sys.getsizeof
+        self.stats = CacheStats()
+        self.size = 0
+        # Ordered dictionary of (object, size)-pairs. The least recently used
+        # entry is at the beginning of the dictionary.
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __contains__(self, key: Tuple) -> bool:
+        """Test if an entry with the given key is in the cache. Does not modify
+        the cache statistics.
+
+        Parameters
+        ----------
+        key: tuple
+            Unique entry key.
+
+        Returns
+        -------
+        bool
+        """
+        return key in self._entries
+
+    def __len__(self) -> int:
+        """Get the number of entries in the cache.
+
+        Returns
+        -------
+        int
+        """
+        return len(self._entries)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def get(self, key: Tuple) -> Any:
+        """Get the object that is associated with the given key. Returns None
+        if the key is not in the cache.
+
+        Parameters
+        ----------
+        key: tuple
+            Unique entry key.
+
+        Returns
+        -------
+        any
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def invalidate(self, prefix: Tuple):
+        """Remove all entries whose key starts with the given prefix.
+
+        Parameters
+        ----------
+        prefix: tuple
+            Prefix for the keys of all entries that are removed.
+        """
+        n = len(prefix)
+        with self._lock:
+            for key in [k for k in self._entries if k[:n] == prefix]:
+                _, size = self._entries.pop(key)
+                self.size -= size
+
+    def peek(self, key: Tuple) -> Any:
+        """Get the object that is associated with the given key without
+        modifying the cache statistics or the order of entries. Returns None
+        if the key is not in the cache.
+
+        Parameters
+        ----------
+        key: tuple
+            Unique entry key.
+
+        Returns
+        -------
+        any
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def put(self, key: Tuple, value: Any):
+        """Add an object to the cache. Evicts least recently used entries if
+        the memory budget is exceeded. The object is not added if its size
+        exceeds the memory budget of the cache.
+
+        Parameters
+        ----------
+        key: tuple
+            Unique entry key.
+        value: any
+            Cached object.
+        """
+        size = self.sizeof(value)
+        with self._lock:
+            # Remove an existing entry for the key first.
+            if key in self._entries:
+                _, prev = self._entries.pop(key)
+                self.size -= prev
+            if size > self.capacity:
+                return
+            while self._entries and self.size + size > self.capacity:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.stats.evictions += 1
+            self._entries[key] = (value, size)
+            self.size += size
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def frame_size(df: pd.DataFrame) -> int:
+    """Get the memory usage (in bytes) for a given data frame, including the
+    memory for objects that are referenced by cells of the data frame.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data frame for a dataset snapshot.
+
+    Returns
+    -------
+    int
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
@@ -0,0 +1,520 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Streaming commit for the operations that were applied on a dataset sample.
+
+The default commit for a sample checks out the full dataset for every
+operation in the sample history, applies the operation on the data frame, and
+commits the result. This module implements an alternative that streams the
+rows of the latest snapshot of the full dataset in chunks of fixed size. Each
+operation is applied on one chunk at a time and the resulting rows are merged
+into the dataset archive while the stream is being read. Only a single chunk
+is kept in memory at any time.
+
+Chunks can be transformed in parallel by a pool of worker processes. Results
+are merged into the archive in the original row order. The number of chunks
+that are being processed at any time is bounded by twice the number of
+workers. Operations are sent to the worker processes using dill. This includes
+functions that were defined in the notebook and registered with the object
+library. Operations that cannot be serialized are applied in the main process
+(with a warning).
+
+Progress is reported to an optional callback after each chunk.
+"""
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import dill
+import pandas as pd
+import pickle
+import time
+import warnings
+
+from histore.document.base import DataRow, DefaultDocument, DocumentIterator, RowIndex
+from openclean.data.stream.base import Datasource
+from openclean.engine.action import InsertOp, OpHandle, UpdateOp
+from openclean.engine.dataset import DataSample, DatasetHandle
+from openclean.operator.transform.insert import inscol
+from openclean.operator.transform.update import update
+from openclean_notebook.library import to_eval
+
+
+"""Default number of rows in each chunk of a streaming commit."""
+DEFAULT_CHUNK_SIZE = 10000
+
+
+class CommitProgress(object):
+    """Progress tracker for a streaming commit. A commit consists of a sequence
+    of steps (one for each committed operation). Each step processes all rows
+    in the dataset. The total number of rows is known after the first step
+    (unless it is given when the tracker is created).
+
+    Progress is reported as a dictionary with the current step (starting at
+    1), the number of steps, the number of processed rows in the current step,
+    the total number of rows in the dataset (or None if unknown), and the
+    estimated time (in seconds) until all steps are completed (or None if the
+    total number of rows is unknown).
+    """
+    def __init__(
+        self, steps: int, callback: Optional[Callable[[Dict], None]] = None,
+        total: Optional[int] = None
+    ):
+        """Initialize the number of steps and the progress callback.
+
+        Parameters
+        ----------
+        steps: int
+            Number of steps in the commit.
+        callback: callable, default=None
+            Function that receives the progress reports.
+        total: int, default=None
+            Number of rows in the dataset (if known).
+        """
+        self.steps = steps
+        self.callback = callback
+        self.total = total
+        self.step = 0
+        self.start = time.perf_counter()
+
+    def next_step(self, rows: Optional[int] = None):
+        """Signal that the current step is finished. The number of rows that
+        were processed in the first step is used as the total number of rows
+        for the dataset.
+
+        Parameters
+        ----------
+        rows: int, default=None
+            Number of rows that were processed by the finished step.
+        """
+        if self.total is None and rows is not None:
+            self.total = rows
+        self.step += 1
+
+    def report(self, rows: int):
+        """Report the number of rows that have been processed by the current
+        step.
+
+        Parameters
+        ----------
+        rows: int
+            Number of processed rows in the current step.
+        """
+        if self.callback is None:
+            return
+        eta = None
+        if self.total is not None:
+            done = self.step * self.total + rows
+            remaining = self.steps * self.total - done
+            if done > 0:
+                eta = (time.perf_counter() - self.start) / done * max(remaining, 0)
+        self.callback({
+            'step': self.step + 1,
+            'steps': self.steps,
+            'rows': rows,
+            'total': self.total,
+            'eta': eta
+        })
+
+
+class ChunkedDocument(DefaultDocument):
+    """Document for the rows that result from applying an operation on the
+    rows of a data stream. The operation is applied on chunks of rows.
+    """
+    def __init__(
+        self, source: Datasource, action: OpHandle, chunk_size: int,
+        progress: Optional[CommitProgress] = None,
+        executor: Optional[Executor] = None, max_pending: Optional[int] = 1,
+        memo_size: Optional[int] = None
+    ):
+        """Initialize the input stream and the applied operation.
+
+        Parameters
+        ----------
+        source: openclean.data.stream.base.Datasource
+            Stream of rows in the original dataset snapshot.
+        action: openclean.engine.action.OpHandle
+            Insert or update operation that is applied on the rows.
+        chunk_size: int
+            Number of rows in each chunk.
+        progress: openclean_notebook.commit.CommitProgress, default=None
+            Optional progress tracker.
+        executor: concurrent.futures.Executor, default=None
+            Executor for transforming chunks in parallel. Chunks are
+            transformed in the main process if None.
+        max_pending: int, default=1
+            Maximum number of chunks that are submitted to the executor
+            before the result for the first of them is collected.
+        memo_size: int, default=None
+            Maximum number of distinct inputs for which the results of update
+            functions are memoized in each chunk.
+        """
+        super(ChunkedDocument, self).__init__(columns=output_schema(source.columns, action))
+        self.source = source
+        self.action = action
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.executor = executor
+        self.max_pending = max_pending
+        self.memo_size = memo_size
+        # Number of rows that were read by the last iterator over the document.
+        self.rows = 0
+
+    def chunks(self) -> Iterator[pd.DataFrame]:
+        """Iterate over the chunks of the input stream. Yields data frames
+        that contain the result of applying the operation on each chunk in
+        the order of the input rows.
+
+        Returns
+        -------
+        iterator of pd.DataFrame
+        """
+        self.rows = 0
+        if self.executor is None:
+            for df in self.read():
+                yield self.collect(apply_action(df, self.action, self.memo_size))
+            return
+        # Keep a queue of submitted chunks. Results are collected in the
+        # order in which the chunks were submitted.
+        # The operation is serialized once for all chunks.
+        action = dill.dumps(self.action)
+        pending = deque()
+        try:
+            for df in self.read():
+                pending.append(self.executor.submit(apply_serialized, df, action, self.memo_size))
+                if len(pending) >= self.max_pending:
+                    yield self.collect(pending.popleft().result())
+            while pending:
+                yield self.collect(pending.popleft().result())
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def close(self):
+        """There are no resources that need to be released."""
+        pass
+
+    def open(self) -> DocumentIterator:
+        """Open the document to get an iterator for the transformed rows.
+
+        Returns
+        -------
+        histore.document.base.DocumentIterator
+        """
+        return ChunkIterator(self.chunks())
+
+    def collect(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Count the rows in a transformed chunk and report the progress.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Transformed chunk of rows.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        self.rows += df.shape[0]
+        if self.progress is not None:
+            self.progress.report(self.rows)
+        return df
+
+    def read(self) -> Iterator[pd.DataFrame]:
+        """Read the rows of the input stream in chunks.
+
+        Returns
+        -------
+        iterator of pd.DataFrame
+        """
+        # Use plain column names. Column objects in the source schema cannot
+        # be sent to worker processes.
+        columns = [str(c) for c in self.source.columns]
+        index, data = list(), list()
+        for rowidx, row in self.source.iterrows():
+            index.append(rowidx)
+            data.append(row)
+            if len(data) == self.chunk_size:
+                yield pd.DataFrame(data=data, index=index, columns=columns)
+                index, data = list(), list()
+        if data:
+            yield pd.DataFrame(data=data, index=index, columns=columns)
+
+
+class ChunkIterator(DocumentIterator):
+    """Iterator over the rows in a sequence of data frame chunks."""
+    def __init__(self, chunks: Iterator[pd.DataFrame]):
+        """Initialize the chunk generator.
+
+        Parameters
+        ----------
+        chunks: iterator of pd.DataFrame
+            Generator for data frame chunks.
+        """
+        self._chunks = chunks
+        self._rows = iter(())
+        self._pos = 0
+
+    def close(self):
+        """Close the chunk generator (and the underlying input stream)."""
+        if self._chunks is not None:
+            self._chunks.close()
+            self._chunks = None
+
+    def next(self) -> Tuple[int, RowIndex, DataRow]:
+        """Read the next row in the document.
+
+        Returns
+        -------
+        tuple of int, histore.document.base.RowIndex, histore.document.base.DataRow
+        """
+        while True:
+            try:
+                rowidx, values = next(self._rows)
+                pos = self._pos
+                self._pos += 1
+                return pos, rowidx, list(values)
+            except StopIteration:
+                if self._chunks is None:
+                    raise
+                try:
+                    df = next(self._chunks)
+                except StopIteration:
+                    self.close()
+                    raise
+                self._rows = zip(df.index, df.itertuples(index=False, name=None))
+
+
+# -- Streaming commit ---------------------------------------------------------
+
+def commit_sample(
+    sample: DataSample, chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE,
+    progress: Optional[Callable[[Dict], None]] = None,
+    workers: Optional[int] = 1, memo_size: Optional[int] = None
+) -> List[OpHandle]:
+    """Apply all operations in the history of a dataset sample to the original
+    (full) dataset. Each operation creates a new snapshot of the original
+    dataset. The rows of the latest snapshot are streamed in chunks of the
+    given size. Each chunk is transformed and merged into the dataset archive
+    in the order of the input rows.
+
+    If more than one worker is given, chunks are transformed in parallel by
+    a pool of worker processes that exists for the duration of the commit.
+    Operations that cannot be serialized are applied in the main process. A
+    RuntimeWarning is issued for each of these operations.
+
+    Returns the list of actions that were committed to the original dataset.
+    Raises a RuntimeError if the sample history contains an operation other
+    than insert or update.
+
+    Parameters
+    ----------
+    sample: openclean.engine.dataset.DataSample
+        Handle for a dataset sample.
+    chunk_size: int, default=DEFAULT_CHUNK_SIZE
+        Number of rows in each chunk.
+    progress: callable, default=None
+        Function that receives progress reports (see :class:`CommitProgress`).
+    workers: int, default=1
+        Number of worker processes for transforming chunks.
+    memo_size: int, default=None
+        Maximum number of distinct inputs for which the results of update
+        functions are memoized in each chunk. Memoization is disabled if None.
+
+    Returns
+    -------
+    list of openclean.engine.action.OpHandle
+
+    Raises
+    ------
+    RuntimeError
+    ValueError
+    """
+    if chunk_size < 1:
+        raise ValueError('invalid chunk size {}'.format(chunk_size))
+    if workers < 1:
+        raise ValueError('invalid number of workers {}'.format(workers))
+    # Ignore the sample operation that is the first operation in the log.
+    # Ensure that all operations can be re-applied before modifying the
+    # original dataset.
+    ops = list(sample.log())[1:]
+    for op in ops:
+        if not (op.action.is_insert or op.action.is_update):
+            raise RuntimeError("cannot re-apply '{}'".format(op.optype))
+    tracker = CommitProgress(steps=len(ops), callback=progress)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and ops else None
+    committed = list()
+    try:
+        for op in ops:
+            action = commit_action(op.action, sample.original)
+            parallel = executor is not None and is_picklable(action)
+            if executor is not None and not parallel:
+                warnings.warn(
+                    "operation '{}' cannot be sent to worker processes; applying it in a single process".format(action.optype),
+                    RuntimeWarning
+                )
+            doc = ChunkedDocument(
+                source=sample.original.open(),
+                action=action,
+                chunk_size=chunk_size,
+                progress=tracker,
+                executor=executor if parallel else None,
+                max_pending=2 * workers,
+                memo_size=memo_size
+            )
+            sample.original.commit(source=doc, action=action)
+            tracker.next_step(rows=doc.rows)
+            committed.append(action)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return committed
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def apply_action(df: pd.DataFrame, action: OpHandle, memo_size: Optional[int] = None) -> pd.DataFrame:
+    """Apply an insert or update operation on a data frame.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Input data frame.
+    action: openclean.engine.action.OpHandle
+        Insert or update operation.
+    memo_size: int, default=None
+        Maximum number of distinct inputs for which the results of update
+        functions are memoized.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if action.is_insert:
+        return inscol(df=df, names=action.names, pos=action.pos, values=to_eval(action))
+    return update(df=df, columns=action.columns, func=to_eval(action, memo_size=memo_size))
+
+
+def apply_serialized(df: pd.DataFrame, action: bytes, memo_size: Optional[int] = None) -> pd.DataFrame:
+    """Apply a serialized insert or update operation on a data frame. This
+    function is called in the worker processes.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Input data frame.
+    action: bytes
+        Dill serialization of the insert or update operation.
+    memo_size: int, default=None
+        Maximum number of distinct inputs for which the results of update
+        functions are memoized.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    return apply_action(df, load_action(action), memo_size)
+
+
+def commit_action(action: OpHandle, dataset: DatasetHandle) -> OpHandle:
+    """Get a copy of an insert or update operation from the history of a
+    dataset sample for the schema of the latest snapshot of the original
+    dataset.
+
+    Parameters
+    ----------
+    action: openclean.engine.action.OpHandle
+        Insert or update operation.
+    dataset: openclean.engine.dataset.DatasetHandle
+        Handle for the original dataset.
+
+    Returns
+    -------
+    openclean.engine.action.OpHandle
+    """
+    schema = [str(c) for c in dataset.open().columns]
+    if action.is_insert:
+        return InsertOp(
+            schema=schema,
+            names=action.names,
+            pos=action.pos,
+            values=action.func,
+            args=action.args,
+            sources=action.sources
+        )
+    return UpdateOp(
+        schema=schema,
+        columns=action.columns,
+        func=action.func,
+        args=action.args,
+        sources=action.sources
+    )
+
+
+def is_picklable(action: OpHandle) -> bool:
+    """Test if an operation can be sent to a worker process. Operations are
+    serialized using dill.
+
+    Parameters
+    ----------
+    action: openclean.engine.action.OpHandle
+        Insert or update operation.
+
+    Returns
+    -------
+    bool
+    """
+    try:
+        dill.dumps(action)
+        return True
+    except (AttributeError, TypeError, pickle.PicklingError):
+        return False
+
+
+@lru_cache(maxsize=1)
+def load_action(action: bytes) -> OpHandle:
+    """Deserialize an operation that was sent to a worker process. The last
+    operation is cached since all chunks of a commit step use the same
+    operation.
+
+    Parameters
+    ----------
+    action: bytes
+        Dill serialization of an insert or update operation.
+
+    Returns
+    -------
+    openclean.engine.action.OpHandle
+    """
+    return dill.loads(action)
+
+
+def output_schema(columns: List[str], action: OpHandle) -> List[str]:
+    """Get the list of column names for the rows that are generated by an
+    insert or update operation.
+
+    Parameters
+    ----------
+    columns: list of string
+        Column names for the input rows.
+    action: openclean.engine.action.OpHandle
+        Insert or update operation.
+
+    Returns
+    -------
+    list of string
+    """
+    columns = list(columns)
+    if not action.is_insert:
+        return columns
+    names = action.names if isinstance(action.names, list) else [action.names]
+    pos = action.pos if action.pos is not None else len(columns)
+    if pos < 0 or pos > len(columns):
+        raise ValueError('invalid insert position {}'.format(pos))
+    return columns[:pos] + names + columns[pos:]
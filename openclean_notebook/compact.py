@@ -0,0 +1,284 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Compact representation for data frames of dataset snapshots. Snapshots
+that are checked out from the archive contain a separate Python object for
+each cell of a string column. For columns with few distinct values, the
+compact representation uses a dictionary encoding (pandas categorical type)
+that only stores each distinct string once. Integer columns are stored with
+the smallest integer type that can hold all values and float columns are
+stored as float32 if no precision is lost.
+
+Compact data frames can be created from a stream of snapshot rows (see
+:func:`compact_stream`) without checking out the full snapshot first. They
+can be used for serving pages, sorting, and filtering in the spreadsheet view. Functions that expect the values of the original
+snapshot (e.g., the data profiler) get a copy of the data frame with the
+original types (see :func:`expand_frame`).
+"""
+
+from typing import Dict, List, Optional
+
+from histore.document.base import Document
+
+import numpy as np
+import pandas as pd
+
+
+"""Maximum ratio of distinct values to rows for dictionary-encoded string
+columns.
+"""
+DEFAULT_MAX_RATIO = 0.5
+
+"""Number of rows in each chunk when reading compact snapshots."""
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def compact_frame(df: pd.DataFrame, max_ratio: float = DEFAULT_MAX_RATIO) -> pd.DataFrame:
+    """Get a compact representation of a data frame. String columns where
+    the number of distinct values does not exceed the given ratio of the
+    number of rows are dictionary-encoded. Only columns where all values are
+    strings (or missing) are encoded since the categories for columns with
+    values of mixed types cannot be sorted. Numeric columns and columns of
+    Python integers are downcast without loss of precision.
+
+    Returns the given data frame if no column is converted.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data frame for a dataset snapshot.
+    max_ratio: float, default=DEFAULT_MAX_RATIO
+        Maximum ratio of distinct values to rows for dictionary-encoded
+        columns.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    columns = dict()
+    for pos in range(df.shape[1]):
+        values = compact_column(df.iloc[:, pos], max_ratio=max_ratio)
+        if values is not None:
+            columns[pos] = values
+    return replace_columns(df, columns)
+
+
+def compact_stream(
+    doc: Document, chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE,
+    max_ratio: float = DEFAULT_MAX_RATIO
+) -> pd.DataFrame:
+    """Get a compact data frame for the rows in a dataset snapshot document
+    (e.g., the snapshot reader of an archive). Rows are read in chunks. The
+    columns in each chunk are compacted before the next chunk is read so that
+    the uncompacted rows of the full snapshot are never kept in memory at the
+    same time. Rows are ordered by their position in the snapshot.
+
+    Parameters
+    ----------
+    doc: histore.document.base.Document
+        Document for the rows in a dataset snapshot.
+    chunk_size: int, default=DEFAULT_CHUNK_SIZE
+        Number of rows in each chunk.
+    max_ratio: float, default=DEFAULT_MAX_RATIO
+        Maximum ratio of distinct values to rows for dictionary-encoded
+        columns.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    columns = list(doc.columns)
+    chunks, positions, index, rows = list(), list(), list(), list()
+    with doc.open() as reader:
+        for pos, rowidx, values in reader:
+            positions.append(pos)
+            index.append(rowidx)
+            rows.append(values)
+            if len(rows) == chunk_size:
+                chunks.append(compact_frame(pd.DataFrame(data=rows, dtype=object), max_ratio=max_ratio))
+                rows = list()
+    if rows or not chunks:
+        chunks.append(compact_frame(pd.DataFrame(data=rows, columns=range(len(columns)), dtype=object), max_ratio=max_ratio))
+    # Combine the compacted chunks column by column.
+    nrows = len(index)
+    data = [
+        concat_column([chunk.iloc[:, pos] for chunk in chunks], nrows=nrows, max_ratio=max_ratio)
+        for pos in range(len(columns))
+    ]
+    df = pd.concat(data, axis=1, copy=False, ignore_index=True) if data else pd.DataFrame(index=range(nrows))
+    df.columns = columns
+    df.index = index
+    # Sort rows by their position if the document is not read in order.
+    order = np.argsort(np.asarray(positions, dtype=np.int64), kind='stable')
+    if not np.array_equal(order, np.arange(nrows)):
+        df = df.iloc[order]
+    return df
+
+
+def compact_column(values: pd.Series, max_ratio: float = DEFAULT_MAX_RATIO) -> pd.Series:
+    """Get a compact representation of the values in a data frame column.
+    Returns None if the column cannot be represented more compactly.
+
+    Parameters
+    ----------
+    values: pd.Series
+        Values in a data frame column.
+    max_ratio: float, default=DEFAULT_MAX_RATIO
+        Maximum ratio of distinct values to rows for dictionary-encoded
+        columns.
+
+    Returns
+    -------
+    pd.Series
+    """
+    dtype = values.dtype
+    if not isinstance(dtype, np.dtype):
+        # Columns that have an extension type (e.g., categories) already.
+        return None
+    if dtype.kind == 'i' or dtype.kind == 'u':
+        downcast = 'unsigned' if dtype.kind == 'u' else 'integer'
+        result = pd.to_numeric(values, downcast=downcast)
+        return result if result.dtype != dtype else None
+    elif dtype == np.float64:
+        data = values.to_numpy()
+        compact = data.astype(np.float32)
+        # Only downcast if all values are preserved exactly.
+        if np.array_equal(compact.astype(np.float64), data, equal_nan=True):
+            return pd.Series(compact, index=values.index, name=values.name)
+        return None
+    elif dtype.kind == 'O' and len(values) > 0:
+        inferred = pd.api.types.infer_dtype(values, skipna=False)
+        if inferred == 'integer':
+            # Columns of Python integers (without missing values) in
+            # checked out snapshots.
+            try:
+                data = values.to_numpy(dtype=np.int64)
+            except OverflowError:
+                return None
+            return pd.to_numeric(pd.Series(data, index=values.index, name=values.name), downcast='integer')
+        if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+            return None
+        if values.nunique(dropna=True) > max_ratio * len(values):
+            return None
+        return values.astype('category')
+    return None
+
+
+def expand_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Get a data frame with the original column types for a compact data
+    frame (see :func:`compact_frame`). Dictionary-encoded columns are
+    converted into columns of Python objects where missing values are None.
+    Downcast integer and float columns are converted into int64 and float64
+    columns. Note that the original type is not restored for columns of
+    Python integers (int64) and for unsigned integer columns (int64).
+
+    Returns the given data frame if no column has to be converted.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Compact data frame.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    columns = dict()
+    for pos in range(df.shape[1]):
+        values = df.iloc[:, pos]
+        dtype = values.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            columns[pos] = expand_column(values)
+        elif not isinstance(dtype, np.dtype):
+            continue
+        elif dtype.kind in 'iu' and dtype.itemsize < 8:
+            columns[pos] = values.astype(np.int64)
+        elif dtype == np.float32:
+            columns[pos] = values.astype(np.float64)
+    return replace_columns(df, columns)
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def concat_column(pieces: List[pd.Series], nrows: int, max_ratio: float = DEFAULT_MAX_RATIO) -> pd.Series:
+    """Concatenate the compacted values of a column in consecutive chunks of
+    snapshot rows. The dictionaries of encoded chunks are merged if all chunks
+    are encoded. Otherwise, the values are converted into the original types
+    and the concatenated column is compacted again.
+
+    Parameters
+    ----------
+    pieces: list of pd.Series
+        Compacted column values for each chunk.
+    nrows: int
+        Total number of rows in the column.
+    max_ratio: float, default=DEFAULT_MAX_RATIO
+        Maximum ratio of distinct values to rows for dictionary-encoded
+        columns.
+
+    Returns
+    -------
+    pd.Series
+    """
+    if len(pieces) == 1:
+        return pieces[0].reset_index(drop=True)
+    if all(isinstance(values.dtype, pd.CategoricalDtype) for values in pieces):
+        values = pd.api.types.union_categoricals(pieces, sort_categories=True, ignore_order=True)
+        if len(values.categories) <= max_ratio * nrows:
+            return pd.Series(values)
+    values = pd.concat(
+        [expand_column(values) for values in pieces],
+        ignore_index=True,
+        copy=False
+    )
+    compact = compact_column(values, max_ratio=max_ratio)
+    return compact if compact is not None else values
+
+
+def expand_column(values: pd.Series) -> pd.Series:
+    """Get the values of a dictionary-encoded column as Python objects where
+    missing values are None. Returns the given column if it is not encoded.
+
+    Parameters
+    ----------
+    values: pd.Series
+        Values in a data frame column.
+
+    Returns
+    -------
+    pd.Series
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    data = values.to_numpy(dtype=object, copy=True)
+    data[pd.isna(data)] = None
+    return pd.Series(data, index=values.index, name=values.name, dtype=object)
+
+
+def replace_columns(df: pd.DataFrame, columns: Dict[int, pd.Series]) -> pd.DataFrame:
+    """Get a copy of a data frame where the columns at the given positions
+    are replaced. Columns are addressed by position since column names in a
+    snapshot are not necessarily unique. Returns the given data frame if the
+    dictionary of replaced columns is empty.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data frame for a dataset snapshot.
+    columns: dict
+        Mapping of column positions to replaced column values.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if not columns:
+        return df
+    data = [columns.get(pos, df.iloc[:, pos]) for pos in range(df.shape[1])]
+    result = pd.concat(data, axis=1, copy=False)
+    result.columns = df.columns
+    return result
@@ -5,9 +5,75 @@
 # openclean is released under the Revised BSD License. See file LICENSE for
 # full license details.
 
-"""Helper functions to register callbacks for web socket messages."""
+"""Helper functions to register callbacks for web socket messages. The time
+for handling each message and for sending the response as well as the sizes
+of request and response are added to the process-wide metrics registry under
+the scope 'comm:<message>' (see :mod:`openclean_notebook.metrics`).
+"""
 
-from typing import Callable
+from typing import Any, Callable, Dict, List, Optional
+
+import base64
+import json
+
+from openclean_notebook.metrics import RequestTimer, registry
+
+
+class BinaryResponse(dict):
+    """Response document that is accompanied by a list of binary buffers. The
+    document is a dictionary that references the buffers by their index
+    position in the buffer list.
+
+    In Jupyter environments the buffers are send as binary message parts. For
+    environments that only support Json messages the buffers are included in
+    the document as Base64-encoded strings (see :meth:`to_json`).
+    """
+    def __init__(self, doc: Dict, buffers: Optional[List[memoryview]] = None):
+        """Initialize the response document and the list of binary buffers.
+
+        Parameters
+        ----------
+        doc: dict
+            Json serializable response document.
+        buffers: list of memoryview, default=None
+            List of binary buffers that are referenced by the document.
+        """
+        super(BinaryResponse, self).__init__(doc)
+        self.buffers = buffers if buffers is not None else list()
+
+    def to_json(self) -> Dict:
+        """Get a Json serializable copy of the response where the buffers are
+        included as a list of Base64-encoded strings in the 'buffers' element.
+
+        Returns
+        -------
+        dict
+        """
+        doc = dict(self)
+        doc['buffers'] = [base64.b64encode(b).decode('ascii') for b in self.buffers]
+        return doc
+
+
+def message_size(msg: Any) -> int:
+    """Get the (approximate) number of bytes for a message that is sent over
+    a comm channel. The size is the length of the Json serialization of the
+    message plus the size of the binary buffers for binary responses. Sizes
+    are only measured if the message_sizes flag of the metrics registry is set
+    (see :class:`openclean_notebook.metrics.MetricsRegistry`).
+
+    Parameters
+    ----------
+    msg: any
+        Json serializable message or binary response.
+
+    Returns
+    -------
+    int
+    """
+    size = len(json.dumps(msg, default=str))
+    if isinstance(msg, BinaryResponse):
+        size += sum(b.nbytes for b in msg.buffers)
+    return size
 
 
 def register_handler(message: str, callback: Callable):  # pragma: no cover
@@ -20,7 +86,9 @@ def register_handler(message: str, callback: Callable):  # pragma: no cover
         Unique message name (identifier).
     callback: callable
         Handler that is called on incomming messages. The message data will be
-        passed to the handler as the only argument.
+        passed to the handler as the first argument. In environments that
+        allow to push additional messages to the client, a function for
+        sending messages is passed as the keyword argument 'send'.
     """
     # Function that abstracts notebook connection to javascript
     try:
@@ -48,7 +116,10 @@ def register_jupyter_handler(message: str, callback: Callable):
         Unique message name (identifier).
     callback: callable
         Handler that is called on incomming messages. The message data will be
-        passed to the handler as the only argument.
+        passed to the handler as the first argument. A function that sends
+        messages on the same comm channel is passed as the keyword argument
+        'send'. The handler may use the function to push messages after the
+        response has been returned.
 
     Raises
     ------
@@ -57,12 +128,28 @@ def register_jupyter_handler(message: str, callback: Callable):
     # Create handler that calls the given callback function on incomming
     # requests.
     def _msg_handler(comm, open_msg):  # pragma: no cover
+        def _send(resp):
+            if isinstance(resp, BinaryResponse):
+                comm.send(dict(resp), buffers=resp.buffers)
+            else:
+                comm.send(resp)
+
         @comm.on_msg
         def _recv(msg):
             # Call the given callback handler with the message data and send
             # the returned response.
-            resp = callback(msg['content']['data'])
-            comm.send(resp)
+            timer = RequestTimer()
+            data = msg['content']['data']
+            with timer.phase('handler'):
+                resp = callback(data, send=_send)
+            with timer.phase('send'):
+                _send(resp)
+            # Message sizes require an additional serialization of the
+            # messages. They are only measured if requested.
+            if registry.message_sizes:
+                timer.add_bytes('request', message_size(data))
+                timer.add_bytes('response', message_size(resp))
+            registry.record('comm:{}'.format(message), timer)
     # Attempt to register the Web Socket message handler. THis will raise
     # a NameError if called outside of a Jupyter Notebook environment.
     comm_manager = get_ipython().kernel.comm_manager  # noqa: F821
@@ -80,7 +167,8 @@ def register_colab_handler(message: str, callback: Callable):  # pragma: no cove
         Unique message name (identifier).
     callback: callable
         Handler that is called on incomming messages. The message data will be
-        passed to the handler as the only argument.
+        passed to the handler as the only argument. Colab callbacks cannot push
+        additional messages to the client.
 
     Raises
     ------
@@ -93,6 +181,19 @@ def register_colab_handler(message: str, callback: Callable):  # pragma: no cove
     def _recv(msg):
         # Call the given callback handler with the message data and send
         # the returned response.
-        return display.JSON(callback(msg))  # Use display.JSON to transfer an object
+        timer = RequestTimer()
+        with timer.phase('handler'):
+            resp = callback(msg)
+        with timer.phase('send'):
+            if isinstance(resp, BinaryResponse):
+                # Colab only supports Json messages. Binary buffers are Base64
+                # encoded.
+                resp = resp.to_json()
+            result = display.JSON(resp)  # Use display.JSON to transfer an object
+        if registry.message_sizes:
+            timer.add_bytes('request', message_size(msg))
+            timer.add_bytes('response', message_size(resp))
+        registry.record('comm:{}'.format(message), timer)
+        return result
 
     output.register_callback(message, _recv)
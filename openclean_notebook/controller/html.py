@@ -7,14 +7,26 @@
 
 """Helper functions to generate embeddable HTML for displaying Javascript UI
 components in a Jupyter or Colab notebook.
+
+By default, the Javascript bundle is included in the HTML for every displayed
+component. In load-once mode the bundle is only included with the first
+component that is displayed by the kernel. All other components only contain a
+small bootstrap script that renders the component when the bundle is
+available. The output that contained the bundle may no longer be displayed
+(e.g., if the cell was re-run or cleared, or if the notebook page was reloaded
+in the browser). In this case the bootstrap script requests the bundle from
+the kernel via the comm channel (see :func:`bundle_api`) and injects it into
+the page.
 """
 
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
 import json
 import pkg_resources
+import threading
 import uuid
 
-from typing import Dict
-
 
 """Relative path to the folder containing Javascript libraries and HTML
 templates
@@ -23,7 +35,22 @@ JAVASCRIPT = '../ui/{}'
 TEMPLATES = '../ui/templates/{}'
 
 
-def make_html(template: str, library: str, data: Dict) -> str:
+"""Name of the comm channel for requests of the bootstrap script for the
+Javascript bundle.
+"""
+BUNDLE_CHANNEL = 'openclean_bundle'
+
+
+"""Set of Javascript bundles that have been included in the HTML output of the
+kernel (in load-once mode).
+"""
+_loaded = set()
+_lock = threading.Lock()
+
+
+def make_html(
+    template: str, library: str, data: Dict, bootstrap: Optional[str] = None
+) -> str:
     """Create HTML string from a given template. The package name references a
     (bundeled) Javascript file containint all required Javascript scripts. The
     script parameter is the name of the main Javascript routine in the package
@@ -32,6 +59,11 @@ def make_html(template: str, library: str, data: Dict) -> str:
     should be rendered, and (2) the data dictionary that is passes to this
     function as an argument.
 
+    If the name of a bootstrap template is given, the Javascript bundle is only
+    included the first time that HTML is generated for the library (load-once
+    mode). Subsequent calls use the bootstrap template instead, which does not
+    include the bundle.
+
     Parameters
     ----------
     template: string
@@ -43,18 +75,35 @@ def make_html(template: str, library: str, data: Dict) -> str:
     data: dict
         Dictionary containing data that is being embedded into the returned
         HTML string and passed to the script as the second argument.
+    bootstrap: string, default=None
+        Name of the HTML template that is used in load-once mode if the
+        Javascript bundle has already been included in a previous output.
 
     Returns
     -------
     string
     """
-    # Read the HTML template and the Javascript bundle file.
-    html_template = readfile(TEMPLATES.format(template))
-    js_bundle = readfile(JAVASCRIPT.format(library))
     # Generate a unique identifier for the DOM element. Ensure that the
     # identifier does not start with a digit (to avoid 'not a valid selector'
     # exceptions in Javascript).
     id = '_div{}'.format(str(uuid.uuid4()).replace('-', ''))
+    # In load-once mode, use the bootstrap template if the bundle has been
+    # included before.
+    if bootstrap is not None:
+        with _lock:
+            loaded = library in _loaded
+            _loaded.add(library)
+        if loaded:
+            html_template = readfile(TEMPLATES.format(bootstrap))
+            return html_template.format(
+                id=id,
+                channel=BUNDLE_CHANNEL,
+                library=json.dumps(library),
+                data=json.dumps(data)
+            )
+    # Read the HTML template and the Javascript bundle file.
+    html_template = readfile(TEMPLATES.format(template))
+    js_bundle = readfile(JAVASCRIPT.format(library))
     # Return the formated template.
     return html_template.format(
         id=id,
@@ -63,10 +112,52 @@ def make_html(template: str, library: str, data: Dict) -> str:
     )
 
 
+def bundle_api(request: Dict, send: Optional[Callable] = None) -> Dict:
+    """Handler for requests of the bootstrap script for a Javascript bundle
+    that is not loaded in the browser. Expects a dictionary with the name of
+    the requested bundle in the 'library' element. Only bundles that have
+    been included in the output of the kernel in load-once mode can be
+    requested.
+
+    Returns a dictionary with the name of the library and the source code of
+    the bundle ('bundle') or an error message ('error').
+
+    Parameters
+    ----------
+    request: dict
+        Request document from the bootstrap script.
+    send: callable, default=None
+        Function for pushing messages to the client (unused).
+
+    Returns
+    -------
+    dict
+    """
+    library = request.get('library')
+    with _lock:
+        loaded = library in _loaded
+    if not loaded:
+        return {'library': library, 'error': "unknown library '{}'".format(library)}
+    return {'library': library, 'bundle': readfile(JAVASCRIPT.format(library))}
+
+
+def reset():
+    """Forget which Javascript bundles have been included in previous outputs.
+    The next component that is displayed in load-once mode will include the
+    bundle again. This is not required if the output that contained the
+    bundle was cleared or if the notebook page was reloaded since the
+    bootstrap script requests the bundle from the kernel in these cases.
+    """
+    with _lock:
+        _loaded.clear()
+
+
+@lru_cache(maxsize=None)
 def readfile(filename: str) -> str:
     """Read a file that is contained in the openclean_notebook package. This is
     a helper method to read Javascript files and HTML templates that are part
-    of the openclean_notebook package.
+    of the openclean_notebook package. File contents are cached since package
+    files do not change while the kernel is running.
 
     Returns a string containing the file contents.
 
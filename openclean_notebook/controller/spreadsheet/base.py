@@ -7,30 +7,74 @@
 
 """Request handler for the spreadsheet view in the notebook."""
 
-from flowserv.service.run.argument import deserialize_arg
-from jsonschema import Draft7Validator, RefResolver
-from typing import Any, Dict, List, Tuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import importlib.resources as pkg_resources
 import json
+import numpy as np
 import os
+import pandas as pd
 
-
-from openclean_notebook.controller.comm import register_handler
-from openclean_notebook.controller.html import make_html
+from openclean.engine.dataset import DatasetHandle
+from openclean_notebook.controller.comm import BinaryResponse, register_handler
+from openclean_notebook.controller.html import BUNDLE_CHANNEL, bundle_api, make_html
 from openclean_notebook.engine import OpencleanAPI
+from openclean_notebook.controller.spreadsheet.prefetch import FORMAT_BINARY, FORMAT_COLUMNS, FORMAT_ROWS  # noqa: F401
+from openclean_notebook.library import insert_column, update_columns
+from openclean_notebook.metrics import RequestTimer, registry
 
 import openclean_notebook.controller.spreadsheet.data as ds
+import openclean_notebook.controller.spreadsheet.delta as delta
+import openclean_notebook.controller.spreadsheet.prefetch as prefetch
+import openclean_notebook.controller.spreadsheet.query as query
+
+
+"""The schema validator for API requests is created on first use. The module
+attribute 'validator' is kept for backward compatibility (see
+:func:`get_validator`).
+"""
+
+
+def __getattr__(name: str) -> Any:
+    """Create the request validator when the module attribute 'validator' is
+    accessed for the first time (PEP 562).
+    """
+    if name == 'validator':
+        return get_validator()
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
 
 
-"""Create schema validator for API requests."""
-# Make sure that the path to the schema file is a valid URI. Otherwise, errors
-# occur (at least on MS Windows environments). Changed based on:
-# https://github.com/Julian/jsonschema/issues/398#issuecomment-385130094
-schemafile = 'file:///{}'.format(os.path.abspath(os.path.join(__file__, 'schema.json')))
-schema = json.load(pkg_resources.open_text(__package__, 'schema.json'))
-resolver = RefResolver(schemafile, schema)
-validator = Draft7Validator(schema=schema['definitions']['request'], resolver=resolver)
+@lru_cache(maxsize=None)
+def get_validator(definition: Optional[str] = 'request'):
+    """Get the schema validator for API requests. The returned validator
+    accepts frequent requests (e.g., for pagination) without running the
+    generic Json schema validator and reports errors in the same way as the
+    Json schema validator for the request definition.
+
+    Parameters
+    ----------
+    definition: string, default='request'
+        Name of the schema definition for valid requests (e.g., 'request'
+        or 'batchRequest').
+
+    Returns
+    -------
+    openclean_notebook.controller.spreadsheet.validation.RequestValidator
+    """
+    from jsonschema import Draft7Validator, RefResolver
+    from openclean_notebook.controller.spreadsheet.validation import RequestValidator
+    # Make sure that the path to the schema file is a valid URI. Otherwise, errors
+    # occur (at least on MS Windows environments). Changed based on:
+    # https://github.com/Julian/jsonschema/issues/398#issuecomment-385130094
+    schemafile = 'file:///{}'.format(os.path.abspath(os.path.join(__file__, 'schema.json')))
+    schema = json.load(pkg_resources.open_text(__package__, 'schema.json'))
+    resolver = RefResolver(schemafile, schema)
+    return RequestValidator(
+        schema=schema,
+        definition=definition,
+        validator=Draft7Validator(schema=schema['definitions'][definition], resolver=resolver)
+    )
 
 
 """Default number of rows returned by a fetch request."""
@@ -39,7 +83,7 @@ DEFAULT_LIMIT = 10
 
 # -- Request handler ----------------------------------------------------------
 
-def spreadsheet_api(request: Dict) -> Dict:
+def spreadsheet_api(request: Dict, send: Optional[Callable] = None) -> Dict:
     """Handler for requests of the spreadsheet view in notebooks. Expects a
     dictionary that adheres to the following schema (see `schema.json` for the
     full Json Schema definition):
@@ -63,13 +107,57 @@ def spreadsheet_api(request: Dict) -> Dict:
                     type: boolean
                   includeMetadata:
                     type: boolean
+                  format:
+                    enum:
+                    - binary
+                    - columns
+                    - rows
                   limit:
                     minimum: 1
                     type: integer
                   offset:
                     minimum: 0
                     type: integer
+                  filter:
+                    items:
+                      $ref: '#/definitions/predicate'
+                    type: array
+                  sortBy:
+                    $ref: '#/definitions/sortBy'
+                  prefetch:
+                    minimum: 0
+                    type: integer
+                  includePrefetched:
+                    type: boolean
+                  knownVersion:
+                    minimum: 0
+                    type: integer
+                  includeTimings:
+                    type: boolean
                 type: object
+              find:
+                properties:
+                  columns:
+                    items:
+                      type:
+                      - integer
+                      - string
+                    type: array
+                  limit:
+                    minimum: 1
+                    type: integer
+                  op:
+                    enum:
+                    - contains
+                    - eq
+                    - prefix
+                    - regex
+                  value: {}
+                required:
+                - value
+                type: object
+              debug:
+                type: boolean
             required:
             - dataset
             - fetch
@@ -90,7 +178,10 @@ def spreadsheet_api(request: Dict) -> Dict:
     - commit:   apply all uncommitted changes to the full dataset. This action
                 is only available for datasets that are samples of a larger
                 dataset. The commit will execute all operations that were
-                previously applied to the sample on the full dataset.
+                previously applied to the sample on the full dataset. Rows of
+                the full dataset are processed in chunks. If the send function
+                is given, a 'progress' message is pushed to the client after
+                each chunk (see :func:`commit_progress`).
     - inscol:   Insert one or multiple columns into the dataset. The additional
                 'payload' object specifies the new column names, the insert
                 positions, and default values for the inserted columns.
@@ -109,97 +200,778 @@ def spreadsheet_api(request: Dict) -> Dict:
     'limit' parameter . The default is defined by the DEFAULT_LIMIT variable. In
     the future we may want to introduce an environment variable for this.
 
+    Rows are returned as a list of objects in the 'rows' element by default. If
+    the 'format' parameter is set to 'columns' the response contains a 'data'
+    element instead with a list of row identifiers ('index') and the list of
+    cell values for each column ('values'). If the format is 'binary' the row
+    identifiers and cell values are encoded as binary buffers that are sent
+    together with the response document (see
+    :func:`openclean_notebook.controller.spreadsheet.data.encode_column` for
+    details on the encoding).
+
+    If the 'sortBy' parameter is given, rows are returned in the order of the
+    values in the specified column (identified by index position or name).
+    The 'offset' and 'limit' parameters then refer to the sorted rows. The
+    sort order for each snapshot and column is computed only once and then
+    served from the engine (see
+    :func:`openclean_notebook.engine.OpencleanAPI.sort_order`).
+
+    The 'filter' parameter contains a list of predicates on column values.
+    Only rows that satisfy all predicates are included in the view. Each
+    predicate has an operator ('contains', 'eq', 'null', 'prefix', 'range', or
+    'regex') and can be negated. Predicates are evaluated using inverted value
+    indexes for the snapshot columns that are maintained by the engine (see
+    :class:`openclean_notebook.index.ValueIndex`). The 'offset' and 'limit'
+    parameters as well as the 'rowCount' in the response refer to the rows in
+    the filtered (and sorted) view.
+
+    If the 'prefetch' parameter is greater than zero, the pages that precede
+    and follow the requested page (up to the given depth in each direction)
+    are serialized in a background task and added to the page cache of the
+    engine. Subsequent requests for these pages are served from the cache.
+    The 'timings' element of the response then contains the hit rate of
+    the page cache (see below) unless 'includeTimings' is False. If the
+    'includePrefetched' flag is set, adjacent pages that are in the page
+    cache already are included in the 'prefetched' element of the response
+    (see :func:`fetch_page`).
+
+    If the request contains the version of the snapshot that is displayed by
+    the client ('knownVersion'), the response is a delta with respect to that
+    snapshot (see :mod:`openclean_notebook.controller.spreadsheet.delta`).
+    If the schema and the rows in the visible window did not change, the
+    'delta' element contains the list of changed cells ('cells') instead of
+    the column names and the serialized rows. If the schema did not change,
+    the metadata is replaced by the new log entries and the changed column
+    profiles ('delta.metadata'). All responses contain the identifier of the
+    returned snapshot ('snapshot').
+
+    The optional 'find' element of a request contains a predicate for cell
+    values. The response then contains the total number of cells in the view
+    that satisfy the predicate and the list of matching cells (identified by
+    the row position in the view, the row identifier and the column index).
+
     The response will contain additional metadata if (i) the 'includeMetadata'
     flag is set to True or if an action is performed that modifies the dataset.
     Metadata includes the results of a data profiler as well as the list of
     uncommitted actions (only if the dataset is a sample of a larger dataset).
+    If the client can receive messages that are pushed by the server (i.e., if
+    the send function is given) and the profiling results for the dataset
+    snapshot do not exist yet, the profiler is run in the background. The
+    response then contains only the operation log and the 'pending' flag. The
+    profiling results are sent in a separate 'metadata' message (see
+    :func:`push_metadata`).
     In addition, the request can contain the 'includeLibrary' flag in order to
     obtain a list of registered commands (evaluation functions) that can be
     applied to the dataset.
 
+    Each request is instrumented with a timer for the different phases of
+    processing the request ('validate', 'delta', 'action', 'checkout',
+    'view', 'page', 'find', 'metadata', and 'library') and byte counts for
+    the binary buffers of the response. The size of the request document is
+    only counted if the message_sizes flag of the metrics registry is set or
+    if the request is captured (see below). Timers are
+    added to the process-wide metrics registry under the identifier of the
+    engine (see :meth:`openclean_notebook.engine.OpencleanAPI.metrics`). If
+    the 'includeTimings' flag is set (default is True for requests with
+    read-ahead), the response contains the timer in the 'timings' element.
+
+    If the 'debug' flag is set (or if debugging is enabled for the engine),
+    the request is executed under cProfile and tracemalloc. The capture is
+    added to the ring buffer of recent captures of the engine (see
+    :class:`openclean_notebook.debug.CaptureBuffer`) and the response
+    contains the capture identifier ('capture').
+
+    Multiple requests can be sent in a single message using a batch envelope
+    (see the 'batchRequest' definition in `schema.json`). Requests in a batch
+    are processed in order and share the dataset snapshots that are checked
+    out while processing the batch. The result is a 'batch' response that
+    contains the list of responses in request order (see
+    :func:`batch_response`). The time for validating the batch envelope is
+    added to the timer of the first request in the batch.
+
     Parameters
     ----------
     request: dict
         Request body.
+    send: callable, default=None
+        Function for pushing additional messages to the client.
 
     Returns
     -------
-    dict
+    dict or openclean_notebook.controller.comm.BinaryResponse
     """
+    timer = RequestTimer()
+    if 'batch' in request:
+        # Validate the batch envelope (including all requests in the batch)
+        # before processing the first request.
+        with timer.phase('validate'):
+            get_validator('batchRequest').validate(request)
+        snapshots = dict()
+        return batch_response([
+            process_request(request=r, send=send, snapshots=snapshots, timer=timer if i == 0 else None)
+            for i, r in enumerate(request['batch'])
+        ])
     # Validate the given request against the API request schema.
-    validator.validate(request)
+    with timer.phase('validate'):
+        get_validator().validate(request)
+    return process_request(request=request, send=send, timer=timer)
+
+
+def process_request(
+    request: Dict, send: Optional[Callable] = None, snapshots: Optional[Dict] = None,
+    timer: Optional[RequestTimer] = None
+) -> Dict:
+    """Process a single validated request for the spreadsheet API (see
+    :func:`spreadsheet_api` for details).
+
+    Parameters
+    ----------
+    request: dict
+        Request body.
+    send: callable, default=None
+        Function for pushing additional messages to the client.
+    snapshots: dict, default=None
+        Dataset snapshots that were checked out for previous requests in the
+        same batch. Snapshots are keyed by the dataset name and the snapshot
+        version (None for the latest snapshot).
+    timer: openclean_notebook.metrics.RequestTimer, default=None
+        Timer for the request. A new timer is started if None.
+
+    Returns
+    -------
+    dict or openclean_notebook.controller.comm.BinaryResponse
+    """
+    timer = timer if timer is not None else RequestTimer()
     # Get the dataset handle and API engine.
     dataset, engine = ds.deserialize(request['dataset'])
+    debug = request.get('debug', engine.debug)
+    # The request size is only measured if message sizes are recorded by the
+    # metrics registry or if the request is captured, since measuring it
+    # requires serializing the request.
+    if registry.message_sizes or debug:
+        timer.add_bytes('request', len(json.dumps(request)))
+    # Capture a profile of the request if requested by the client or if
+    # debugging is enabled for the engine.
+    if debug:
+        doc, capture = engine.captures.run(
+            request=request,
+            func=lambda: execute_request(request, dataset, engine, send=send, snapshots=snapshots, timer=timer)
+        )
+        doc['capture'] = capture.identifier
+        return doc
+    return execute_request(request, dataset, engine, send=send, snapshots=snapshots, timer=timer)
+
+
+def execute_request(
+    request: Dict, dataset: DatasetHandle, engine: OpencleanAPI,
+    send: Optional[Callable] = None, snapshots: Optional[Dict] = None,
+    timer: Optional[RequestTimer] = None
+) -> Dict:
+    """Execute a single validated request for the spreadsheet API on the
+    referenced dataset (see :func:`spreadsheet_api` for details).
+
+    Parameters
+    ----------
+    request: dict
+        Request body.
+    dataset: openclean.engine.dataset.DatasetHandle
+        Handle for the referenced dataset.
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    send: callable, default=None
+        Function for pushing additional messages to the client.
+    snapshots: dict, default=None
+        Dataset snapshots that were checked out for previous requests in the
+        same batch.
+    timer: openclean_notebook.metrics.RequestTimer, default=None
+        Timer for the request. A new timer is started if None.
+
+    Returns
+    -------
+    dict or openclean_notebook.controller.comm.BinaryResponse
+    """
+    timer = timer if timer is not None else RequestTimer()
+    name = request['dataset']['name']
+    fetch = request['fetch']
+    limit = fetch.get('limit', DEFAULT_LIMIT)
+    offset = fetch.get('offset', 0)
+    version = fetch.get('version')
+    sort_by = fetch.get('sortBy')
+    filters = fetch.get('filter')
+    # In delta mode, get the visible window of the snapshot that is displayed
+    # by the client before the dataset is modified.
+    known = None
+    if fetch.get('knownVersion') is not None and version is None:
+        with timer.phase('delta'):
+            known = delta.known_view(
+                engine=engine,
+                dataset=dataset,
+                name=name,
+                version=fetch['knownVersion'],
+                offset=offset,
+                limit=limit,
+                filters=filters,
+                sort_by=sort_by
+            )
     # If the action element is present we first apply the specified operation on
     # the dataset before returning data from the (modified) dataset.
     action = request.get('action')
+    changed = None
     if action is not None:
-        action_type = action['type']
-        payload = action.get('payload')
-        if action_type == 'commit':
-            dataset.apply()
-        elif action_type == 'inscol':
-            values, args = get_eval(
-                engine=engine,
-                func=payload.get('values'),
-                args=payload.get('args')
-            )
-            dataset.insert(
-                names=payload.get('names'),
-                pos=payload.get('pos'),
-                values=values,
-                args=args,
-                sources=payload.get('sources')
-            )
-        elif action_type == 'rollback':
-            dataset.rollback(payload)
-        else:  # action_type == 'update'
-            func, args = get_eval(
-                engine=engine,
-                func=payload.get('func'),
-                args=payload.get('args')
-            )
-            dataset.update(
-                columns=payload.get('columns'),
-                func=func,
-                args=args,
-                sources=payload.get('sources')
-            )
+        with timer.phase('action'):
+            try:
+                # Do not modify the dataset while a background task writes
+                # to the metadata store.
+                with engine.metadata_lock:
+                    changed = apply_action(
+                        action=action,
+                        dataset=dataset,
+                        engine=engine,
+                        name=name,
+                        progress=commit_progress(send=send, dataset=request['dataset'])
+                    )
+            finally:
+                # Remove all cached snapshots for the (potentially) modified
+                # dataset, even if the action failed.
+                engine.invalidate(name)
+                if snapshots is not None:
+                    for key in [key for key in snapshots if key[0] == name]:
+                        del snapshots[key]
     # Return data from the (modified) dataset. Note that by default metadata is
     # included in the response if the request contained an action element that
     # modified the underlying dataset (and therefore the dataset metadata may
     # have changed as well).
-    fetch = request['fetch']
-    limit = fetch.get('limit', DEFAULT_LIMIT)
-    offset = fetch.get('offset', 0)
-    version = fetch.get('version')
     include_metadata = fetch.get('includeMetadata', action is not None)
     include_library = fetch.get('includeLibrary', False)
+    include_timings = fetch.get('includeTimings', fetch.get('prefetch', 0) > 0)
+    find = request.get('find')
     # Load the requested snapshot of the referenced dataset. If a version number
     # was included in the request we load the data for that version. Otherwise,
-    # the data for the latest snapshot is loaded.
-    df = dataset.checkout(version=version)
-    # Create basic response document.
-    row_count = df.shape[0]
+    # the data for the latest snapshot is loaded. Snapshots are served from the
+    # snapshot cache of the engine if possible. Requests in a batch share the
+    # checked out snapshots.
+    # The snapshot version is resolved before the checkout since background
+    # tasks for this request (e.g., pushing the metadata) have to refer to the
+    # snapshot explicitly.
+    snapshot = version if version is not None else dataset.version()
+    with timer.phase('checkout'):
+        df = get_snapshot(engine=engine, name=name, version=version, snapshots=snapshots)
+    # Get the positions of the rows in filtered or sorted views. The view
+    # contains all rows in their original order if no filter or sort order is
+    # given.
+    view = None
+    if filters or sort_by is not None or find is not None:
+        with timer.phase('view'):
+            view = query.select_rows(
+                engine=engine,
+                name=name,
+                version=snapshot,
+                filters=filters,
+                sort_by=sort_by
+            )
+    # Create basic response document. The row count is the number of rows in
+    # the view.
+    row_count = df.shape[0] if view is None else len(view)
     doc = {
         'dataset': request['dataset'],
         'columns': list(df.columns),
-        'rows': ds.fetch_rows(
-            df=df,
-            offset=offset,
-            end=min(offset + limit, row_count)
-        ),
         'offset': offset,
         'rowCount': row_count,
-        'version': version
+        'version': version,
+        'snapshot': snapshot,
+        'filter': filters,
+        'sortBy': sort_by
     }
-    # Add metadata to response if the include_metadata flag is True.
+    # In delta mode, only the cells in the visible window that differ from
+    # the known snapshot are returned (if the window can be patched by the
+    # client). Otherwise, the rows for the requested page are serialized.
+    rows = prefetch.page_rows(df=df, view=view, offset=offset, limit=limit)
+    cells = None
+    if known is not None:
+        with timer.phase('delta'):
+            cells = delta.diff_cells(known=known, rows=rows)
+    # Keep the visible window as the known view for the next delta request
+    # of the client.
+    delta.remember_window(
+        engine=engine,
+        name=name,
+        version=snapshot,
+        offset=offset,
+        limit=limit,
+        rows=rows,
+        filters=filters,
+        sort_by=sort_by
+    )
+    buffers = None
+    if cells is not None:
+        del doc['columns']
+        doc['delta'] = {'knownVersion': known.version, 'cells': cells}
+    else:
+        with timer.phase('page'):
+            buffers = add_page(
+                doc=doc,
+                engine=engine,
+                name=name,
+                version=snapshot,
+                df=df,
+                view=view,
+                fetch=fetch
+            )
+        if buffers is not None:
+            timer.add_bytes('buffers', sum(b.nbytes for b in buffers))
+    # Add cells that match the predicate of a find request.
+    if find is not None:
+        with timer.phase('find'):
+            doc['find'] = query.find_cells(
+                engine=engine,
+                name=name,
+                version=snapshot,
+                df=df,
+                find=find,
+                view=view
+            )
+    # Add metadata to response if the include_metadata flag is True. The list
+    # of columns that were modified by the action only applies to the latest
+    # snapshot.
     if include_metadata:
-        doc['metadata'] = ds.fetch_metadata(df=df, dataset=dataset, version=version)
+        with timer.phase('metadata'):
+            add_metadata(
+                doc=doc,
+                request=request,
+                send=send,
+                engine=engine,
+                dataset=dataset,
+                df=df,
+                snapshot=snapshot,
+                changed=changed if version is None else None,
+                known=known
+            )
     # Add serialization of registered evaluation functions if requested.
     if include_library:
-        doc['library'] = engine.library_dict()
-    return doc
+        with timer.phase('library'):
+            doc['library'] = engine.library_dict()
+    # Add the request timer to the metrics registry for the engine and to the
+    # response if requested.
+    registry.record(engine.identifier, timer)
+    if include_timings:
+        doc['timings'] = dict(doc.get('timings', dict()), **timer.to_dict())
+    return doc if buffers is None else BinaryResponse(doc, buffers)
+
+
+def add_metadata(
+    doc: Dict, request: Dict, send: Optional[Callable], engine: OpencleanAPI,
+    dataset: DatasetHandle, df: pd.DataFrame, snapshot: int,
+    changed: Optional[List[Union[int, str]]] = None,
+    known: Optional[delta.KnownView] = None
+):
+    """Add the metadata for a dataset snapshot to a response document. If the
+    client can receive pushed messages and the profiling results for the
+    snapshot do not exist yet, the profiler is run in the background (see
+    :func:`push_metadata`). In delta mode, the metadata is replaced by the
+    delta with respect to the known snapshot if the schema did not change.
+
+    Parameters
+    ----------
+    doc: dict
+        Response document.
+    request: dict
+        Request body.
+    send: callable
+        Function for pushing additional messages to the client.
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    dataset: openclean.engine.dataset.DatasetHandle
+        Handle for the dataset.
+    df: pd.DataFrame
+        Data frame for the dataset snapshot.
+    snapshot: int
+        Identifier of the dataset snapshot.
+    changed: list of int or string, default=None
+        Index positions or names of the columns that were modified by the
+        operation that created the dataset snapshot.
+    known: openclean_notebook.controller.spreadsheet.delta.KnownView, default=None
+        Visible window of the snapshot that is displayed by the client.
+    """
+    args = {
+        'df': df,
+        'dataset': dataset,
+        'version': snapshot,
+        'changed': changed,
+        'profiler': engine.profiler,
+        'cache': engine.profile_cache,
+        'lock': engine.metadata_lock
+    }
+    if send is not None and not ds.has_metadata(dataset, version=snapshot):
+        # Run the profiler in the background if the client can receive
+        # the results in a separate message. The response only contains
+        # the operation log for now.
+        doc['metadata'] = {
+            'log': ds.fetch_log(dataset),
+            'pending': True,
+            'snapshot': snapshot
+        }
+        engine.submit(
+            push_metadata,
+            send=send,
+            dataset=request['dataset'],
+            snapshot=snapshot,
+            args=args
+        )
+    else:
+        doc['metadata'] = ds.fetch_metadata(**args)
+    # In delta mode, the metadata only contains the changed column profiles
+    # and the new log entries if the schema did not change.
+    if known is not None and list(known.rows.columns) == list(df.columns):
+        metadata = delta.diff_metadata(known=known, metadata=doc['metadata'], dataset=dataset, version=snapshot)
+        if metadata is not None:
+            del doc['metadata']
+            doc.setdefault('delta', {'knownVersion': known.version})
+            doc['delta']['metadata'] = metadata
+
+
+def add_page(
+    doc: Dict, engine: OpencleanAPI, name: str, version: int, df: pd.DataFrame,
+    view: Optional[np.ndarray], fetch: Dict
+) -> Optional[List[memoryview]]:
+    """Add the serialized rows for the requested page to a response document.
+    If the client requested read-ahead, the page is served from the page cache
+    of the engine if it was prefetched for a previous request and the
+    adjacent pages are prefetched in the background (see :func:`fetch_page`).
+
+    Returns the list of binary buffers for the response or None if the
+    response does not contain binary data.
+
+    Parameters
+    ----------
+    doc: dict
+        Response document.
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    name: string
+        Unique dataset name.
+    version: int
+        Identifier of the dataset snapshot.
+    df: pd.DataFrame
+        Data frame for the dataset snapshot.
+    view: np.ndarray
+        Positions of the rows in the view. The view contains all rows of the
+        dataset (in their original order) if None.
+    fetch: dict
+        Fetch element from a spreadsheet API request.
+
+    Returns
+    -------
+    list of memoryview
+    """
+    limit = fetch.get('limit', DEFAULT_LIMIT)
+    offset = fetch.get('offset', 0)
+    data_format = fetch.get('format', FORMAT_ROWS)
+    depth = fetch.get('prefetch', 0)
+    if depth > 0:
+        page, prefetched, stats = fetch_page(
+            engine=engine,
+            name=name,
+            version=version,
+            df=df,
+            view=view,
+            offset=offset,
+            limit=limit,
+            data_format=data_format,
+            filters=fetch.get('filter'),
+            sort_by=fetch.get('sortBy'),
+            depth=depth
+        )
+        if fetch.get('includeTimings', True):
+            doc['timings'] = {'prefetch': stats}
+    else:
+        page = prefetch.serialize_page(df=df, view=view, offset=offset, limit=limit, data_format=data_format)
+        prefetched = list()
+    doc.update(page.doc)
+    buffers = list(page.buffers) if page.buffers is not None else None
+    # Piggy-back prefetched adjacent pages on the response if requested.
+    if fetch.get('includePrefetched', False):
+        doc['prefetched'] = list()
+        for p in prefetched:
+            if p.buffers is not None:
+                doc['prefetched'].append({'offset': p.offset, 'data': ds.shift_buffers(p.doc['data'], len(buffers))})
+                buffers.extend(p.buffers)
+            else:
+                doc['prefetched'].append(dict(p.doc, offset=p.offset))
+    return buffers
+
+
+def batch_response(responses: List[Dict]) -> Dict:
+    """Combine the responses for the requests in a batch into a single
+    response. Binary buffers of all responses are concatenated into a single
+    buffer list. The buffer references in the response documents are
+    adjusted accordingly.
+
+    Parameters
+    ----------
+    responses: list of dict or openclean_notebook.controller.comm.BinaryResponse
+        Responses in request order.
+
+    Returns
+    -------
+    dict or openclean_notebook.controller.comm.BinaryResponse
+    """
+    docs, buffers = list(), list()
+    for resp in responses:
+        doc = dict(resp)
+        if isinstance(resp, BinaryResponse):
+            doc['data'] = ds.shift_buffers(doc['data'], offset=len(buffers))
+            if 'prefetched' in doc:
+                doc['prefetched'] = [
+                    dict(p, data=ds.shift_buffers(p['data'], offset=len(buffers))) for p in doc['prefetched']
+                ]
+            buffers.extend(resp.buffers)
+        docs.append(doc)
+    doc = {'type': 'batch', 'batch': docs}
+    return BinaryResponse(doc, buffers) if buffers else doc
+
+
+def apply_action(
+    action: Dict, dataset: DatasetHandle, engine: OpencleanAPI,
+    name: Optional[str] = None, progress: Optional[Callable] = None
+) -> Optional[List[Union[int, str]]]:
+    """Apply the operation that is specified in the action element of a
+    spreadsheet API request on the given dataset.
+
+    Returns the index positions or names of the columns that were modified by
+    the operation. The result is None if the operation may have modified any
+    of the columns (i.e., for commit and rollback).
+
+    Parameters
+    ----------
+    action: dict
+        Action element from a spreadsheet API request.
+    dataset: openclean.engine.dataset.DatasetHandle
+        Handle for the dataset that is being modified.
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that contains the library of registered functions.
+    name: string, default=None
+        Unique dataset name. Required for commit actions.
+    progress: callable, default=None
+        Function that receives progress reports for commit actions.
+
+    Returns
+    -------
+    list of int or string
+    """
+    action_type = action['type']
+    payload = action.get('payload')
+    if action_type == 'commit':
+        # Commit operations on the sample to the full dataset in chunks.
+        engine.commit_sample(name=name, progress=progress)
+        return None
+    elif action_type == 'inscol':
+        values, args = get_eval(
+            engine=engine,
+            func=payload.get('values'),
+            args=payload.get('args')
+        )
+        insert_column(
+            dataset=dataset,
+            names=payload.get('names'),
+            pos=payload.get('pos'),
+            values=values,
+            args=args,
+            sources=payload.get('sources')
+        )
+        names = payload.get('names')
+        return [names] if isinstance(names, str) else names
+    elif action_type == 'rollback':
+        dataset.rollback(payload)
+        return None
+    else:  # action_type == 'update'
+        func, args = get_eval(
+            engine=engine,
+            func=payload.get('func'),
+            args=payload.get('args')
+        )
+        update_columns(
+            dataset=dataset,
+            columns=payload.get('columns'),
+            func=func,
+            args=args,
+            sources=payload.get('sources'),
+            memo_size=engine.memo_size
+        )
+        return payload.get('columns')
+
+
+def commit_progress(send: Optional[Callable], dataset: Dict) -> Optional[Callable]:
+    """Get a callback that pushes progress reports for a commit action to the
+    client. Returns None if the client cannot receive pushed messages.
+
+    Parameters
+    ----------
+    send: callable
+        Function for pushing messages to the client.
+    dataset: dict
+        Serialization of the dataset locator.
+
+    Returns
+    -------
+    callable
+    """
+    if send is None:
+        return None
+
+    def push_progress(report: Dict):
+        send(dict({'type': 'progress', 'dataset': dataset, 'action': 'commit'}, **report))
+
+    return push_progress
+
+
+def fetch_page(
+    engine: OpencleanAPI, name: str, version: int, df: pd.DataFrame,
+    view: Optional[np.ndarray], offset: int, limit: int, data_format: str,
+    filters: Optional[List[Dict]], sort_by: Optional[Dict], depth: int
+) -> Tuple[prefetch.Page, List[prefetch.Page], Dict]:
+    """Get the serialized rows for a page in a dataset view with read-ahead.
+    The page is served from the page cache of the engine if it was served or
+    prefetched for a previous request. Adjacent pages (up to the given depth in each
+    direction) that are not in the cache yet are serialized in a background
+    task of the engine.
+
+    Returns the requested page, the adjacent pages that are in the page cache
+    already, and the page cache statistics for the request. The statistics
+    contain the prefetch depth, a flag indicating whether the requested page
+    was served from the cache, and the hit and miss counts for the page
+    cache.
+
+    Parameters
+    ----------
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    name: string
+        Unique dataset name.
+    version: int
+        Identifier of the dataset snapshot.
+    df: pd.DataFrame
+        Data frame for the dataset snapshot.
+    view: np.ndarray
+        Positions of the rows in the view. The view contains all rows of the
+        dataset (in their original order) if None.
+    offset: int
+        Offset of the first row of the page in the view.
+    limit: int
+        Number of rows per page.
+    data_format: string
+        Serialization format for the rows.
+    filters: list of dict
+        Predicates for the rows in the view.
+    sort_by: dict
+        Sort order for the rows in the view.
+    depth: int
+        Number of prefetched pages in each direction.
+
+    Returns
+    -------
+    tuple of openclean_notebook.controller.spreadsheet.prefetch.Page, list, and dict
+    """
+    def key(pos: int) -> Tuple:
+        return prefetch.page_key(
+            engine=engine,
+            name=name,
+            version=version,
+            filters=filters,
+            sort_by=sort_by,
+            data_format=data_format,
+            offset=pos,
+            limit=limit
+        )
+
+    page = engine.pages.get(key(offset))
+    hit = page is not None
+    if page is None:
+        page = prefetch.serialize_page(df=df, view=view, offset=offset, limit=limit, data_format=data_format)
+        engine.pages.put(key(offset), page)
+    row_count = df.shape[0] if view is None else len(view)
+    offsets = prefetch.adjacent_offsets(offset=offset, limit=limit, row_count=row_count, depth=depth)
+    prefetched = [p for p in [engine.pages.peek(key(pos)) for pos in offsets] if p is not None]
+    # Serialize the adjacent pages that are not in the cache in the background.
+    # Prefetching is disabled if the page cache has no capacity (the pages
+    # would not be kept).
+    pages = list()
+    if engine.pages.capacity > 0:
+        pages = [(key(pos), pos) for pos in offsets if key(pos) not in engine.pages]
+    if pages:
+        engine.submit_prefetch(
+            prefetch.prefetch_pages,
+            cache=engine.pages,
+            df=df,
+            view=view,
+            pages=pages,
+            limit=limit,
+            data_format=data_format
+        )
+    stats = engine.pages.stats
+    lookups = stats.hits + stats.misses
+    cache_stats = {
+        'depth': depth,
+        'hit': hit,
+        'hits': stats.hits,
+        'misses': stats.misses,
+        'hitRate': stats.hits / lookups if lookups else 0.0
+    }
+    return page, prefetched, cache_stats
+
+
+def get_snapshot(
+    engine: OpencleanAPI, name: str, version: Optional[int] = None,
+    snapshots: Optional[Dict] = None
+) -> pd.DataFrame:
+    """Get the data frame for a dataset snapshot. Snapshots that were checked
+    out for previous requests in the same batch are reused.
+
+    Parameters
+    ----------
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    name: string
+        Unique dataset name.
+    version: int, default=None
+        Snapshot version. The latest snapshot is returned if None.
+    snapshots: dict, default=None
+        Snapshots that were checked out for the current batch.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if snapshots is None:
+        return engine.snapshot(name=name, version=version)
+    df = snapshots.get((name, version))
+    if df is None:
+        df = engine.snapshot(name=name, version=version)
+        snapshots[(name, version)] = df
+    return df
+
+
+def push_metadata(send: Callable, dataset: Dict, snapshot: int, args: Dict):
+    """Compute the metadata for a dataset snapshot and send the result to the
+    client. The message contains the dataset locator, the snapshot version,
+    and either the metadata object or an error message if profiling failed.
+
+    Parameters
+    ----------
+    send: callable
+        Function for pushing messages to the client.
+    dataset: dict
+        Serialization of the dataset locator.
+    snapshot: int
+        Identifier of the profiled dataset snapshot.
+    args: dict
+        Arguments for :func:`openclean_notebook.controller.spreadsheet.data.fetch_metadata`.
+    """
+    msg = {'type': 'metadata', 'dataset': dataset, 'snapshot': snapshot}
+    try:
+        msg['metadata'] = ds.fetch_metadata(**args)
+    except Exception as ex:
+        msg['error'] = str(ex)
+    send(msg)
 
 
 def get_eval(engine: OpencleanAPI, func: Any, args: List[Dict]) -> Tuple[Any, Dict]:
@@ -223,7 +995,9 @@ def get_eval(engine: OpencleanAPI, func: Any, args: List[Dict]) -> Tuple[Any, Di
     """
     if isinstance(func, dict):
         # If the specification is a dictionary we assume that it is the
-        # serialization of a functin handle identifier.
+        # serialization of a functin handle identifier. Arguments are
+        # deserialized using flowserv, which is imported on first use.
+        from flowserv.service.run.argument import deserialize_arg
         namespace = func.get('namespace') if func.get('namespace') else None
         f = engine.library.functions().get(name=func['name'], namespace=namespace)
         # Convert arguments into a dictionary.
@@ -246,7 +1020,7 @@ def get_eval(engine: OpencleanAPI, func: Any, args: List[Dict]) -> Tuple[Any, Di
 
 # -- Spreadsheet controller ---------------------------------------------------
 
-def spreadsheet(name: str, engine: str):  # pragma: no cover
+def spreadsheet(name: str, engine: str, load_once: Optional[bool] = False):  # pragma: no cover
     """Embed the spreadsheet view for a given dataset into the notebook
     environment.
 
@@ -256,14 +1030,21 @@ def spreadsheet(name: str, engine: str):  # pragma: no cover
         Unique dataset name.
     engine: string
         Unique engine identifier.
+    load_once: bool, default=False
+        Only include the Javascript bundle if it has not been included in the
+        output for a previous spreadsheet view.
     """
     # Register callback handlers. This will raise a RuntimeError if called
     # outside a Jupyter or Colab notebook environment.
     register_handler('spreadsheet', spreadsheet_api)
+    if load_once:
+        # Bootstrap scripts request the bundle if it is not loaded.
+        register_handler(BUNDLE_CHANNEL, bundle_api)
     view = make_html(
         template='spreadsheet.html',
         library='build/opencleanVis.js',
-        data=ds.serialize(name=name, engine=engine)
+        data=ds.serialize(name=name, engine=engine),
+        bootstrap='spreadsheet_bootstrap.html' if load_once else None
     )
     # Embed the spreadsheet HTML into the notebook.
     try:
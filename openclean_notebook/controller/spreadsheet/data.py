@@ -10,14 +10,24 @@ that are rendered in a notebook environment.
 """
 
 from __future__ import annotations
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
+import contextlib
+import numpy as np
 import pandas as pd
+import threading
 
 from openclean.engine.dataset import DatasetHandle
 from openclean.engine.registry import registry
+from openclean.profiling.dataset import Profiler
+from openclean_notebook.compact import expand_frame
 from openclean_notebook.engine import OpencleanAPI
-from openclean_notebook.metadata.datamart import DatamartProfiler
+from openclean_notebook.metadata.cache import ProfileCache, profiler_key
+from openclean_notebook.metadata.datamart import DatamartProfiler, column_key, dataset_types
+
+
+"""Annotation key for the profiling results of individual snapshot columns."""
+COLUMN_PROFILES = 'columnProfiles'
 
 
 # -- Dataset locator (de)serialization ----------------------------------------
@@ -72,10 +82,19 @@ def serialize(name: str, engine: str) -> Dict:
 
 # -- Fetch serialized dataset objects -----------------------------------------
 
-def fetch_metadata(df: pd.DataFrame, dataset: DatasetHandle, version: Optional[int] = None) -> Dict:
+def fetch_metadata(
+    df: pd.DataFrame, dataset: DatasetHandle, version: Optional[int] = None,
+    changed: Optional[List[Union[int, str]]] = None,
+    profiler: Optional[Profiler] = None, cache: Optional[ProfileCache] = None,
+    lock: Optional[threading.RLock] = None
+) -> Dict:
     """Get metadata for the given dataset. Returns an object that contains
     profiling results and a serialization of the operation log.
 
+    Profiling results are maintained for each column of a dataset snapshot
+    (see :func:`profile_columns`). Only those columns whose content differs
+    from the columns in the previous snapshot are profiled.
+
     Parameters
     ----------
     df: pd.DataFrame
@@ -85,43 +104,309 @@ def fetch_metadata(df: pd.DataFrame, dataset: DatasetHandle, version: Optional[i
         the operation log.
     version: int, default=None
         Identifier of the dataset version for which the metadata is fetched.
+    changed: list of int or string, default=None
+        Index positions or names of the columns that were modified by the
+        operation that created the dataset snapshot. If given, the remaining
+        columns are considered unchanged with respect to the previous snapshot.
+    profiler: openclean.profiling.dataset.Profiler, default=None
+        Profiler for columns that have not been profiled before. Uses the
+        default datamart profiler if None.
+    cache: openclean_notebook.metadata.cache.ProfileCache, default=None
+        Persistent cache for column profiles.
+    lock: threading.RLock, default=None
+        Lock that is held while the profiling results are written to the
+        metadata store (e.g., if the metadata is computed by a background
+        task while actions modify the dataset).
     """
+    # Resolve the version before profiling since the dataset may be modified
+    # while the profiler is running in a background task.
+    version = version if version is not None else dataset.version()
     metadata = dataset.metadata(version=version)
     if not metadata.has_annotation(key='profiling'):
         # We only need to invoke the profiler if the profiling metadata
         # does not already exists for the dataset snapshot.
-        profiles = DatamartProfiler().profile(df)
+        columns = profile_columns(
+            df=df,
+            dataset=dataset,
+            version=version,
+            changed=changed,
+            profiler=profiler,
+            cache=cache
+        )
+        profiles = [col['profile'] for col in columns]
+        nb_profiled_rows = min(
+            [col['nbProfiledRows'] for col in columns],
+            default=df.shape[0]
+        )
         metadataJSON = {
-            'id': dataset.version(),
+            'id': version,
             'name': '',
             'description': '',
-            'size': profiles['size'] if 'size' in profiles else 0,
-            'nb_rows': profiles['nb_rows'],
-            'nb_profiled_rows': profiles['nb_profiled_rows'],
+            'size': 0,
+            'nb_rows': df.shape[0],
+            'nb_profiled_rows': nb_profiled_rows,
+            'approximate': nb_profiled_rows < df.shape[0],
+            'nb_columns': len(columns),
             'materialize': {},
             'date': '',
-            'sample': profiles['sample'] if 'sample' in profiles else '',
+            'sample': '',
             'source': 'openclean-notebook',
             'version': '0.1',
-            'columns': profiles['columns'],
-            'types': profiles['types']
+            'columns': profiles
         }
-        metadata.set_annotation(
-            key='profiling',
-            value=metadataJSON
-        )
+        metadataJSON.update(dataset_types(profiles))
+        with lock if lock is not None else contextlib.nullcontext():
+            metadata.set_annotation(key=COLUMN_PROFILES, value=columns)
+            metadata.set_annotation(
+                key='profiling',
+                value=metadataJSON
+            )
     else:
         # Use metadata from previous profiler run.
         metadataJSON = metadata.get_annotation(key='profiling')
     # Add profiler results and serialization of the operation log to the
     # returned metadata object.
+    return {'profiling': metadataJSON, 'log': fetch_log(dataset)}
+
+
+def fetch_log(dataset: DatasetHandle) -> List[Dict]:
+    """Get serialization of the operation log for the given dataset.
+
+    Parameters
+    ----------
+    dataset: openclean.engine.data.DatasetHandle
+        Handle for the dataset that provides access to the operation log.
+
+    Returns
+    -------
+    list of dict
+    """
+    return [{
+        'id': e.version,
+        'op': e.descriptor,
+        'isCommitted': False
+    } for e in dataset.log()]
+
+
+def has_metadata(dataset: DatasetHandle, version: Optional[int] = None) -> bool:
+    """Test if the profiling results for the given dataset snapshot exist,
+    i.e., if :func:`fetch_metadata` can return the metadata without running
+    the profiler.
+
+    Parameters
+    ----------
+    dataset: openclean.engine.data.DatasetHandle
+        Handle for the dataset that provides access to the metadata store.
+    version: int, default=None
+        Identifier of the dataset version.
+
+    Returns
+    -------
+    bool
+    """
+    return dataset.metadata(version=version).has_annotation(key='profiling')
+
+
+def profile_columns(
+    df: pd.DataFrame, dataset: DatasetHandle, version: Optional[int] = None,
+    changed: Optional[List[Union[int, str]]] = None,
+    profiler: Optional[Profiler] = None, cache: Optional[ProfileCache] = None
+) -> List[Dict]:
+    """Get profiling results for each column in a dataset snapshot. Profiling
+    results are maintained as a list of objects in the COLUMN_PROFILES
+    annotation of each snapshot. Each object contains the column name, a
+    fingerprint of the column content ('key'), the number of rows that were
+    profiled, and the profiler result for the column ('profile').
+
+    Results are carried forward from the latest previous snapshot that has
+    column profiles. If the list of changed columns is given and the profiled
+    snapshot is the immediate predecessor of the dataset version, all other
+    columns reuse the profile for the column with the same name in the
+    previous snapshot. The list of changed columns is ignored if there are
+    snapshots without profiles in between, since these snapshots may have
+    modified other columns as well. Otherwise (and for the changed columns) the profile is reused if
+    the previous snapshot contains a column with the same content key. If a
+    persistent profile cache is given, profiles for the remaining columns are
+    looked up by their content key and the profiler fingerprint. The profiler
+    is only run on the columns that are not in the cache. Their profiles are
+    added to the cache.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data frame for the dataset snapshot.
+    dataset: openclean.engine.data.DatasetHandle
+        Handle for the dataset that provides access to the metadata store and
+        the operation log.
+    version: int, default=None
+        Identifier of the dataset version for the data frame.
+    changed: list of int or string, default=None
+        Index positions or names of the columns that were modified by the
+        operation that created the dataset snapshot.
+    profiler: openclean.profiling.dataset.Profiler, default=None
+        Profiler for columns that have not been profiled before. Uses the
+        default datamart profiler if None.
+    cache: openclean_notebook.metadata.cache.ProfileCache, default=None
+        Persistent cache for column profiles.
+
+    Returns
+    -------
+    list of dict
+    """
+    # Profile the original values for compact snapshots. This keeps the
+    # content keys independent of the snapshot representation.
+    df = expand_frame(df)
+    profiler = profiler if profiler is not None else DatamartProfiler()
+    fingerprint = profiler_key(profiler) if cache is not None else None
+    profiled, previous = previous_profiles(dataset=dataset, version=version)
+    # The changed columns are only known with respect to the immediate
+    # predecessor of the dataset version.
+    if profiled is None or profiled != predecessor(dataset=dataset, version=version):
+        changed = None
+    by_name = {col['name']: col for col in previous}
+    by_key = {col['key']: col for col in previous}
+    if changed is not None:
+        changed = set(
+            df.columns[c] if isinstance(c, int) else c for c in changed
+        )
+    columns, missing = list(), list()
+    for pos, name in enumerate(df.columns):
+        name = str(name)
+        # Reuse the profile of a column with the same name in the previous
+        # snapshot if the column was not modified.
+        prev = by_name.get(name) if changed is not None and name not in changed else None
+        if prev is not None:
+            key = prev['key']
+        else:
+            key = column_key(df.iloc[:, pos])
+            prev = by_key.get(key)
+            if prev is None and cache is not None:
+                prev = cache.get(key, fingerprint)
+        col = {'name': name, 'key': key}
+        if prev is not None:
+            col['nbProfiledRows'] = prev['nbProfiledRows']
+            col['profile'] = dict(prev['profile'], name=name)
+        else:
+            missing.append(pos)
+        columns.append(col)
+    # Run the profiler only on those columns for which no previous profiling
+    # results exist.
+    if missing:
+        profiles = profiler.profile(df, columns=missing)
+        for pos, profile in zip(missing, profiles['columns']):
+            columns[pos]['nbProfiledRows'] = profiles['nb_profiled_rows']
+            columns[pos]['profile'] = dict(profile, name=columns[pos]['name'])
+            if cache is not None:
+                entry = {'nbProfiledRows': profiles['nb_profiled_rows'], 'profile': profile}
+                cache.put(columns[pos]['key'], fingerprint, entry)
+    return columns
+
+
+def predecessor(dataset: DatasetHandle, version: Optional[int] = None) -> Optional[int]:
+    """Get the identifier of the snapshot that immediately precedes the
+    given dataset version in the operation log. Returns None if the version
+    is the first snapshot of the dataset.
+
+    Parameters
+    ----------
+    dataset: openclean.engine.data.DatasetHandle
+        Handle for the dataset that provides access to the operation log.
+    version: int, default=None
+        Identifier of the dataset version. Uses the latest version if None.
+
+    Returns
+    -------
+    int
+    """
+    version = version if version is not None else dataset.version()
+    versions = [e.version for e in dataset.log() if e.version is not None and e.version < version]
+    return max(versions, default=None)
+
+
+def previous_profiles(
+    dataset: DatasetHandle, version: Optional[int] = None
+) -> Tuple[Optional[int], List[Dict]]:
+    """Get the column profiles for the latest snapshot before the given
+    dataset version that has column profiles. Returns the identifier of the
+    profiled snapshot and the list of column profiles. Returns None and an
+    empty list if no such snapshot exists.
+
+    Parameters
+    ----------
+    dataset: openclean.engine.data.DatasetHandle
+        Handle for the dataset that provides access to the metadata store and
+        the operation log.
+    version: int, default=None
+        Identifier of the dataset version. Uses the latest version if None.
+
+    Returns
+    -------
+    tuple of int and list of dict
+    """
+    version = version if version is not None else dataset.version()
+    versions = [e.version for e in dataset.log() if e.version is not None]
+    for v in reversed([v for v in versions if v < version]):
+        metadata = dataset.metadata(version=v)
+        if metadata.has_annotation(key=COLUMN_PROFILES):
+            return v, metadata.get_annotation(key=COLUMN_PROFILES)
+    return None, list()
+
+
+def fetch_buffers(df: pd.DataFrame, offset: int, end: int) -> Tuple[Dict, List[memoryview]]:
+    """Get binary column-major serialization for a range of data frame rows.
+    Returns a dictionary with descriptors for the row index ('index') and the
+    column values ('values'), and the list of binary buffers that are
+    referenced by the descriptors (see :func:`encode_column` for details).
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data frame for dataset snapshot.
+    offset: int
+        Offset for first row in the returned result.
+    end: int
+        Index for first row that is not in the returned result.
+
+    Returns
+    -------
+    tuple of dict and list of memoryview
+    """
+    # Pages of compact snapshots are encoded with the original column types.
+    rows = expand_frame(df.iloc[offset:end])
+    buffers = list()
+    doc = {
+        'encoding': 'binary',
+        'index': encode_column(values=rows.index.to_series(), buffers=buffers),
+        'values': [encode_column(values=rows.iloc[:, i], buffers=buffers) for i in range(rows.shape[1])]
+    }
+    return doc, buffers
+
+
+def fetch_columns(df: pd.DataFrame, offset: int, end: int) -> Dict:
+    """Get column-major serialization for a range of data frame rows. The
+    result is a dictionary with two elements: 'index' contains the list of
+    row identifiers and 'values' contains a list of cell values for each
+    column in the data frame.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data frame for dataset snapshot.
+    offset: int
+        Offset for first row in the returned result.
+    end: int
+        Index for first row that is not in the returned result.
+
+    Returns
+    -------
+    dict
+    """
+    # Pages of compact snapshots are serialized with the original column
+    # types.
+    rows = expand_frame(df.iloc[offset:end])
     return {
-        'profiling': metadataJSON,
-        'log': [{
-            'id': e.version,
-            'op': e.descriptor,
-            'isCommitted': False
-        } for e in dataset.log()]
+        'index': rows.index.tolist(),
+        'values': [column_values(rows.iloc[:, i]) for i in range(rows.shape[1])]
     }
 
 
@@ -141,4 +426,171 @@ def fetch_rows(df: pd.DataFrame, offset: int, end: int) -> List[Dict]:
     -------
     list of dict
     """
-    return [{'id': id, 'values': list(vals)} for id, vals in df[offset:end].iterrows()]
+    # Convert values column by column and transpose the result instead of
+    # iterating over the data frame rows. Compact snapshots are expanded by
+    # fetch_columns.
+    data = fetch_columns(df=df, offset=offset, end=end)
+    index, columns = data['index'], data['values']
+    values = zip(*columns) if columns else [()] * len(index)
+    return [{'id': rowid, 'values': list(vals)} for rowid, vals in zip(index, values)]
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def column_values(values: pd.Series) -> List:
+    """Convert the values in a data frame column into a list of values that
+    can be serialized as Json. Missing values (NaN and NaT) are replaced by
+    None and NumPy scalars are converted into Python scalars. Conversion is
+    done for all values in the column at once based on the column type.
+
+    Parameters
+    ----------
+    values: pd.Series
+        Values in a data frame column.
+
+    Returns
+    -------
+    list
+    """
+    # Use the generic conversion for pandas extension types (e.g., nullable
+    # integers or categories).
+    kind = values.dtype.kind if isinstance(values.dtype, np.dtype) else 'O'
+    if kind in 'iub':
+        # Integer and Boolean columns cannot contain missing values.
+        return values.to_numpy().tolist()
+    elif kind == 'f':
+        data = values.to_numpy().astype(object)
+        data[np.isnan(values.to_numpy())] = None
+        return data.tolist()
+    elif kind in 'mM':
+        # Serialize date and time values as strings.
+        mask = values.isna().to_numpy()
+        data = values.astype(str).to_numpy(dtype=object)
+        data[mask] = None
+        return data.tolist()
+    data = values.to_numpy(dtype=object, copy=True)
+    data[pd.isna(data)] = None
+    return data.tolist()
+
+
+def encode_column(values: pd.Series, buffers: List[memoryview]) -> Dict:
+    """Encode the values in a data frame column as binary buffers. The layout
+    follows the columnar format of Apache Arrow: fixed-width values are stored
+    as contiguous little-endian arrays, strings are stored as a single UTF-8
+    encoded byte array together with an array of int32 offsets, and missing
+    values are marked in an (optional) uint8 validity array (1 = valid).
+
+    Buffers are appended to the given list. Returns a descriptor for the
+    column that contains the value type ('type'), the number of values
+    ('length'), and the index positions of the buffers in the buffer list
+    ('data', 'offsets', 'validity'). Values that cannot be encoded in binary
+    format (e.g., columns with values of mixed types) are included in the
+    descriptor as a list of Json values ('values') using type 'json'.
+
+    Parameters
+    ----------
+    values: pd.Series
+        Values in a data frame column.
+    buffers: list of memoryview
+        List of buffers for the encoded response.
+
+    Returns
+    -------
+    dict
+    """
+    doc = {'length': len(values)}
+    kind = values.dtype.kind if isinstance(values.dtype, np.dtype) else 'O'
+    if kind in 'iuf':
+        doc['type'] = values.dtype.name
+        doc['data'] = add_buffer(values.to_numpy(), buffers)
+        return doc
+    elif kind == 'b':
+        doc['type'] = 'bool'
+        doc['data'] = add_buffer(values.to_numpy().view(np.uint8), buffers)
+        return doc
+    # Columns with Python objects are encoded based on the inferred type of
+    # the non-missing values.
+    mask = values.isna().to_numpy()
+    dtype = pd.api.types.infer_dtype(values, skipna=True) if kind == 'O' else 'string'
+    try:
+        if dtype == 'integer':
+            data = values.where(~mask, 0).to_numpy(dtype=np.int64)
+            doc['type'] = 'int64'
+        elif dtype in ['floating', 'integer-na', 'mixed-integer-float']:
+            data = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            doc['type'] = 'float64'
+        elif dtype == 'boolean':
+            data = values.where(~mask, False).to_numpy(dtype=np.uint8)
+            doc['type'] = 'bool'
+        elif dtype == 'string':
+            encoded = [b'' if v is None else v.encode('utf-8') for v in column_values(values)]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+            np.cumsum([len(v) for v in encoded], out=offsets[1:])
+            doc['type'] = 'utf8'
+            doc['offsets'] = add_buffer(offsets, buffers)
+            data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        elif dtype == 'empty':
+            doc['type'] = 'null'
+            return doc
+        else:
+            data = None
+    except (OverflowError, TypeError, ValueError):
+        data = None
+    if data is None:
+        doc['type'] = 'json'
+        doc['values'] = column_values(values)
+        return doc
+    doc['data'] = add_buffer(data, buffers)
+    if mask.any():
+        doc['validity'] = add_buffer((~mask).view(np.uint8), buffers)
+    return doc
+
+
+def add_buffer(data: np.ndarray, buffers: List[memoryview]) -> int:
+    """Append the byte representation of a NumPy array to the given list of
+    buffers. Returns the index position of the buffer in the list.
+
+    Parameters
+    ----------
+    data: np.ndarray
+        Array of fixed-width values.
+    buffers: list of memoryview
+        List of buffers for the encoded response.
+
+    Returns
+    -------
+    int
+    """
+    data = np.ascontiguousarray(data, dtype=data.dtype.newbyteorder('<'))
+    buffers.append(memoryview(data).cast('B'))
+    return len(buffers) - 1
+
+
+def shift_buffers(doc: Dict, offset: int) -> Dict:
+    """Get a copy of the descriptor for binary encoded rows (see
+    :func:`fetch_buffers`) where all buffer references are shifted by the
+    given offset. Used when the buffers of multiple responses are combined
+    into a single buffer list.
+
+    Parameters
+    ----------
+    doc: dict
+        Descriptor for binary encoded rows.
+    offset: int
+        Number of buffers that precede the buffers of the descriptor.
+
+    Returns
+    -------
+    dict
+    """
+    def shift(column: Dict) -> Dict:
+        column = dict(column)
+        for key in ['data', 'offsets', 'validity']:
+            if key in column:
+                column[key] += offset
+        return column
+
+    doc = dict(doc)
+    doc['index'] = shift(doc['index'])
+    doc['values'] = [shift(c) for c in doc['values']]
+    return doc
@@ -0,0 +1,295 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Delta responses for the spreadsheet API. If a request contains the version
+of the snapshot that is currently displayed by the client ('knownVersion'),
+the response only contains the cells in the visible window whose values
+differ from the cells in the known snapshot, the profiles of columns that
+changed, and the operation log entries that were added after the known
+snapshot. The client patches its state with the delta.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import json
+import pandas as pd
+
+from openclean.engine.dataset import DatasetHandle
+from openclean_notebook.controller.spreadsheet.data import COLUMN_PROFILES, column_values
+from openclean_notebook.controller.spreadsheet.prefetch import page_rows
+from openclean_notebook.engine import OpencleanAPI
+
+import openclean_notebook.controller.spreadsheet.query as query
+
+
+@dataclass
+class KnownView:
+    """Rows in the visible window and column profiles of the dataset snapshot
+    that is displayed by the client.
+    """
+    # Identifier of the known dataset snapshot.
+    version: int
+    # Data frame rows in the visible window of the client.
+    rows: pd.DataFrame
+    # Identifiers of the entries in the operation log of the dataset.
+    log: List[int] = field(default_factory=list)
+    # Column profiles for the snapshot (None if the snapshot was not
+    # profiled).
+    profiles: Optional[List[Dict]] = None
+
+
+def known_view(
+    engine: OpencleanAPI, dataset: DatasetHandle, name: str, version: int,
+    offset: int, limit: int, filters: Optional[List[Dict]] = None,
+    sort_by: Optional[Dict] = None
+) -> Optional[KnownView]:
+    """Get the visible window and the column profiles for the dataset snapshot
+    that is displayed by the client. Returns None if the snapshot does not
+    exist (anymore).
+
+    The window is taken from the window cache of the engine if it was served
+    by a previous request (see :func:`remember_window`). The snapshot is only
+    checked out if the window is not in the cache.
+
+    Parameters
+    ----------
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    dataset: openclean.engine.dataset.DatasetHandle
+        Handle for the dataset.
+    name: string
+        Unique dataset name.
+    version: int
+        Identifier of the known dataset snapshot.
+    offset: int
+        Offset of the first row of the visible window in the view.
+    limit: int
+        Number of rows in the visible window.
+    filters: list of dict, default=None
+        Predicates for the rows in the view.
+    sort_by: dict, default=None
+        Sort order for the rows in the view.
+
+    Returns
+    -------
+    openclean_notebook.controller.spreadsheet.delta.KnownView
+    """
+    key = window_key(
+        engine=engine,
+        name=name,
+        version=version,
+        offset=offset,
+        limit=limit,
+        filters=filters,
+        sort_by=sort_by
+    )
+    rows = engine.windows.get(key)
+    if rows is None:
+        try:
+            df = engine.snapshot(name=name, version=version)
+        except KeyError:
+            return None
+        view = None
+        if filters or sort_by is not None:
+            view = query.select_rows(engine=engine, name=name, version=version, filters=filters, sort_by=sort_by)
+        rows = page_rows(df=df, view=view, offset=offset, limit=limit)
+    metadata = dataset.metadata(version=version)
+    profiles = None
+    if metadata.has_annotation(key=COLUMN_PROFILES):
+        profiles = metadata.get_annotation(key=COLUMN_PROFILES)
+    return KnownView(
+        version=version,
+        rows=rows,
+        log=[e.version for e in dataset.log()],
+        profiles=profiles
+    )
+
+
+def diff_cells(known: KnownView, rows: pd.DataFrame) -> Optional[List[Dict]]:
+    """Get the cells in the visible window whose values differ from the cells
+    in the known snapshot. Cells are identified by their row position in the
+    window, the row identifier, and the column index position.
+
+    Returns None if the window cannot be patched, i.e., if the schema or the
+    rows in the window differ from the known snapshot.
+
+    Parameters
+    ----------
+    known: openclean_notebook.controller.spreadsheet.delta.KnownView
+        Visible window of the known snapshot.
+    rows: pd.DataFrame
+        Data frame rows in the visible window of the requested snapshot.
+
+    Returns
+    -------
+    list of dict
+    """
+    if list(known.rows.columns) != list(rows.columns) or not known.rows.index.equals(rows.index):
+        return None
+    cells = list()
+    for col in range(rows.shape[1]):
+        # Compare the serialized values to treat all missing values as equal.
+        prev = column_values(known.rows.iloc[:, col])
+        values = column_values(rows.iloc[:, col])
+        for row, (a, b) in enumerate(zip(prev, values)):
+            if a != b:
+                cells.append({'row': row, 'id': int(rows.index[row]), 'column': col, 'value': b})
+    cells.sort(key=lambda c: (c['row'], c['column']))
+    return cells
+
+
+def diff_metadata(
+    known: KnownView, metadata: Dict, dataset: DatasetHandle, version: int
+) -> Optional[Dict]:
+    """Get the delta for a metadata object (see
+    :func:`openclean_notebook.controller.spreadsheet.data.fetch_metadata`)
+    with respect to the known snapshot. The result contains the operation log
+    entries that were added after the known snapshot ('log'). If profiling
+    results are included in the metadata object, the result contains the
+    dataset profile without the column profiles ('profiling') and the list of
+    profiles for columns whose content differs from the known snapshot
+    ('columns'). All other elements of the metadata object are copied.
+
+    Returns None if the operation log does not extend the log of the known
+    snapshot (e.g., after a rollback or a commit).
+
+    Parameters
+    ----------
+    known: openclean_notebook.controller.spreadsheet.delta.KnownView
+        Visible window and column profiles of the known snapshot.
+    metadata: dict
+        Metadata for the requested snapshot.
+    dataset: openclean.engine.dataset.DatasetHandle
+        Handle for the dataset.
+    version: int
+        Identifier of the requested snapshot.
+
+    Returns
+    -------
+    dict
+    """
+    # The log entries up to the known snapshot have to be the same as in the
+    # log that is displayed by the client.
+    prefix = [e['id'] for e in metadata['log'] if e['id'] is not None and e['id'] <= known.version]
+    if prefix != [v for v in known.log if v is not None and v <= known.version]:
+        return None
+    doc = dict(metadata)
+    doc['log'] = [e for e in metadata['log'] if e['id'] is None or e['id'] > known.version]
+    if 'profiling' in metadata:
+        profiling = dict(metadata['profiling'])
+        columns = profiling.pop('columns')
+        doc['profiling'] = profiling
+        prev = known.profiles if known.profiles is not None else list()
+        # All columns are included if the column profiles for the requested
+        # snapshot are not available.
+        profiles = list()
+        snapshot = dataset.metadata(version=version)
+        if snapshot.has_annotation(key=COLUMN_PROFILES):
+            profiles = snapshot.get_annotation(key=COLUMN_PROFILES)
+        doc['columns'] = list()
+        for pos, profile in enumerate(columns):
+            if pos < min(len(prev), len(profiles)) and unchanged(prev[pos], profiles[pos]):
+                continue
+            doc['columns'].append({'column': pos, 'profile': profile})
+    return doc
+
+
+def remember_window(
+    engine: OpencleanAPI, name: str, version: int, offset: int, limit: int,
+    rows: pd.DataFrame, filters: Optional[List[Dict]] = None,
+    sort_by: Optional[Dict] = None
+):
+    """Add the rows in the visible window of a response to the window cache
+    of the engine. The window is used as the known view if the next request
+    of the client is a delta request for the same snapshot (see
+    :func:`known_view`).
+
+    Parameters
+    ----------
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    name: string
+        Unique dataset name.
+    version: int
+        Identifier of the dataset snapshot.
+    offset: int
+        Offset of the first row of the visible window in the view.
+    limit: int
+        Number of rows in the visible window.
+    rows: pd.DataFrame
+        Data frame rows in the visible window.
+    filters: list of dict, default=None
+        Predicates for the rows in the view.
+    sort_by: dict, default=None
+        Sort order for the rows in the view.
+    """
+    key = window_key(
+        engine=engine,
+        name=name,
+        version=version,
+        offset=offset,
+        limit=limit,
+        filters=filters,
+        sort_by=sort_by
+    )
+    # Copy the rows to avoid keeping a reference to the full snapshot.
+    engine.windows.put(key, rows.copy())
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def window_key(
+    engine: OpencleanAPI, name: str, version: int, offset: int, limit: int,
+    filters: Optional[List[Dict]] = None, sort_by: Optional[Dict] = None
+) -> Tuple:
+    """Get the key for a visible window in the window cache of the engine.
+    Keys start with the engine identifier and the dataset name so that all
+    windows for a dataset are removed when the dataset is modified.
+
+    Parameters
+    ----------
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    name: string
+        Unique dataset name.
+    version: int
+        Identifier of the dataset snapshot.
+    offset: int
+        Offset of the first row of the visible window in the view.
+    limit: int
+        Number of rows in the visible window.
+    filters: list of dict, default=None
+        Predicates for the rows in the view.
+    sort_by: dict, default=None
+        Sort order for the rows in the view.
+
+    Returns
+    -------
+    tuple
+    """
+    view = json.dumps([filters or None, sort_by], sort_keys=True)
+    return (engine.identifier, name, version, view, offset, limit)
+
+
+def unchanged(prev: Dict, column: Dict) -> bool:
+    """Test if two column profile entries (see
+    :func:`openclean_notebook.controller.spreadsheet.data.profile_columns`)
+    are for columns with the same name and content.
+
+    Parameters
+    ----------
+    prev: dict
+        Column profile entry for the known snapshot.
+    column: dict
+        Column profile entry for the requested snapshot.
+
+    Returns
+    -------
+    bool
+    """
+    return prev['name'] == column['name'] and prev['key'] == column['key']
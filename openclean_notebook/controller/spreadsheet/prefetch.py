@@ -0,0 +1,245 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Serialization of pages in dataset views and speculative prefetching of
+adjacent pages. When a page is served for a request that sets the 'prefetch'
+depth, the pages that precede and follow the served page are serialized in a
+background task of the engine and added to the page cache of the engine. The
+next page request of the client is then served from the cache.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import json
+import numpy as np
+import pandas as pd
+
+from openclean_notebook.cache import MemoryCache
+from openclean_notebook.engine import OpencleanAPI
+
+import openclean_notebook.controller.spreadsheet.data as ds
+
+
+"""Formats for the dataset rows in a fetch response."""
+FORMAT_BINARY = 'binary'
+FORMAT_COLUMNS = 'columns'
+FORMAT_ROWS = 'rows'
+
+"""Estimated memory overhead (in bytes) per serialized cell for the size of
+cached pages.
+"""
+PAGE_OVERHEAD = 64
+
+
+@dataclass
+class Page:
+    """Serialized rows for a page in a dataset view. The document contains
+    either the 'rows' or the 'data' element of a fetch response. Buffers are
+    only given for pages in binary format.
+    """
+    # Offset of the first row of the page in the view.
+    offset: int
+    # Serialized rows.
+    doc: Dict
+    # Binary buffers that are referenced by the document.
+    buffers: Optional[List[memoryview]] = None
+    # Estimated memory usage (in bytes) of the serialized rows in the
+    # document (excluding the buffers).
+    size: Optional[int] = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Get the (approximate) memory usage of the serialized page.
+
+        Returns
+        -------
+        int
+        """
+        size = self.size
+        if self.buffers:
+            size += sum(b.nbytes for b in self.buffers)
+        return size
+
+
+def adjacent_offsets(offset: int, limit: int, row_count: int, depth: int) -> List[int]:
+    """Get the offsets of the pages that precede and follow the page at the
+    given offset (up to the given depth). Offsets are ordered by their
+    distance to the given page, starting with the following page.
+
+    Parameters
+    ----------
+    offset: int
+        Offset of the served page.
+    limit: int
+        Number of rows per page.
+    row_count: int
+        Number of rows in the view.
+    depth: int
+        Number of pages in each direction.
+
+    Returns
+    -------
+    list of int
+    """
+    offsets = list()
+    for i in range(1, depth + 1):
+        if offset + i * limit < row_count:
+            offsets.append(offset + i * limit)
+        if offset - i * limit >= 0:
+            offsets.append(offset - i * limit)
+    return offsets
+
+
+def page_key(
+    engine: OpencleanAPI, name: str, version: int, filters: Optional[List[Dict]],
+    sort_by: Optional[Dict], data_format: str, offset: int, limit: int
+) -> Tuple:
+    """Get the key for a page in the page cache of the engine. Pages are
+    identified by the dataset snapshot, the view parameters, the format, and
+    the row range. The key contains the generation of the cached objects for
+    the dataset to ensure that pages that are serialized by background tasks
+    after the dataset was modified are never served.
+
+    Parameters
+    ----------
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    name: string
+        Unique dataset name.
+    version: int
+        Identifier of the dataset snapshot.
+    filters: list of dict
+        Predicates for the rows in the view.
+    sort_by: dict
+        Sort order for the rows in the view.
+    data_format: string
+        Serialization format for the rows.
+    offset: int
+        Offset of the first row of the page in the view.
+    limit: int
+        Number of rows per page.
+
+    Returns
+    -------
+    tuple
+    """
+    view = json.dumps([filters, sort_by], sort_keys=True)
+    return (engine.identifier, name, engine.generation(name), version, view, data_format, offset, limit)
+
+
+def page_rows(df: pd.DataFrame, view: Optional[np.ndarray], offset: int, limit: int) -> pd.DataFrame:
+    """Get the data frame rows for a page in a dataset view.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data frame for the dataset snapshot.
+    view: np.ndarray
+        Positions of the rows in the view. The view contains all rows of the
+        dataset (in their original order) if None.
+    offset: int
+        Offset of the first row of the page in the view.
+    limit: int
+        Maximum number of rows in the page.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    # For filtered and sorted views, the rows for the requested page are
+    # selected using the row positions in the view.
+    if view is not None:
+        return df.iloc[view[offset:offset + limit]]
+    return df.iloc[offset:offset + limit]
+
+
+def prefetch_pages(
+    cache: MemoryCache, df: pd.DataFrame, view: Optional[np.ndarray],
+    pages: List[Tuple[Tuple, int]], limit: int, data_format: str
+):
+    """Serialize the given pages and add them to the page cache. Pages that
+    were added to the cache by a previous task are skipped.
+
+    Parameters
+    ----------
+    cache: openclean_notebook.cache.MemoryCache
+        Page cache of the engine.
+    df: pd.DataFrame
+        Data frame for the dataset snapshot.
+    view: np.ndarray
+        Positions of the rows in the view. The view contains all rows of the
+        dataset (in their original order) if None.
+    pages: list of tuple
+        Cache keys and offsets for the prefetched pages.
+    limit: int
+        Number of rows per page.
+    data_format: string
+        Serialization format for the rows.
+    """
+    for key, offset in pages:
+        if key not in cache:
+            page = serialize_page(df=df, view=view, offset=offset, limit=limit, data_format=data_format)
+            cache.put(key, page)
+
+
+def serialize_page(
+    df: pd.DataFrame, view: Optional[np.ndarray], offset: int, limit: int,
+    data_format: str
+) -> Page:
+    """Serialize the rows of a page in a dataset view.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data frame for the dataset snapshot.
+    view: np.ndarray
+        Positions of the rows in the view. The view contains all rows of the
+        dataset (in their original order) if None.
+    offset: int
+        Offset of the first row of the page in the view.
+    limit: int
+        Maximum number of rows in the page.
+    data_format: string
+        Serialization format for the rows.
+
+    Returns
+    -------
+    openclean_notebook.controller.spreadsheet.prefetch.Page
+    """
+    rows = page_rows(df=df, view=view, offset=offset, limit=limit)
+    if data_format == FORMAT_BINARY:
+        data, buffers = ds.fetch_buffers(df=rows, offset=0, end=rows.shape[0])
+        # The column descriptors are small compared to the buffers.
+        size = PAGE_OVERHEAD * (rows.shape[1] + 1)
+        return Page(offset=offset, doc={'data': data}, buffers=buffers, size=size)
+    # The memory usage of the serialized values is estimated from the memory
+    # usage of the page rows instead of serializing the document.
+    size = page_size(rows)
+    if data_format == FORMAT_COLUMNS:
+        doc = {'data': ds.fetch_columns(df=rows, offset=0, end=rows.shape[0])}
+    else:
+        doc = {'rows': ds.fetch_rows(df=rows, offset=0, end=rows.shape[0])}
+    return Page(offset=offset, doc=doc, size=size)
+
+
+def page_size(rows: pd.DataFrame) -> int:
+    """Get an estimate for the memory usage (in bytes) of the serialized rows
+    of a page. The estimate is based on the memory usage of the data frame
+    values (including Python objects) and a fixed overhead per cell and row.
+
+    Parameters
+    ----------
+    rows: pd.DataFrame
+        Data frame rows for a page.
+
+    Returns
+    -------
+    int
+    """
+    size = int(rows.memory_usage(index=True, deep=True).sum())
+    return size + PAGE_OVERHEAD * rows.shape[0] * (rows.shape[1] + 1)
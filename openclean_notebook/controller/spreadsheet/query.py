@@ -0,0 +1,143 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Helper functions for filtered and sorted views on dataset snapshots and
+for finding cells in a view. Predicates are evaluated using the inverted value
+indexes and the sort orders that are maintained by the engine for each
+snapshot column.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from openclean_notebook.engine import OpencleanAPI, column_position
+from openclean_notebook.index import OP_CONTAINS
+
+
+"""Default maximum number of cells in the result of a find request."""
+DEFAULT_FIND_LIMIT = 100
+
+
+def find_cells(
+    engine: OpencleanAPI, name: str, version: int, df: pd.DataFrame,
+    find: Dict, view: Optional[np.ndarray] = None
+) -> Dict:
+    """Find the cells in a dataset view whose value satisfies the predicate
+    of a find request. Cells are identified by their row position in the
+    view, the row identifier, and the column index position. Matching cells
+    are returned in view order (row by row).
+
+    Returns a dictionary with the total number of matching cells ('count')
+    and the list of (at most 'limit') matching cells ('matches').
+
+    Parameters
+    ----------
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    name: string
+        Unique dataset name.
+    version: int
+        Identifier of the dataset snapshot.
+    df: pd.DataFrame
+        Data frame for the dataset snapshot.
+    find: dict
+        Find element from a spreadsheet API request.
+    view: np.ndarray, default=None
+        Positions of the rows in the view. The view contains all rows of the
+        dataset (in their original order) if None.
+
+    Returns
+    -------
+    dict
+    """
+    columns = find.get('columns')
+    if columns is None:
+        columns = list(range(df.shape[1]))
+    # Map dataset row positions to view positions.
+    inverse = None
+    if view is not None:
+        inverse = np.full(df.shape[0], -1, dtype=np.int64)
+        inverse[view] = np.arange(len(view))
+    rows, cols = list(), list()
+    for column in columns:
+        pos = column_position(df, column)
+        index = engine.value_index(name=name, column=pos, version=version)
+        matches = index.select(op=find.get('op', OP_CONTAINS), value=find['value'])
+        if inverse is not None:
+            matches = inverse[matches]
+            matches = matches[matches >= 0]
+        rows.append(matches)
+        cols.append(np.full(len(matches), pos, dtype=np.int64))
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+    order = np.lexsort((cols, rows))[:find.get('limit', DEFAULT_FIND_LIMIT)]
+    positions = rows[order] if view is None else view[rows[order]]
+    return {
+        'count': len(rows),
+        'matches': [
+            {'row': int(r), 'id': int(rowid), 'column': int(c)}
+            for r, rowid, c in zip(rows[order], df.index[positions], cols[order])
+        ]
+    }
+
+
+def select_rows(
+    engine: OpencleanAPI, name: str, version: int,
+    filters: Optional[List[Dict]] = None, sort_by: Optional[Dict] = None
+) -> Optional[np.ndarray]:
+    """Get the positions of the rows in a filtered and sorted view on a
+    dataset snapshot. Rows have to satisfy all filter predicates. Returns
+    None if the view contains all rows in their original order.
+
+    Parameters
+    ----------
+    engine: openclean_notebook.engine.OpencleanAPI
+        Engine that maintains the dataset.
+    name: string
+        Unique dataset name.
+    version: int
+        Identifier of the dataset snapshot.
+    filters: list of dict, default=None
+        Filter predicates from a spreadsheet API request.
+    sort_by: dict, default=None
+        Sort order from a spreadsheet API request.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    selected = None
+    for predicate in filters if filters is not None else []:
+        index = engine.value_index(name=name, column=predicate['column'], version=version)
+        rows = index.select(
+            op=predicate['op'],
+            value=predicate.get('value'),
+            low=predicate.get('min'),
+            high=predicate.get('max')
+        )
+        if predicate.get('negate', False):
+            rows = np.setdiff1d(np.arange(len(index)), rows, assume_unique=True)
+        if selected is None:
+            selected = rows
+        else:
+            selected = np.intersect1d(selected, rows, assume_unique=True)
+    if sort_by is None:
+        return selected
+    order = engine.sort_order(
+        name=name,
+        column=sort_by['column'],
+        version=version,
+        descending=sort_by.get('descending', False)
+    )
+    if selected is None:
+        return order
+    # Keep the sort order for the selected rows.
+    mask = np.zeros(len(order), dtype=bool)
+    mask[selected] = True
+    return order[mask[order]]
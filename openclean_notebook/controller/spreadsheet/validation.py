@@ -0,0 +1,282 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Validator for spreadsheet API requests that avoids the overhead of the
+generic Json schema validator for the most frequent requests.
+
+Requests are validated in up to three steps:
+
+1. A predicate that is compiled from the request schema accepts requests that
+   only use simple schema constructs (e.g., the fetch-only requests for
+   pagination). The predicate never rejects a request. It only returns False
+   if it cannot decide whether the request is valid.
+2. A Json schema validator for a copy of the request schema where all
+   references are inlined (i.e., no reference resolution at validation time).
+3. If the request is invalid, the original validator (with reference
+   resolution) is used to raise the validation error. Errors are therefore
+   reported identically to validating all requests with the original
+   validator.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import copy
+
+from jsonschema import Draft7Validator, ValidationError
+
+
+"""Schema keywords that are ignored by the compiled predicates."""
+ANNOTATIONS = {'description', 'title', '$comment', 'definitions'}
+
+
+"""Python types for Json schema types. Note that booleans are not considered
+numbers and floats are not considered integers (to be on the safe side).
+"""
+JSON_TYPES = {
+    'array': lambda v: isinstance(v, list),
+    'boolean': lambda v: isinstance(v, bool),
+    'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
+    'null': lambda v: v is None,
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'object': lambda v: isinstance(v, dict),
+    'string': lambda v: isinstance(v, str)
+}
+
+
+class RequestValidator(object):
+    """Validator for requests that adhere to a definition in a Json schema
+    document. Implements the `validate`, `is_valid`, and `iter_errors` methods
+    of the jsonschema validator interface.
+    """
+    def __init__(self, schema: Dict, definition: str, validator: Draft7Validator):
+        """Initialize the compiled predicate and the validators.
+
+        Parameters
+        ----------
+        schema: dict
+            Json schema document with a 'definitions' element.
+        definition: string
+            Name of the definition for valid requests.
+        validator: jsonschema.Draft7Validator
+            Validator for the request definition that resolves references.
+        """
+        self.validator = validator
+        # Recursive references are not inlined. Include the definitions in the
+        # inlined schema to resolve them.
+        request = inline_refs(schema['definitions'][definition], schema['definitions'])
+        request['definitions'] = schema['definitions']
+        self.inlined = Draft7Validator(schema=request)
+        self.accept = compile_schema(request)
+        if self.accept is None:
+            self.accept = lambda v: False
+
+    def is_valid(self, request: Any) -> bool:
+        """Test if the given request is valid.
+
+        Parameters
+        ----------
+        request: any
+            Request document.
+
+        Returns
+        -------
+        bool
+        """
+        return self.accept(request) or self.inlined.is_valid(request)
+
+    def iter_errors(self, request: Any) -> Iterator[ValidationError]:
+        """Get all validation errors for the given request.
+
+        Parameters
+        ----------
+        request: any
+            Request document.
+
+        Returns
+        -------
+        iterator of jsonschema.ValidationError
+        """
+        if self.is_valid(request):
+            return iter(())
+        return self.validator.iter_errors(request)
+
+    def validate(self, request: Any):
+        """Raise a validation error if the given request is invalid.
+
+        Parameters
+        ----------
+        request: any
+            Request document.
+
+        Raises
+        ------
+        jsonschema.ValidationError
+        """
+        if not self.is_valid(request):
+            self.validator.validate(request)
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def compile_schema(schema: Any) -> Optional[Callable]:
+    """Compile a Json schema into a predicate that returns True for instances
+    that are valid. The predicate returns False if an instance is invalid or if
+    validity cannot be decided by the predicate.
+
+    Returns None if the schema contains keywords that are not supported. The
+    supported keywords are: type, minimum, maximum, enum, const, anyOf, items,
+    minItems, properties, required, and additionalProperties (if False). For object
+    schemas, properties whose schema is not supported only cause the predicate
+    to return False if the property is present in the instance.
+
+    Parameters
+    ----------
+    schema: any
+        Json schema (without references).
+
+    Returns
+    -------
+    callable
+    """
+    if schema is True or schema == {}:
+        return lambda v: True
+    if not isinstance(schema, dict):
+        return None
+    supported = {
+        'type', 'minimum', 'maximum', 'enum', 'const', 'anyOf', 'items',
+        'minItems', 'properties', 'required', 'additionalProperties'
+    }
+    if not set(schema).issubset(supported | ANNOTATIONS):
+        return None
+    checks = compile_values(schema)
+    if checks is None:
+        return None
+    if 'anyOf' in schema:
+        options = [compile_schema(s) for s in schema['anyOf']]
+        options = [f for f in options if f is not None]
+        checks.append(lambda v: any(f(v) for f in options))
+    if 'items' in schema:
+        items = compile_schema(schema['items'])
+        if items is None:
+            return None
+        checks.append(lambda v: not isinstance(v, list) or all(items(i) for i in v))
+    if 'minItems' in schema:
+        size = schema['minItems']
+        checks.append(lambda v: not isinstance(v, list) or len(v) >= size)
+    if 'properties' in schema or 'required' in schema or 'additionalProperties' in schema:
+        check = compile_object(schema)
+        if check is None:
+            return None
+        checks.append(check)
+    return lambda v: all(f(v) for f in checks)
+
+
+def compile_values(schema: Dict) -> Optional[List[Callable]]:
+    """Compile the type, range, and value keywords of a Json schema into a
+    list of predicates. Returns None if the schema contains unknown types.
+
+    Parameters
+    ----------
+    schema: dict
+        Json schema (without references).
+
+    Returns
+    -------
+    list of callable
+    """
+    checks = list()
+    # Type check.
+    if 'type' in schema:
+        types = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+        if not set(types).issubset(JSON_TYPES):
+            return None
+        typechecks = [JSON_TYPES[t] for t in types]
+        checks.append(lambda v: any(f(v) for f in typechecks))
+    # Range checks only apply to numbers.
+    number = JSON_TYPES['number']
+    if 'minimum' in schema:
+        low = schema['minimum']
+        checks.append(lambda v: not number(v) or v >= low)
+    if 'maximum' in schema:
+        high = schema['maximum']
+        checks.append(lambda v: not number(v) or v <= high)
+    # Value checks. Values have to match the type of the allowed values to
+    # avoid issues with 1 == True.
+    if 'enum' in schema or 'const' in schema:
+        values = schema['enum'] if 'enum' in schema else [schema['const']]
+        checks.append(lambda v: any(type(v) is type(e) and v == e for e in values))
+    return checks
+
+
+def compile_object(schema: Dict) -> Optional[Callable]:
+    """Compile the object-related keywords of a Json schema into a predicate.
+    Returns None if the schema contains additionalProperties that is neither
+    True nor False.
+
+    Parameters
+    ----------
+    schema: dict
+        Json schema for objects (without references).
+
+    Returns
+    -------
+    callable
+    """
+    additional = schema.get('additionalProperties', True)
+    if additional not in [True, False]:
+        return None
+    properties = {
+        key: compile_schema(s) for key, s in schema.get('properties', {}).items()
+    }
+    required = schema.get('required', [])
+
+    def check(obj: Any) -> bool:
+        if not isinstance(obj, dict):
+            return True
+        for key in required:
+            if key not in obj:
+                return False
+        for key, value in obj.items():
+            if key in properties:
+                f = properties[key]
+                if f is None or not f(value):
+                    return False
+            elif not additional:
+                return False
+        return True
+
+    return check
+
+
+def inline_refs(schema: Any, definitions: Dict, stack: Optional[tuple] = ()) -> Any:
+    """Get a copy of a Json schema where all references to elements in the
+    given definitions are replaced by a copy of the referenced definition.
+    Recursive references are not inlined.
+
+    Parameters
+    ----------
+    schema: any
+        Json schema.
+    definitions: dict
+        Definitions that are referenced as '#/definitions/{name}'.
+    stack: tuple, default=()
+        Names of definitions that are being inlined (to detect cycles).
+
+    Returns
+    -------
+    any
+    """
+    if isinstance(schema, list):
+        return [inline_refs(s, definitions, stack) for s in schema]
+    if not isinstance(schema, dict):
+        return copy.deepcopy(schema)
+    ref = schema.get('$ref')
+    if isinstance(ref, str) and ref.startswith('#/definitions/'):
+        name = ref[len('#/definitions/'):]
+        if name in definitions and name not in stack:
+            return inline_refs(definitions[name], definitions, stack + (name,))
+    return {key: inline_refs(value, definitions, stack) for key, value in schema.items()}
@@ -0,0 +1,376 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Opt-in profiling of individual requests from user-interface components.
+Requests are executed under cProfile and tracemalloc. The resulting captures
+are kept in a ring buffer that only retains the most recent captures (see
+:class:`CaptureBuffer`). Captures can be inspected in the notebook or dumped
+as pstats files (e.g., for snakeviz) and as folded stack files for flame
+graph tools (e.g., flamegraph.pl or speedscope).
+
+Note that cProfile only profiles the thread that executes the request. The
+time for background tasks of the engine (e.g., prefetching pages or running
+the profiler for pushed metadata) is not included in a capture.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+
+"""Default number of captures that are kept by an engine."""
+DEFAULT_CAPTURE_SIZE = 10
+
+"""Number of code locations with the largest memory allocations and number
+of functions with the largest cumulative time in capture summaries.
+"""
+TOP_ALLOCATIONS = 10
+TOP_FUNCTIONS = 20
+
+
+@dataclass
+class Capture:
+    """Profile for the execution of a single request."""
+    # Unique (increasing) identifier for the capture.
+    identifier: int
+    # Request body.
+    request: Dict
+    # Timestamp for the start of the request.
+    started: float
+    # Time (in seconds) for executing the request.
+    elapsed: float
+    # Function call statistics.
+    stats: pstats.Stats
+    # Peak memory (in bytes) that was traced while executing the request.
+    # The peak is None if tracemalloc was started before the request.
+    peak_memory: Optional[int] = None
+    # Code locations with the largest memory allocations that were not freed
+    # when the request finished.
+    allocations: List[Dict] = field(default_factory=list)
+    # Error message if the request raised an exception.
+    error: Optional[str] = None
+
+    def functions(self, limit: Optional[int] = TOP_FUNCTIONS) -> List[Dict]:
+        """Get the functions with the largest cumulative time. Each entry
+        contains the function label, the number of calls, the time spent in
+        the function itself ('tottime'), and the cumulative time ('cumtime').
+
+        Parameters
+        ----------
+        limit: int, default=TOP_FUNCTIONS
+            Maximum number of returned functions.
+
+        Returns
+        -------
+        list of dict
+        """
+        entries = sorted(self.stats.stats.items(), key=lambda e: e[1][3], reverse=True)
+        return [
+            {'function': frame_label(func), 'calls': nc, 'tottime': tt, 'cumtime': ct}
+            for func, (_, nc, tt, ct, _) in entries[:limit]
+        ]
+
+    def to_dict(self) -> Dict:
+        """Get a summary of the capture with the request, the timing and
+        memory information, and the functions with the largest cumulative
+        time.
+
+        Returns
+        -------
+        dict
+        """
+        return {
+            'id': self.identifier,
+            'request': self.request,
+            'started': self.started,
+            'elapsed': self.elapsed,
+            'peakMemory': self.peak_memory,
+            'allocations': self.allocations,
+            'functions': self.functions(),
+            'error': self.error
+        }
+
+
+class CaptureBuffer(object):
+    """Ring buffer for the most recent request captures. The buffer is
+    thread-safe. Requests are captured using :meth:`run`.
+    """
+    def __init__(self, capacity: Optional[int] = DEFAULT_CAPTURE_SIZE):
+        """Initialize the maximum number of captures in the buffer.
+
+        Parameters
+        ----------
+        capacity: int, default=DEFAULT_CAPTURE_SIZE
+            Maximum number of captures that are kept. Older captures are
+            removed first.
+        """
+        self._captures = deque(maxlen=capacity)
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        """Iterate over the captures in the buffer (oldest first)."""
+        return iter(self.captures())
+
+    def __len__(self) -> int:
+        """Number of captures in the buffer."""
+        return len(self._captures)
+
+    def captures(self) -> List[Capture]:
+        """Get the list of captures in the buffer (oldest first).
+
+        Returns
+        -------
+        list of openclean_notebook.debug.Capture
+        """
+        with self._lock:
+            return list(self._captures)
+
+    def clear(self):
+        """Remove all captures from the buffer."""
+        with self._lock:
+            self._captures.clear()
+
+    def dump(self, directory: str, identifier: Optional[int] = None) -> List[str]:
+        """Write the captures in the buffer (or the capture with the given
+        identifier) to files in the given directory. For each capture, the
+        function call statistics are written to a pstats file
+        'capture-<id>.pstats' and the call stacks in folded format (see
+        :func:`folded_stacks`) to a file 'capture-<id>.folded'.
+
+        Returns the list of written files.
+
+        Parameters
+        ----------
+        directory: string
+            Path to the output directory. The directory is created if it does
+            not exist.
+        identifier: int, default=None
+            Identifier of the capture that is written. All captures in the
+            buffer are written if None.
+
+        Returns
+        -------
+        list of string
+
+        Raises
+        ------
+        KeyError
+        """
+        captures = self.captures() if identifier is None else [self.get(identifier)]
+        os.makedirs(directory, exist_ok=True)
+        files = list()
+        for capture in captures:
+            prefix = os.path.join(directory, 'capture-{}'.format(capture.identifier))
+            capture.stats.dump_stats(prefix + '.pstats')
+            with open(prefix + '.folded', 'w') as f:
+                for line in folded_stacks(capture.stats):
+                    f.write(line + '\n')
+            files.extend([prefix + '.pstats', prefix + '.folded'])
+        return files
+
+    def get(self, identifier: int) -> Capture:
+        """Get the capture with the given identifier. Raises a KeyError if
+        the capture is not in the buffer (anymore).
+
+        Parameters
+        ----------
+        identifier: int
+            Unique capture identifier.
+
+        Returns
+        -------
+        openclean_notebook.debug.Capture
+
+        Raises
+        ------
+        KeyError
+        """
+        for capture in self.captures():
+            if capture.identifier == identifier:
+                return capture
+        raise KeyError("unknown capture '{}'".format(identifier))
+
+    def run(self, request: Dict, func: Callable) -> Tuple[Any, Capture]:
+        """Execute a function for the given request under cProfile and
+        tracemalloc and add the capture to the buffer. Returns the function
+        result and the capture. If the function raises an exception, the
+        capture (with the error message) is added to the buffer before the
+        exception is re-raised.
+
+        Parameters
+        ----------
+        request: dict
+            Request body.
+        func: callable
+            Function without arguments that executes the request.
+
+        Returns
+        -------
+        tuple of any and openclean_notebook.debug.Capture
+        """
+        # Only stop tracemalloc after the request if it was not started by the
+        # user before. The peak memory is unknown in that case.
+        traced = tracemalloc.is_tracing()
+        if not traced:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        started, start = time.time(), time.perf_counter()
+        result, error = None, None
+        profile.enable()
+        try:
+            result = func()
+        except Exception as ex:
+            error = ex
+        finally:
+            profile.disable()
+        elapsed = time.perf_counter() - start
+        peak = None if traced else tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+        if not traced:
+            tracemalloc.stop()
+        with self._lock:
+            self._counter += 1
+            capture = Capture(
+                identifier=self._counter,
+                request=request,
+                started=started,
+                elapsed=elapsed,
+                stats=pstats.Stats(profile),
+                peak_memory=peak,
+                allocations=allocations(before=before, after=after),
+                error=str(error) if error is not None else None
+            )
+            self._captures.append(capture)
+        if error is not None:
+            raise error
+        return result, capture
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def allocations(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot,
+    limit: Optional[int] = TOP_ALLOCATIONS
+) -> List[Dict]:
+    """Get the code locations with the largest increase in allocated memory
+    between two tracemalloc snapshots. Allocations by tracemalloc itself are
+    ignored.
+
+    Parameters
+    ----------
+    before: tracemalloc.Snapshot
+        Snapshot that was taken before the request.
+    after: tracemalloc.Snapshot
+        Snapshot that was taken after the request.
+    limit: int, default=TOP_ALLOCATIONS
+        Maximum number of returned code locations.
+
+    Returns
+    -------
+    list of dict
+    """
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+    result = list()
+    for stat in stats[:limit]:
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        result.append({
+            'location': '{}:{}'.format(frame.filename, frame.lineno),
+            'size': stat.size_diff,
+            'count': stat.count_diff
+        })
+    return result
+
+
+def folded_stacks(
+    stats: pstats.Stats, max_depth: Optional[int] = 64,
+    min_time: Optional[float] = 1e-6
+) -> List[str]:
+    """Get the call stacks for function call statistics in the folded format
+    of flame graph tools ('<frame>;<frame>;... <microseconds>').
+
+    cProfile only records the callers of each function but not the full
+    call stacks. Stacks are therefore reconstructed from the root functions
+    and the time of each function is distributed over its callers in
+    proportion to the cumulative time for each caller. Recursive calls are
+    not expanded and stacks with less than the minimum time are pruned.
+
+    Parameters
+    ----------
+    stats: pstats.Stats
+        Function call statistics.
+    max_depth: int, default=64
+        Maximum depth of the reconstructed stacks.
+    min_time: float, default=1e-6
+        Minimum time (in seconds) for expanded stacks.
+
+    Returns
+    -------
+    list of string
+    """
+    # Get the cumulative time for each caller-callee pair.
+    callees = dict()
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, ct) in callers.items():
+            callees.setdefault(caller, dict())[func] = ct
+    times = dict()
+
+    def expand(func: Tuple, budget: float, stack: List[Tuple]):
+        _, _, tt, ct, _ = stats.stats[func]
+        if ct <= 0 or budget < min_time:
+            return
+        stack = stack + [func]
+        key = ';'.join(frame_label(f) for f in stack)
+        if len(stack) >= max_depth:
+            times[key] = times.get(key, 0) + budget
+            return
+        times[key] = times.get(key, 0) + budget * tt / ct
+        for callee, edge in callees.get(func, dict()).items():
+            if callee not in stack:
+                expand(callee, budget * edge / ct, stack)
+
+    for func, (_, _, _, ct, callers) in stats.stats.items():
+        if not callers:
+            expand(func, ct, list())
+    lines = list()
+    for key, value in times.items():
+        micros = int(round(value * 1e6))
+        if micros > 0:
+            lines.append('{} {}'.format(key, micros))
+    return lines
+
+
+def frame_label(func: Tuple[str, int, str]) -> str:
+    """Get a label for a function in cProfile statistics. Built-in functions
+    are labeled by their name only.
+
+    Parameters
+    ----------
+    func: tuple of string, int, string
+        File name, line number, and function name.
+
+    Returns
+    -------
+    string
+    """
+    filename, lineno, name = func
+    if filename == '~':
+        label = name
+    else:
+        label = '{} ({}:{})'.format(name, os.path.basename(filename), lineno)
+    return label.replace(';', ':')
@@ -9,17 +9,40 @@
 identified by a unique name. Dataset snapshots are maintained by a datastore.
 """
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from histore.archive.base import Archive
 from histore.archive.manager.base import ArchiveManager
-from histore.archive.manager.persist import PersistentArchiveManager
-from histore.archive.manager.mem import VolatileArchiveManager
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
+import dataclasses
+import numpy as np
 import os
+import pandas as pd
+import threading
 
+from openclean.data.archive.cache import CachedDatastore
+from openclean.data.archive.histore import HISTOREDatastore
+from openclean.data.stream.base import Datasource
+from openclean.engine.action import OpHandle, SampleOp
 from openclean.engine.base import OpencleanEngine
+from openclean.engine.dataset import DatasetHandle, DataSample
 from openclean.engine.library import ObjectLibrary
 from openclean.engine.registry import registry
+from openclean.profiling.dataset import Profiler
 from openclean.util.core import unique_identifier
+from openclean_notebook.cache import (
+    CacheStats, MemoryCache, DEFAULT_CACHE_SIZE, DEFAULT_PAGE_CACHE_SIZE, DEFAULT_WINDOW_CACHE_SIZE,
+    frame_size
+)
+from openclean_notebook.compact import compact_stream
+from openclean_notebook.commit import DEFAULT_CHUNK_SIZE, commit_sample
+from openclean_notebook.debug import CaptureBuffer, DEFAULT_CAPTURE_SIZE
+from openclean_notebook.index import ValueIndex
+from openclean_notebook.library import NotebookLibrary
+from openclean_notebook.metadata.cache import ProfileCache, DEFAULT_PROFILE_CACHE_SIZE
+from openclean_notebook.metrics import registry as request_metrics
+from openclean_notebook.sampling import sample_stream
+from openclean_notebook.sorting import argsort
 
 
 class OpencleanAPI(OpencleanEngine):
@@ -28,7 +51,17 @@ class OpencleanAPI(OpencleanEngine):
     """
     def __init__(
         self, identifier: str, manager: ArchiveManager, library: ObjectLibrary,
-        basedir: Optional[str] = None, cached: Optional[bool] = True
+        basedir: Optional[str] = None, cached: Optional[bool] = True,
+        cache_size: Optional[int] = DEFAULT_CACHE_SIZE,
+        profiler: Optional[Profiler] = None, load_once: Optional[bool] = False,
+        chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE, workers: Optional[int] = 1,
+        memo_size: Optional[int] = None,
+        page_cache_size: Optional[int] = DEFAULT_PAGE_CACHE_SIZE,
+        debug: Optional[bool] = False,
+        capture_size: Optional[int] = DEFAULT_CAPTURE_SIZE,
+        profile_cache: Optional[ProfileCache] = None,
+        compact: Optional[bool] = False,
+        window_cache_size: Optional[int] = DEFAULT_WINDOW_CACHE_SIZE
     ):
         """Initialize the engine identifier, the manager for created dataset
         archives, and the library for registered objects.
@@ -46,6 +79,49 @@ class OpencleanAPI(OpencleanEngine):
         cached: bool, default=True
             Flag indicating whether the all datastores that are created for
             existing archives are cached datastores or not.
+        cache_size: int, default=DEFAULT_CACHE_SIZE
+            Memory budget (in bytes) for dataset snapshots that are cached
+            by the engine for requests from the spreadsheet view. The same
+            budget applies to the cached sort orders and value indexes for
+            dataset columns.
+        profiler: openclean.profiling.dataset.Profiler, default=None
+            Profiler for dataset snapshots that are displayed in the
+            spreadsheet view. Uses the default datamart profiler if None.
+        load_once: bool, default=False
+            Include the Javascript bundle only in the output of the first
+            spreadsheet view that is displayed by the kernel.
+        chunk_size: int, default=DEFAULT_CHUNK_SIZE
+            Number of rows in each chunk when committing the operations on a
+            dataset sample to the full dataset.
+        workers: int, default=1
+            Number of worker processes that transform chunks in parallel when
+            committing the operations on a dataset sample.
+        memo_size: int, default=None
+            Maximum number of distinct input values for which the results of
+            library functions in update operations are memoized. Memoization
+            is disabled if None.
+        page_cache_size: int, default=DEFAULT_PAGE_CACHE_SIZE
+            Memory budget (in bytes) for serialized pages of dataset views
+            that are prefetched for the spreadsheet view. Prefetching is
+            disabled if zero.
+        debug: bool, default=False
+            Capture a profile for every spreadsheet API request that is
+            processed by the engine.
+        capture_size: int, default=DEFAULT_CAPTURE_SIZE
+            Number of request captures that are kept by the engine.
+        profile_cache: openclean_notebook.metadata.cache.ProfileCache, default=None
+            Persistent cache for column profiles that is shared with other
+            engines. Profiles are only cached with the dataset snapshots if
+            None.
+        compact: bool, default=False
+            Keep compact representations of the dataset snapshots in the
+            snapshot cache. Compact snapshots are read from the datastore in
+            chunks of ``chunk_size`` rows (see
+            :func:`openclean_notebook.compact.compact_stream`).
+        window_cache_size: int, default=DEFAULT_WINDOW_CACHE_SIZE
+            Memory budget (in bytes) for the rows of dataset view windows
+            that were sent to clients. The windows are the known views for
+            delta responses.
         """
         super(OpencleanAPI, self).__init__(
             identifier=identifier,
@@ -54,10 +130,162 @@ class OpencleanAPI(OpencleanEngine):
             basedir=basedir,
             cached=cached
         )
+        # Cache for checked out dataset snapshots. Entries are keyed by the
+        # engine identifier, the dataset name, and the snapshot version.
+        self.snapshots = MemoryCache(capacity=cache_size, sizeof=frame_size)
+        # Cache for sort orders of snapshot columns. Entries are keyed by the
+        # engine identifier, the dataset name, the snapshot version, the
+        # column index position, and the sort direction.
+        self.sort_orders = MemoryCache(capacity=cache_size, sizeof=lambda a: a.nbytes)
+        # Cache for inverted value indexes of snapshot columns. Entries are
+        # keyed by the engine identifier, the dataset name, the snapshot
+        # version, and the column index position.
+        self.value_indexes = MemoryCache(capacity=cache_size, sizeof=lambda ix: ix.nbytes)
+        # Cache for prefetched pages of dataset views. Entries are keyed by
+        # the engine identifier, the dataset name, the generation of cached
+        # objects for the dataset, and the page parameters (see
+        # :func:`openclean_notebook.controller.spreadsheet.prefetch.page_key`).
+        self.pages = MemoryCache(capacity=page_cache_size, sizeof=lambda p: p.nbytes)
+        # Cache for the rows in the visible windows of the latest responses.
+        # The windows are the known views for delta requests. Entries are
+        # keyed by the engine identifier, the dataset name, the snapshot
+        # version, and the window parameters (see
+        # :func:`openclean_notebook.controller.spreadsheet.delta.window_key`).
+        self.windows = MemoryCache(capacity=window_cache_size, sizeof=frame_size)
+        # Number of times that the cached objects for each dataset were
+        # invalidated.
+        self._generations = dict()
+        self.profiler = profiler
+        self.profile_cache = profile_cache
+        self.compact = compact
+        self.load_once = load_once
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.memo_size = memo_size
+        # Ring buffer for profiles of individual requests (see
+        # :mod:`openclean_notebook.debug`). Requests are captured if debugging
+        # is enabled for the engine or if requested by the client.
+        self.debug = debug
+        self.captures = CaptureBuffer(capacity=capture_size)
+        # Executors for background tasks (e.g., profiling of dataset snapshots)
+        # and for prefetching pages of dataset views. Prefetch tasks have a
+        # separate executor so that they never wait for long-running tasks.
+        # The executors are created when the first task is submitted.
+        self._tasks = None
+        self._prefetch = None
+        # Lock that serializes writes to the dataset metadata by background
+        # tasks with actions that modify datasets.
+        self.metadata_lock = threading.RLock()
+
+    def cache_stats(self) -> CacheStats:
+        """Get a copy of the hit, miss and eviction counters for the snapshot
+        cache of the engine.
+
+        Returns
+        -------
+        openclean_notebook.cache.CacheStats
+        """
+        return dataclasses.replace(self.snapshots.stats)
+
+    def checkout(self, name: str, commit: Optional[bool] = False) -> pd.DataFrame:
+        """Checkout the latest version of a dataset. If the dataset is a sample
+        it will be replaced by the handle for the original dataset. Invalidates
+        all cached snapshots for the dataset.
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+        commit: bool, default=False
+            Apply all uncommited changes to the original database if True.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        self.invalidate(name)
+        if commit and self.dataset(name).is_sample:
+            # Use the streaming commit instead of the default commit.
+            self.commit_sample(name)
+            commit = False
+        return super(OpencleanAPI, self).checkout(name=name, commit=commit)
+
+    def commit(
+        self, name: str, source: Datasource, action: Optional[OpHandle] = None
+    ) -> Datasource:
+        """Commit a modified data frame to the dataset archive. Invalidates all
+        cached snapshots for the dataset.
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+        source: openclean.data.stream.base.Datasource
+            Input data frame or stream containing the new dataset version that
+            is being stored.
+        action: openclean.engine.action.OpHandle, default=None
+            Operator that created the dataset snapshot.
+
+        Returns
+        -------
+        openclean.data.stream.base.Datasource
+        """
+        self.invalidate(name)
+        return super(OpencleanAPI, self).commit(name=name, source=source, action=action)
+
+    def commit_sample(
+        self, name: str, progress: Optional[Callable[[Dict], None]] = None
+    ) -> List[OpHandle]:
+        """Apply all operations in the history of a dataset sample to the
+        original (full) dataset. The rows of the full dataset are processed in
+        chunks of fixed size (see :func:`openclean_notebook.commit.commit_sample`).
+        Progress is reported after each chunk to the optional callback.
+
+        Returns the list of committed actions. Raises a ValueError if the
+        dataset is not a sample.
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+        progress: callable, default=None
+            Function that receives progress reports.
+
+        Returns
+        -------
+        list of openclean.engine.action.OpHandle
+
+        Raises
+        ------
+        ValueError
+        """
+        dataset = self.dataset(name)
+        if not dataset.is_sample:
+            raise ValueError("dataset '{}' is not a sample".format(name))
+        return commit_sample(
+            sample=dataset,
+            chunk_size=self.chunk_size,
+            progress=progress,
+            workers=self.workers,
+            memo_size=self.memo_size
+        )
+
+    def drop(self, name: str):
+        """Delete the full history for the dataset with the given name and
+        remove all cached snapshots for the dataset.
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+        """
+        self.invalidate(name)
+        super(OpencleanAPI, self).drop(name=name)
 
     def edit(
         self, name: str, n: Optional[int] = None,
-        random_state: Optional[Tuple[int, List]] = None
+        random_state: Optional[Tuple[int, List]] = None,
+        stratify: Optional[Union[int, str]] = None
     ):
         """Display the spreadsheet view for a given dataset. The dataset is
         identified by its unique name. Raises a ValueError if no dataset with
@@ -65,8 +293,8 @@ class OpencleanAPI(OpencleanEngine):
 
         Creates a new data frame that contains a random sample of the rows in
         the last snapshot of the identified dataset. This sample is registered
-        as a separate dataset with the engine. If neither n nor frac are
-        specified a random sample of size 100 is generated.
+        as a separate dataset with the engine (see :meth:`sample`). If neither
+        n nor frac are specified a random sample of size 100 is generated.
 
         Parameters
         ----------
@@ -76,6 +304,9 @@ class OpencleanAPI(OpencleanEngine):
             Number of rows in the sample dataset.
         random_state: int or list, default=None
             Seed for random number generator.
+        stratify: int or string, default=None
+            Index position or name of the column that defines the strata for
+            a stratified sample.
 
         Raises
         ------
@@ -83,27 +314,429 @@ class OpencleanAPI(OpencleanEngine):
         """
         # Create a sample for the dataset if a sample size was given by the user.
         if n is not None:
-            self.sample(name=name, n=n, random_state=random_state)
+            self.sample(name=name, n=n, random_state=random_state, stratify=stratify)
         # Embed the spreadsheet view into the notebook. Import the spreadsheet
         # embedder here to avoid cyclic dependencies.
         from openclean_notebook.controller.spreadsheet.base import spreadsheet
-        spreadsheet(name=name, engine=self.identifier)
+        spreadsheet(name=name, engine=self.identifier, load_once=self.load_once)
+
+    def invalidate(self, name: str):
+        """Remove all cached objects for the dataset with the given name. This
+        method has to be called whenever a dataset is modified.
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+        """
+        self.snapshots.invalidate((self.identifier, name))
+        self.sort_orders.invalidate((self.identifier, name))
+        self.value_indexes.invalidate((self.identifier, name))
+        self.pages.invalidate((self.identifier, name))
+        self.windows.invalidate((self.identifier, name))
+        self._generations[name] = self._generations.get(name, 0) + 1
+
+    def generation(self, name: str) -> int:
+        """Get the number of times that the cached objects for the dataset
+        with the given name were invalidated. Objects that are computed by
+        background tasks include the generation in their cache key to avoid
+        serving objects for a dataset that was modified in the meantime.
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+
+        Returns
+        -------
+        int
+        """
+        return self._generations.get(name, 0)
 
     def library_dict(self) -> Dict:
         """Get serialization of registered library functions and namespaces.
+        Each function serialization contains the flag that indicates whether
+        the function is vectorized or not.
 
         Returns
         -------
         list
         """
-        return {'functions': self.library.functions().to_listing()}
+        functions = self.library.functions().to_listing()
+        return {'functions': [dict(f, vectorized=f.get('vectorized', False)) for f in functions]}
+
+    def metrics(self, reset: Optional[bool] = False) -> Dict:
+        """Get the aggregated phase times and byte counts for the spreadsheet
+        API requests that were processed by the engine (see
+        :meth:`openclean_notebook.metrics.MetricsRegistry.get`).
+
+        Parameters
+        ----------
+        reset: bool, default=False
+            Remove the recorded metrics for the engine after reading them.
+
+        Returns
+        -------
+        dict
+        """
+        result = request_metrics.get(self.identifier)
+        if reset:
+            request_metrics.reset(self.identifier)
+        return result
+
+    def rollback(self, name: str, version: str) -> pd.DataFrame:
+        """Rollback all changes including the given dataset version. Invalidates
+        all cached snapshots for the dataset.
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+        version: string
+            Unique log entry version.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        self.invalidate(name)
+        return super(OpencleanAPI, self).rollback(name=name, version=version)
+
+    def sample(
+        self, name: str, n: Optional[int] = None,
+        random_state: Optional[Tuple[int, List]] = None,
+        stratify: Optional[Union[int, str]] = None
+    ) -> pd.DataFrame:
+        """Create a random sample of the rows in the last snapshot of the
+        identified dataset and register it as the handle for the dataset.
+        Invalidates all cached snapshots for the dataset since the versions of
+        the sample are independent of the versions of the original dataset.
+
+        The rows of the snapshot are streamed from the archive and sampled in
+        a single pass using reservoir sampling (see
+        :func:`openclean_notebook.sampling.sample_stream`). Only the rows in
+        the sample are kept in memory. Rows in the sample are in the order of
+        the snapshot. If a stratify column is given, each distinct value in
+        the column is represented in the sample in proportion to its
+        frequency. The stratify column is recorded with the arguments of the
+        sample operation in the dataset log. Raises a ValueError if the
+        column has more than
+        :data:`openclean_notebook.sampling.DEFAULT_MAX_STRATA` distinct
+        values.
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+        n: int, default=None
+            Number of rows in the sample dataset. The default sample size is
+            100.
+        random_state: int or list, default=None
+            Seed for random number generator.
+        stratify: int or string, default=None
+            Index position or name of the column that defines the strata for
+            a stratified sample.
+
+        Returns
+        -------
+        pd.DataFrame
+
+        Raises
+        ------
+        KeyError
+        ValueError
+        """
+        self.invalidate(name)
+        n = 100 if n is None else n
+        handle = self.dataset(name)
+        reader = handle.open()
+        df = sample_stream(
+            rows=reader.iterrows(),
+            columns=reader.columns,
+            n=n,
+            stratify=stratify,
+            random_state=random_state
+        )
+        # Register the sample as a new dataset with a reference to the
+        # original dataset (in the same way as the openclean engine).
+        self._datasets[name] = NotebookSample(
+            df=df,
+            original=handle,
+            n=n,
+            random_state=random_state,
+            stratify=stratify
+        )
+        return df
+
+    def sort_order(
+        self, name: str, column: Union[int, str], version: Optional[int] = None,
+        descending: Optional[bool] = False
+    ) -> np.ndarray:
+        """Get the permutation of row positions that sorts a dataset snapshot
+        by the values in the given column.
+
+        Sort orders are computed once for each snapshot, column, and sort
+        direction. They are served from the sort order cache of the engine if
+        possible. If the engine has a base directory, sort orders for full
+        datasets are also stored on disk (in the metadata directory of the
+        dataset archive) and are loaded from there when they are not cached.
+
+        Raises a ValueError if the column is unknown.
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+        column: int or string
+            Index position or name of the sort column.
+        version: int, default=None
+            Identifier of the snapshot version. By default the last version of
+            the dataset is sorted.
+        descending: bool, default=False
+            Sort values in descending order if True.
+
+        Returns
+        -------
+        np.ndarray
+
+        Raises
+        ------
+        ValueError
+        """
+        dataset = self.dataset(name)
+        version = version if version is not None else dataset.version()
+        df = self.snapshot(name=name, version=version)
+        pos = column_position(df, column)
+        key = (self.identifier, name, version, pos, bool(descending))
+        order = self.sort_orders.get(key)
+        if order is not None:
+            return order
+        filename = self._sort_order_file(dataset, version=version, pos=pos, descending=descending)
+        if filename is not None and os.path.isfile(filename):
+            order = np.load(filename)
+        else:
+            order = argsort(df.iloc[:, pos], descending=descending)
+            if filename is not None:
+                # Write the sort order to a temporary file first to avoid
+                # partially written files.
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                tmpfile = '{}.tmp.npy'.format(filename[:-4])
+                np.save(tmpfile, order)
+                os.replace(tmpfile, filename)
+        self.sort_orders.put(key, order)
+        return order
+
+    def _sort_order_file(
+        self, dataset: DatasetHandle, version: int, pos: int, descending: bool
+    ) -> Optional[str]:
+        """Get the path to the file for a persisted sort order. Returns None if
+        the engine does not have a base directory or if the dataset is a sample.
+
+        Version numbers may be reused after a rollback. The file name therefore
+        contains the creation time of the snapshot in addition to the version.
+
+        Parameters
+        ----------
+        dataset: openclean.engine.dataset.DatasetHandle
+            Handle for the sorted dataset.
+        version: int
+            Identifier of the snapshot version.
+        pos: int
+            Index position of the sort column.
+        descending: bool
+            Flag for the sort direction.
+
+        Returns
+        -------
+        string
+        """
+        if self.basedir is None or dataset.is_sample:
+            return None
+        snapshots = [s for s in dataset.store.snapshots() if s.version == version]
+        if not snapshots:
+            return None
+        filename = '{}.{}.{}.{}.npy'.format(
+            version,
+            int(snapshots[0].created_at.timestamp() * 1000000),
+            pos,
+            'desc' if descending else 'asc'
+        )
+        return os.path.join(self.basedir, dataset.identifier, 'sort', filename)
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Run a given function in a background thread. Tasks are executed one
+        at a time in the order in which they were submitted.
+
+        Parameters
+        ----------
+        func: callable
+            Function that is executed in the background.
+        args: list
+            Positional arguments for the function call.
+        kwargs: dict
+            Keyword arguments for the function call.
+
+        Returns
+        -------
+        concurrent.futures.Future
+        """
+        if self._tasks is None:
+            self._tasks = ThreadPoolExecutor(max_workers=1)
+        return self._tasks.submit(func, *args, **kwargs)
+
+    def submit_prefetch(self, func: Callable, *args, **kwargs) -> Future:
+        """Run a given function that prefetches pages of dataset views in a
+        background thread. Prefetch tasks are executed one at a time in the
+        order in which they were submitted. They do not wait for other
+        background tasks (see :meth:`submit`).
+
+        Parameters
+        ----------
+        func: callable
+            Function that is executed in the background.
+        args: list
+            Positional arguments for the function call.
+        kwargs: dict
+            Keyword arguments for the function call.
+
+        Returns
+        -------
+        concurrent.futures.Future
+        """
+        if self._prefetch is None:
+            self._prefetch = ThreadPoolExecutor(max_workers=1)
+        return self._prefetch.submit(func, *args, **kwargs)
+
+    def snapshot(self, name: str, version: Optional[int] = None) -> pd.DataFrame:
+        """Get the data frame for a dataset snapshot. Snapshots are served from
+        the snapshot cache of the engine if possible. Otherwise, the snapshot
+        is checked out from the dataset store and added to the cache. Returns
+        the compact representation of the snapshot if the engine keeps compact
+        snapshots (see :func:`openclean_notebook.compact.expand_frame` for
+        the original values).
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+        version: int, default=None
+            Identifier of the snapshot version. By default the last version of
+            the dataset is returned.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        dataset = self.dataset(name)
+        version = version if version is not None else dataset.version()
+        key = (self.identifier, name, version)
+        df = self.snapshots.get(key)
+        if df is None:
+            if self.compact:
+                # Read compact snapshots in chunks from the datastore. The
+                # snapshot with the original values is neither materialized
+                # nor kept in the cache of the datastore.
+                reader = dataset.store.open(version=version)
+                df = compact_stream(reader, chunk_size=self.chunk_size)
+            else:
+                df = dataset.checkout(version=version)
+            self.snapshots.put(key, df)
+        return df
+
+    def value_index(
+        self, name: str, column: Union[int, str], version: Optional[int] = None
+    ) -> ValueIndex:
+        """Get the inverted value index for a column in a dataset snapshot.
+        Indexes are built on first use and are served from the value index
+        cache of the engine for all following requests on the same snapshot.
+
+        Raises a ValueError if the column is unknown.
+
+        Parameters
+        ----------
+        name: string
+            Unique dataset name.
+        column: int or string
+            Index position or name of the indexed column.
+        version: int, default=None
+            Identifier of the snapshot version. By default the last version of
+            the dataset is used.
+
+        Returns
+        -------
+        openclean_notebook.index.ValueIndex
+
+        Raises
+        ------
+        ValueError
+        """
+        version = version if version is not None else self.dataset(name).version()
+        df = self.snapshot(name=name, version=version)
+        pos = column_position(df, column)
+        key = (self.identifier, name, version, pos)
+        index = self.value_indexes.get(key)
+        if index is None:
+            index = ValueIndex(df.iloc[:, pos])
+            self.value_indexes.put(key, index)
+        return index
+
+
+# -- Dataset samples ----------------------------------------------------------
+
+class NotebookSample(DataSample):
+    """Handle for a dataset sample that records the stratify column of
+    stratified samples with the arguments of the sample operation in the
+    dataset log.
+    """
+    def __init__(
+        self, df: pd.DataFrame, original: DatasetHandle, n: int,
+        random_state: Optional[Tuple[int, List]] = None,
+        stratify: Optional[Union[int, str]] = None
+    ):
+        """Initialize the reference to the data sample and the handle for the
+        original (full) dataset.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Data frame for the dataset sample.
+        original: openclean.engine.dataset.DatasetHandle
+            Reference to the original dataset for sampled datasets.
+        n: int
+            Number of rows in the sample dataset.
+        random_state: int or list, default=None
+            Seed for random number generator.
+        stratify: int or string, default=None
+            Index position or name of the column that defines the strata for
+            a stratified sample.
+        """
+        # Create a volatile archive for the dataset sample and commit the
+        # given data frame as the first snapshot (in the same way as the
+        # openclean data sample).
+        args = {'n': n, 'randomState': random_state}
+        if stratify is not None:
+            args['stratify'] = stratify
+        store = CachedDatastore(datastore=HISTOREDatastore(Archive()))
+        store.commit(df, action=SampleOp(args=args))
+        DatasetHandle.__init__(self, store=store, is_sample=True)
+        self.original = original
 
 
 # -- Engine factory -----------------------------------------------------------
 
 def DB(
     basedir: Optional[str] = None, create: Optional[bool] = False,
-    cached: Optional[bool] = True, uid: Optional[Callable] = unique_identifier
+    cached: Optional[bool] = True, uid: Optional[Callable] = unique_identifier,
+    cache_size: Optional[int] = DEFAULT_CACHE_SIZE,
+    profiler: Optional[Profiler] = None, load_once: Optional[bool] = False,
+    chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE, workers: Optional[int] = 1,
+    memo_size: Optional[int] = None,
+    page_cache_size: Optional[int] = DEFAULT_PAGE_CACHE_SIZE,
+    debug: Optional[bool] = False,
+    capture_size: Optional[int] = DEFAULT_CAPTURE_SIZE,
+    profile_cache_size: Optional[int] = DEFAULT_PROFILE_CACHE_SIZE,
+    compact: Optional[bool] = False,
+    window_cache_size: Optional[int] = DEFAULT_WINDOW_CACHE_SIZE
 ) -> OpencleanAPI:
     """Create an instance of the openclean API for notebook environments.
 
@@ -117,6 +750,79 @@ def DB(
     cached: bool, default=True
         Flag indicating whether the all datastores that are created for
         existing archives are cached datastores or not.
+    uid: callable, default=unique_identifier
+        Generator for unique engine identifier.
+    cache_size: int, default=DEFAULT_CACHE_SIZE
+        Memory budget (in bytes) for dataset snapshots that are cached by the
+        engine. Set to zero to disable the snapshot cache.
+    profiler: openclean.profiling.dataset.Profiler, default=None
+        Profiler for dataset snapshots that are displayed in the spreadsheet
+        view, e.g., a datamart profiler that is configured to only profile a
+        sample of rows for large datasets. Uses the default datamart profiler
+        if None.
+    load_once: bool, default=False
+        Include the Javascript bundle only in the output of the first
+        spreadsheet view that is displayed by the kernel. All other views
+        only contain a small bootstrap script. This keeps notebooks with many
+        spreadsheet views small. The bootstrap script requests the bundle
+        from the kernel if it is not loaded in the browser (e.g., after the
+        notebook page was reloaded).
+    chunk_size: int, default=DEFAULT_CHUNK_SIZE
+        Number of rows in each chunk when committing the operations on a
+        dataset sample to the full dataset. Bounds the memory that is used
+        by the commit.
+    workers: int, default=1
+        Number of worker processes that transform chunks in parallel when
+        committing the operations on a dataset sample. Operations are sent
+        to the workers using dill (including functions that are defined in
+        the notebook). Operations that cannot be serialized are applied in
+        the main process with a warning.
+    memo_size: int, default=None
+        Maximum number of distinct input values for which the results of
+        library functions in update operations are memoized. Update functions
+        are evaluated once per distinct value (or combination of values for
+        multiple source columns) instead of once per row. Functions with
+        side effects or random outputs should not be memoized. Memoization is
+        disabled if None.
+    page_cache_size: int, default=DEFAULT_PAGE_CACHE_SIZE
+        Memory budget (in bytes) for serialized pages of dataset views that
+        are prefetched for the spreadsheet view. Set to zero to disable
+        prefetching.
+    debug: bool, default=False
+        Run every spreadsheet API request under cProfile and tracemalloc. The
+        most recent captures are kept in the ring buffer `engine.captures`
+        and can be dumped as pstats and folded stack files (see
+        :meth:`openclean_notebook.debug.CaptureBuffer.dump`). Debugging can
+        also be enabled for individual requests (see the 'debug' flag of the
+        spreadsheet API request).
+    capture_size: int, default=DEFAULT_CAPTURE_SIZE
+        Number of request captures that are kept by the engine.
+    profile_cache_size: int, default=DEFAULT_PROFILE_CACHE_SIZE
+        Size limit (in bytes) for the persistent cache of column profiles in
+        the '.profiles' folder of the base directory. Profiles are addressed
+        by the content of the profiled column and the profiler options. They
+        are reused by all engines with the same base directory, e.g., after
+        the notebook kernel is restarted or when a file is loaded into a new
+        dataset. Set to zero to disable the cache. Ignored for engines without
+        a base directory.
+    compact: bool, default=False
+        Keep compact representations of the dataset snapshots that are checked
+        out for the spreadsheet view. String columns with few distinct values
+        are dictionary-encoded (as pandas categories) and numeric columns are
+        downcast to the smallest type that preserves all values. This reduces
+        the memory for cached snapshots of string-heavy datasets (and allows
+        more snapshots to be kept within the cache budget). Compact snapshots
+        are read from the datastore in chunks of ``chunk_size`` rows so that
+        the snapshot with the original values is never checked out. Pages and
+        column profiles are computed on the original values. Snapshots that are
+        returned by the dataset handles are not affected.
+    window_cache_size: int, default=DEFAULT_WINDOW_CACHE_SIZE
+        Memory budget (in bytes) for the rows of the dataset view windows
+        that were sent to the spreadsheet views. Delta responses compare the
+        current window with the cached window that is known to the client.
+        The known snapshot is checked out again if the window is not cached.
+        Independent of the page cache, i.e., prefetching can be disabled
+        without affecting delta responses.
 
     Returns
     -------
@@ -128,17 +834,24 @@ def DB(
     engine_id = uid(8)
     while engine_id in registry:
         engine_id = uid(8)
-    # Create the engine components and the engine instance itself.
+    # Create the engine components and the engine instance itself. Archive
+    # managers are imported here since only one of them is needed.
     if basedir is not None:
+        from histore.archive.manager.persist import PersistentArchiveManager
         histore = PersistentArchiveManager(basedir=basedir, create=create)
         metadir = os.path.join(basedir, '.metadata')
     else:
+        from histore.archive.manager.mem import VolatileArchiveManager
         histore = VolatileArchiveManager()
         metadir = None
+    # Column profiles are cached persistently in the base directory.
+    profile_cache = None
+    if basedir is not None and profile_cache_size:
+        profile_cache = ProfileCache(basedir=os.path.join(basedir, '.profiles'), capacity=profile_cache_size)
     # Create object library and register three default string functions (for
     # demonstration purposes). At some point, the set of library functions that
     # is registered by default should be read from a configuration file.
-    library = ObjectLibrary()
+    library = NotebookLibrary()
     library.eval(namespace='string')(str.lower)
     library.eval(namespace='string')(str.upper)
     library.eval(namespace='string')(str.capitalize)
@@ -148,8 +861,54 @@ def DB(
         manager=histore,
         library=library,
         basedir=metadir,
-        cached=cached
+        cached=cached,
+        cache_size=cache_size,
+        profiler=profiler,
+        load_once=load_once,
+        chunk_size=chunk_size,
+        workers=workers,
+        memo_size=memo_size,
+        page_cache_size=page_cache_size,
+        debug=debug,
+        capture_size=capture_size,
+        profile_cache=profile_cache,
+        compact=compact,
+        window_cache_size=window_cache_size
     )
     # Register the new engine instance before returning it.
     registry[engine_id] = engine
     return engine
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def column_position(df: pd.DataFrame, column: Union[int, str]) -> int:
+    """Get the index position of a column in a data frame. The column is
+    identified by its index position or by its name. If multiple columns have
+    the same name, the position of the first column is returned.
+
+    Raises a ValueError if the column is unknown.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Dataset snapshot.
+    column: int or string
+        Index position or name of the column.
+
+    Returns
+    -------
+    int
+
+    Raises
+    ------
+    ValueError
+    """
+    columns = list(df.columns)
+    if isinstance(column, int):
+        if column < 0 or column >= len(columns):
+            raise ValueError("invalid column index '{}'".format(column))
+        return column
+    elif column in columns:
+        return columns.index(column)
+    raise ValueError("unknown column '{}'".format(column))
@@ -0,0 +1,246 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Inverted value index for data frame columns. The index maps each distinct
+value in a column to the positions of the rows that contain the value. Value
+predicates (e.g., for filtering and searching in the spreadsheet view) are
+evaluated on the distinct column values only. The matching values are then
+mapped to row positions using the index.
+"""
+
+from typing import Any, Optional
+
+import numbers
+import numpy as np
+import pandas as pd
+import re
+
+
+"""Identifier for supported predicate operators."""
+OP_CONTAINS = 'contains'
+OP_EQ = 'eq'
+OP_NULL = 'null'
+OP_PREFIX = 'prefix'
+OP_RANGE = 'range'
+OP_REGEX = 'regex'
+
+PREDICATE_OPS = [OP_CONTAINS, OP_EQ, OP_NULL, OP_PREFIX, OP_RANGE, OP_REGEX]
+
+
+"""Maximum number of matching distinct values for which row positions are
+collected from the inverted lists. If more values match a predicate, the row
+positions are computed from a mask over all rows instead.
+"""
+MAX_LOOKUPS = 64
+
+
+class ValueIndex(object):
+    """Index that maps the distinct values in a data frame column to the
+    positions of the rows that contain them. Missing values are indexed under
+    a separate key.
+
+    The distinct values are assigned codes 1 to n (in order of their first
+    occurrence). Code 0 is used for missing values. The index maintains the
+    code for each row and the list of row positions that is sorted by code.
+    The positions for the rows with code c are in the slice
+    `order[offsets[c]:offsets[c + 1]]`.
+    """
+    def __init__(self, values: pd.Series):
+        """Build the index for the given column values.
+
+        Parameters
+        ----------
+        values: pd.Series
+            Column values.
+        """
+        # Columns in dataset snapshots often have the generic object type.
+        # Infer the actual type to allow vectorized comparisons for numeric
+        # columns.
+        codes, uniques = pd.factorize(values.reset_index(drop=True).infer_objects())
+        self.values = uniques
+        self.codes = (codes + 1).astype(np.int64)
+        self.order = np.argsort(self.codes, kind='stable')
+        self.offsets = np.zeros(len(uniques) + 2, dtype=np.int64)
+        np.cumsum(np.bincount(self.codes, minlength=len(uniques) + 1), out=self.offsets[1:])
+        # String representations of the distinct values are created on first
+        # use by string predicates.
+        self._strings = None
+
+    def __len__(self) -> int:
+        """Get the number of rows in the indexed column.
+
+        Returns
+        -------
+        int
+        """
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Get the (approximate) memory usage of the index in bytes.
+
+        Returns
+        -------
+        int
+        """
+        size = self.codes.nbytes + self.order.nbytes + self.offsets.nbytes
+        return size + int(self.values.memory_usage(deep=True))
+
+    def positions(self, matches: np.ndarray) -> np.ndarray:
+        """Get the sorted positions of all rows that contain one of the
+        matching values.
+
+        Parameters
+        ----------
+        matches: np.ndarray
+            Boolean array with one element per distinct value (in code order).
+            The first element is for missing values.
+
+        Returns
+        -------
+        np.ndarray
+        """
+        keys = np.flatnonzero(matches)
+        if len(keys) > MAX_LOOKUPS:
+            return np.flatnonzero(matches[self.codes])
+        if len(keys) == 0:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.concatenate([self.order[self.offsets[k]:self.offsets[k + 1]] for k in keys])
+        return np.sort(rows)
+
+    def select(
+        self, op: str, value: Optional[Any] = None, low: Optional[Any] = None,
+        high: Optional[Any] = None
+    ) -> np.ndarray:
+        """Get the sorted positions of all rows whose value satisfies the
+        given predicate. The supported operators are:
+
+        - contains: the string representation of the value contains the
+                    given string.
+        - eq:       the value is equal to the given value.
+        - null:     the value is missing.
+        - prefix:   the string representation of the value starts with the
+                    given string.
+        - range:    the value is within the (inclusive) low and high bounds.
+                    Either bound may be None. Values that cannot be compared
+                    to the bounds are not in the range.
+        - regex:    the string representation of the value contains a match
+                    for the given regular expression.
+
+        Missing values only satisfy the null predicate. Raises a ValueError
+        for unknown operators and invalid regular expressions.
+
+        Parameters
+        ----------
+        op: string
+            Predicate operator.
+        value: any, default=None
+            Comparison value for all operators except null and range.
+        low: any, default=None
+            Lower bound for the range operator.
+        high: any, default=None
+            Upper bound for the range operator.
+
+        Returns
+        -------
+        np.ndarray
+
+        Raises
+        ------
+        ValueError
+        """
+        matches = np.zeros(len(self.values) + 1, dtype=bool)
+        if op == OP_NULL:
+            matches[0] = True
+        elif op == OP_EQ:
+            pos = self.values.get_indexer([value])[0]
+            if pos >= 0:
+                matches[pos + 1] = True
+        elif op == OP_CONTAINS:
+            matches[1:] = self.strings().str.contains(str(value), regex=False).to_numpy(dtype=bool)
+        elif op == OP_PREFIX:
+            matches[1:] = self.strings().str.startswith(str(value)).to_numpy(dtype=bool)
+        elif op == OP_REGEX:
+            try:
+                pattern = re.compile(str(value))
+            except re.error as ex:
+                raise ValueError("invalid regular expression '{}': {}".format(value, ex))
+            matches[1:] = self.strings().str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        elif op == OP_RANGE:
+            matches[1:] = in_range(self.values, low=low, high=high)
+        else:
+            raise ValueError("unknown predicate operator '{}'".format(op))
+        return self.positions(matches)
+
+    def strings(self) -> pd.Series:
+        """Get the string representations of the distinct values.
+
+        Returns
+        -------
+        pd.Series
+        """
+        if self._strings is None:
+            self._strings = pd.Series(self.values.map(str), dtype=object)
+        return self._strings
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def in_range(values: pd.Index, low: Optional[Any], high: Optional[Any]) -> np.ndarray:
+    """Get a boolean array indicating for each value whether it is within the
+    given (inclusive) bounds. Bounds that are None are ignored.
+
+    Parameters
+    ----------
+    values: pd.Index
+        Distinct column values.
+    low: any
+        Lower bound.
+    high: any
+        Upper bound.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    bounds = [b for b in [low, high] if b is not None]
+    if values.dtype.kind in 'iuf' and all(isnumber(b) for b in bounds):
+        # Vectorized comparison for numeric columns.
+        arr = values.to_numpy()
+        matches = np.ones(len(arr), dtype=bool)
+        if low is not None:
+            matches &= arr >= low
+        if high is not None:
+            matches &= arr <= high
+        return matches
+
+    def check(v: Any) -> bool:
+        # Values that cannot be compared to a bound are not in the range.
+        # Numbers are only compared to numbers.
+        if any(isnumber(b) != isnumber(v) for b in bounds):
+            return False
+        try:
+            return (low is None or v >= low) and (high is None or v <= high)
+        except TypeError:
+            return False
+
+    return np.fromiter((check(v) for v in values), dtype=bool, count=len(values))
+
+
+def isnumber(value: Any) -> bool:
+    """Test if a given value is a number (but not a boolean).
+
+    Parameters
+    ----------
+    value: any
+        Scalar value.
+
+    Returns
+    -------
+    bool
+    """
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
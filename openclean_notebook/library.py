@@ -0,0 +1,551 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Object library with support for vectorized functions.
+
+Functions in the openclean object library are evaluated once for each row
+when they are used by update and insert operations. Vectorized functions
+receive a pandas Series for each input column instead and return a Series
+(or a tuple of Series if the function has multiple outputs). Insert and update
+operations on vectorized functions are evaluated with a single function call
+for all rows.
+
+Vectorized functions can still be called with scalar values, e.g., by the
+row-wise evaluation functions in openclean when operations on a dataset
+sample are applied to the full dataset outside of the notebook engine.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import dill
+import numpy as np
+import pandas as pd
+
+from flowserv.model.parameter.factory import ParameterDeserializer
+from openclean.data.stream.base import StreamFunction
+from openclean.data.types import Columns, DatasetSchema
+from openclean.engine.action import InsertOp, OpHandle, UpdateOp
+from openclean.engine.dataset import DatasetHandle
+from openclean.engine.library import ObjectLibrary, default_store
+from openclean.engine.object.base import ObjectHandle
+from openclean.engine.object.function import DEFAULT_ENCODING, FunctionFactory, FunctionHandle, Parameter
+from openclean.engine.store.base import ObjectStore
+from openclean.function.eval.base import Eval, EvalFunction, to_column_eval
+from openclean.operator.transform.insert import inscol
+from openclean.operator.transform.update import update
+
+
+"""Encoding for the string serialization of library functions. Maps every
+byte of the dill serialization to a character.
+"""
+FUNCTION_ENCODING = 'latin-1'
+
+
+class VectorizedFunctionHandle(FunctionHandle):
+    """Handle for library functions that operate on pandas Series."""
+    vectorized = True
+
+    def __call__(self, *args, **kwargs):
+        """Call the registered function. If the function is called with scalar
+        column values they are wrapped in Series of length one and the scalar
+        result is returned.
+        """
+        values = args[:self.columns]
+        if any(isinstance(v, pd.Series) for v in values):
+            return self.func(*args, **kwargs)
+        series = [pd.Series([v]) for v in values]
+        result = self.func(*series, *args[self.columns:], **kwargs)
+        if isinstance(result, tuple):
+            return tuple(r.iloc[0] for r in result)
+        return result.iloc[0]
+
+
+class VectorizedEval(EvalFunction):
+    """Evaluation function that calls a vectorized function once with the
+    Series of values for each input column.
+    """
+    def __init__(self, columns: Columns, func: VectorizedFunctionHandle, args: Optional[Dict] = None):
+        """Initialize the input columns and the vectorized function.
+
+        Parameters
+        ----------
+        columns: int, string, or list(int or string)
+            Input column(s) for the function.
+        func: openclean_notebook.library.VectorizedFunctionHandle
+            Vectorized library function.
+        args: dict, default=None
+            Additional keyword arguments for the function.
+        """
+        self.columns = columns if isinstance(columns, (list, tuple)) else [columns]
+        self.producers = [to_column_eval(c) for c in self.columns]
+        self.func = func
+        self.args = args if args is not None else dict()
+
+    def eval(self, df: pd.DataFrame) -> List:
+        """Evaluate the function on the input columns of the data frame.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Pandas data frame.
+
+        Returns
+        -------
+        list
+        """
+        return self.apply([f.eval(df) for f in self.producers])
+
+    def apply(self, values: List[pd.Series]) -> List:
+        """Call the function with the given input values.
+
+        Parameters
+        ----------
+        values: list of pd.Series
+            Input values (one Series per input column).
+
+        Returns
+        -------
+        list
+        """
+        result = self.func(*values, **self.args)
+        if isinstance(result, tuple):
+            # Multiple outputs are returned as a list of tuples (one per row).
+            return list(zip(*[list(r) for r in result]))
+        return list(result)
+
+    def prepare(self, columns: DatasetSchema) -> StreamFunction:
+        """Data streams are processed row by row. The function is called with
+        the scalar values from each row.
+
+        Parameters
+        ----------
+        columns: list of string
+            Column names in the data stream schema.
+
+        Returns
+        -------
+        openclean.function.eval.base.StreamFunction
+        """
+        inputs = self.columns if len(self.columns) > 1 else self.columns[0]
+        return Eval(columns=inputs, func=self.func, args=self.args or None).prepare(columns)
+
+
+class MemoizedEval(EvalFunction):
+    """Evaluation function that calls a function only once for each distinct
+    input value (or each distinct combination of values if there are multiple
+    input columns). The results are mapped back to the rows using the codes
+    of the factorized input values.
+
+    Values that compare as equal (e.g., 1 and 1.0) are the same input. Missing
+    values are grouped by their type (e.g., None or NaN). If the number of
+    distinct inputs exceeds the given maximum, or if the input values are not
+    hashable, the function is evaluated for each row instead.
+    """
+    def __init__(
+        self, columns: Columns, func: FunctionHandle, args: Optional[Dict] = None,
+        max_size: Optional[int] = None
+    ):
+        """Initialize the input columns, the evaluated function, and the
+        maximum number of memoized results.
+
+        Parameters
+        ----------
+        columns: int, string, or list(int or string)
+            Input column(s) for the function.
+        func: openclean.engine.object.function.FunctionHandle
+            Library function.
+        args: dict, default=None
+            Additional keyword arguments for the function.
+        max_size: int, default=None
+            Maximum number of distinct inputs for which the function results
+            are memoized. There is no limit if None.
+        """
+        self.columns = columns if isinstance(columns, (list, tuple)) else [columns]
+        self.producers = [to_column_eval(c) for c in self.columns]
+        self.func = func
+        self.args = args if args is not None else dict()
+        self.max_size = max_size
+
+    def eval(self, df: pd.DataFrame) -> List:
+        """Evaluate the function on the distinct input values in the data
+        frame.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Pandas data frame.
+
+        Returns
+        -------
+        list
+        """
+        data = [f.eval(df) for f in self.producers]
+        keys = factorize(data)
+        if keys is None or (self.max_size is not None and len(keys[1][0]) > self.max_size):
+            return self.call(data)
+        codes, uniques = keys
+        results = self.call([pd.Series(u, dtype=v.dtype) for u, v in zip(uniques, data)])
+        values = np.empty(len(results), dtype=object)
+        for i, value in enumerate(results):
+            values[i] = value
+        return list(values[codes])
+
+    def call(self, values: List[pd.Series]) -> List:
+        """Evaluate the function on the given input values. Functions that are
+        not vectorized are called for each input row.
+
+        Parameters
+        ----------
+        values: list of pd.Series
+            Input values (one Series per input column).
+
+        Returns
+        -------
+        list
+        """
+        if is_vectorized(self.func):
+            return VectorizedEval(columns=self.columns, func=self.func, args=self.args).apply(values)
+        return [self.func(*v, **self.args) for v in zip(*values)]
+
+    def prepare(self, columns: DatasetSchema) -> StreamFunction:
+        """Data streams are processed row by row without memoization.
+
+        Parameters
+        ----------
+        columns: list of string
+            Column names in the data stream schema.
+
+        Returns
+        -------
+        openclean.function.eval.base.StreamFunction
+        """
+        inputs = self.columns if len(self.columns) > 1 else self.columns[0]
+        return Eval(columns=inputs, func=self.func, args=self.args or None).prepare(columns)
+
+
+class NotebookFunctionFactory(FunctionFactory):
+    """Factory for function objects that maintains the vectorized flag in the
+    function descriptor.
+
+    Functions are serialized using dill. The openclean function factory
+    converts the result into a cp1252 string. The serialization of functions
+    that are defined in a notebook (i.e., in the __main__ module) contains the
+    function byte code, which is not always valid cp1252 (e.g., in Python
+    3.11). The notebook factory uses an encoding that maps every byte instead
+    and records the encoding in the function descriptor. Functions that were
+    serialized without the encoding element are read as cp1252.
+    """
+    def deserialize(self, descriptor: Dict, data: str) -> ObjectHandle:
+        """Convert an object serialization into a function handle.
+
+        Parameters
+        ----------
+        descriptor: dict
+            Dictionary serialization for the object descriptor.
+        data: string
+            Serialization for the function declaration.
+
+        Returns
+        -------
+        openclean.engine.object.function.FunctionHandle
+        """
+        encoding = descriptor.get('encoding', DEFAULT_ENCODING)
+        cls = VectorizedFunctionHandle if descriptor.get('vectorized', False) else FunctionHandle
+        return cls(
+            func=dill.loads(data.encode(encoding=encoding)),
+            name=descriptor['name'],
+            namespace=descriptor['namespace'],
+            label=descriptor.get('label'),
+            description=descriptor.get('description'),
+            columns=descriptor['columns'],
+            collabels=descriptor['columnLabels'],
+            outputs=descriptor['outputs'],
+            parameters=[ParameterDeserializer.from_dict(obj) for obj in descriptor['parameters']]
+        )
+
+    def serialize(self, object: ObjectHandle) -> Tuple[Dict, str]:
+        """Serialize the given function handle.
+
+        Parameters
+        ----------
+        object: openclean.engine.object.function.FunctionHandle
+            Object of type that is supported by the serializer.
+
+        Returns
+        -------
+        tuple of dict and string
+        """
+        descriptor = object.to_dict()
+        descriptor['columns'] = object.columns
+        descriptor['columnLabels'] = object.collabels
+        descriptor['outputs'] = object.outputs
+        descriptor['parameters'] = [p.to_dict() for p in object.parameters]
+        descriptor['vectorized'] = is_vectorized(object)
+        descriptor['encoding'] = FUNCTION_ENCODING
+        data = dill.dumps(object.func).decode(encoding=FUNCTION_ENCODING)
+        return descriptor, data
+
+
+class NotebookLibrary(ObjectLibrary):
+    """Object library for notebook engines. Extends the openclean object
+    library with the option to register vectorized functions.
+    """
+    def __init__(
+        self, functions: Optional[ObjectStore] = None,
+        lookups: Optional[ObjectStore] = None,
+        vocabularies: Optional[ObjectStore] = None
+    ):
+        """Initialize the object stores. Uses a volatile store with support
+        for vectorized functions if no store for functions is given.
+
+        Parameters
+        ----------
+        functions: openclean.engine.store.base.ObjectStore, default=None
+            Object store for user-defined functions.
+        lookups: openclean.engine.store.base.ObjectStore, default=None
+            Object store for lookup tables.
+        vocabularies: openclean.engine.store.base.ObjectStore, default=None
+            Object store for controlled vocabularies.
+        """
+        super(NotebookLibrary, self).__init__(
+            functions=functions if functions is not None else default_store(NotebookFunctionFactory()),
+            lookups=lookups,
+            vocabularies=vocabularies
+        )
+
+    def eval(
+        self, name: Optional[str] = None, namespace: Optional[str] = None,
+        label: Optional[str] = None, description: Optional[str] = None,
+        columns: Optional[int] = None, collabels: Optional[Union[str, List[str]]] = None,
+        outputs: Optional[int] = None, parameters: Optional[List[Parameter]] = None,
+        vectorized: Optional[bool] = False
+    ) -> Callable:
+        """Decorator that adds a new function to the registered set of data
+        frame transformers.
+
+        Parameters
+        ----------
+        name: string, default=None
+            Name of the registered function.
+        namespace: string, default=None
+            Name of the namespace that this function belongs to.
+        label: string, default=None
+            Optional human-readable name for display purposes.
+        description: str, default=None
+            Descriptive text for the function.
+        columns: int, default=None
+            Number of input columns that the registered function operates on.
+        collabels: string or list of string, default=None
+            Display labels for the input columns.
+        outputs: int, default=None
+            Number of output values that the registered function returns.
+        parameters: list of openclean.engine.object.function.Parameter,
+                default=None
+            List of declarations for additional input parameters.
+        vectorized: bool, default=False
+            The registered function receives a pandas Series for each input
+            column and returns a Series (or a tuple of Series for multiple
+            outputs) if True.
+
+        Returns
+        -------
+        openclean.engine.object.function.FunctionHandle
+        """
+        if not vectorized:
+            return super(NotebookLibrary, self).eval(
+                name=name,
+                namespace=namespace,
+                label=label,
+                description=description,
+                columns=columns,
+                collabels=collabels,
+                outputs=outputs,
+                parameters=parameters
+            )
+
+        def register_eval(func: Callable) -> Callable:
+            """Decorator that registers the given function as a vectorized
+            function in the associated object registry.
+            """
+            handle = VectorizedFunctionHandle(
+                func=func,
+                namespace=namespace,
+                name=name,
+                label=label,
+                description=description,
+                columns=columns,
+                collabels=collabels,
+                outputs=outputs,
+                parameters=parameters
+            )
+            self._functions.insert_object(object=handle)
+            return handle
+        return register_eval
+
+
+# -- Operations on datasets ---------------------------------------------------
+
+def factorize(data: List[pd.Series]) -> Optional[Tuple[np.ndarray, List[List]]]:
+    """Encode the rows of one or more columns as codes for the distinct
+    combinations of values. Returns the code for each row and the values
+    for each distinct combination (one list per column). Returns None if the
+    values cannot be factorized (e.g., because they are not hashable).
+
+    Parameters
+    ----------
+    data: list of pd.Series
+        Column values.
+
+    Returns
+    -------
+    tuple of np.ndarray and list of list
+    """
+    codes, uniques = list(), list()
+    for values in data:
+        try:
+            colcodes, colvalues = pd.factorize(values.to_numpy())
+        except TypeError:
+            return None
+        colvalues = list(colvalues)
+        # Group missing values by their type. The code for missing values is
+        # -1 after factorization.
+        missing = np.flatnonzero(colcodes < 0)
+        if len(missing) > 0:
+            nulls = values.iloc[missing]
+            nullcodes, nulltypes = pd.factorize(nulls.map(type))
+            colcodes[missing] = nullcodes + len(colvalues)
+            # Use the first missing value of each type as the function input.
+            first = np.unique(nullcodes, return_index=True)[1]
+            colvalues.extend(nulls.iloc[first])
+        codes.append(colcodes)
+        uniques.append(colvalues)
+    if len(codes) == 1:
+        return codes[0], uniques
+    # Get the distinct combinations of value codes over all columns.
+    keys, inverse = np.unique(np.stack(codes, axis=1), axis=0, return_inverse=True)
+    return inverse.reshape(-1), [[u[k] for k in keys[:, i]] for i, u in enumerate(uniques)]
+
+
+def insert_column(
+    dataset: DatasetHandle, names: Union[str, List[str]], pos: Optional[int] = None,
+    values: Optional[Union[Callable, FunctionHandle]] = None,
+    args: Optional[Dict] = None, sources: Optional[Columns] = None
+) -> pd.DataFrame:
+    """Insert one or more columns into a dataset. Evaluates vectorized value
+    generators with a single function call. All other operations are handled
+    by the dataset itself.
+
+    Parameters
+    ----------
+    dataset: openclean.engine.dataset.DatasetHandle
+        Handle for the modified dataset.
+    names: string, or list(string)
+        Names of the inserted columns.
+    pos: int, default=None
+        Insert position for the new columns.
+    values: scalar or openclean.engine.object.func.FunctionHandle, default=None
+        Single value, tuple of values, or library function that is used to
+        generate the values for the inserted column(s).
+    args: dict, default=None
+        Additional keyword arguments for the library function.
+    sources: int, string, or list(int or string), default=None
+        List of source columns for the function input values.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if not is_vectorized(values) or sources is None:
+        return dataset.insert(names=names, pos=pos, values=values, args=args, sources=sources)
+    df = dataset.checkout()
+    action = InsertOp(schema=list(df.columns), names=names, pos=pos, values=values, args=args, sources=sources)
+    df = inscol(df=df, names=names, pos=pos, values=to_eval(action))
+    return dataset.commit(source=df, action=action)
+
+
+def is_vectorized(func: Callable) -> bool:
+    """Test if the given object is a vectorized library function.
+
+    Parameters
+    ----------
+    func: callable
+        Library function, callable, or scalar value.
+
+    Returns
+    -------
+    bool
+    """
+    return getattr(func, 'vectorized', False) is True
+
+
+def to_eval(action: OpHandle, memo_size: Optional[int] = None) -> EvalFunction:
+    """Get the evaluation function for an insert or update operation. Returns
+    a vectorized evaluation function for operations on vectorized library
+    functions with known input columns. If a memoization size is given, the
+    library functions of update operations are evaluated only once for each
+    distinct input.
+
+    Parameters
+    ----------
+    action: openclean.engine.action.OpHandle
+        Insert or update operation.
+    memo_size: int, default=None
+        Maximum number of distinct inputs for which results of update
+        functions are memoized. Memoization is disabled if None.
+
+    Returns
+    -------
+    openclean.function.eval.base.EvalFunction
+    """
+    if memo_size is not None and action.is_update and isinstance(action.func, FunctionHandle):
+        columns = action.sources if action.sources is not None else action.columns
+        return MemoizedEval(columns=columns, func=action.func, args=action.args, max_size=memo_size)
+    if is_vectorized(action.func):
+        columns = action.sources
+        if columns is None and action.is_update:
+            columns = action.columns
+        if columns is not None:
+            return VectorizedEval(columns=columns, func=action.func, args=action.args)
+    return action.to_eval()
+
+
+def update_columns(
+    dataset: DatasetHandle, columns: Columns, func: FunctionHandle,
+    args: Optional[Dict] = None, sources: Optional[Columns] = None,
+    memo_size: Optional[int] = None
+) -> pd.DataFrame:
+    """Update one or more columns in a dataset. Evaluates vectorized update
+    functions with a single function call and memoizes the results of
+    library functions for distinct inputs if a memoization size is given.
+    All other operations are handled by the dataset itself.
+
+    Parameters
+    ----------
+    dataset: openclean.engine.dataset.DatasetHandle
+        Handle for the modified dataset.
+    columns: int, string, or list(int or string)
+        Single column or list of column index positions or column names.
+    func: openclean.engine.object.func.FunctionHandle
+        Library function that is used to generate the modified values.
+    args: dict, default=None
+        Additional keyword arguments for the library function.
+    sources: int, string, or list(int or string), default=None
+        List of source columns for the function input values.
+    memo_size: int, default=None
+        Maximum number of distinct inputs for which the function results are
+        memoized. Memoization is disabled if None.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if not is_vectorized(func) and (memo_size is None or not isinstance(func, FunctionHandle)):
+        return dataset.update(columns=columns, func=func, args=args, sources=sources)
+    df = dataset.checkout()
+    action = UpdateOp(schema=list(df.columns), columns=columns, func=func, args=args, sources=sources)
+    df = update(df=df, columns=columns, func=to_eval(action, memo_size=memo_size))
+    return dataset.commit(source=df, action=action)
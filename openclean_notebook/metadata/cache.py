@@ -0,0 +1,221 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Persistent cache for column profiles. Profiles are addressed by the content
+key of the profiled column (see
+:func:`openclean_notebook.metadata.datamart.column_key`) and a fingerprint of
+the profiler (see :func:`profiler_key`). The cache is maintained in a
+directory on disk and can therefore be shared by engines in different
+sessions (e.g., after a notebook kernel is restarted) and by different
+datasets with columns of identical content.
+
+Each entry is stored as a separate Json file. The total size of all files is
+bounded. If the size exceeds the given capacity, the least recently used
+entries are removed. Recency is approximated by the modification time of the
+entry files, which is updated on each cache hit.
+"""
+
+from typing import Dict, Optional
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+from openclean.profiling.dataset import Profiler
+from openclean_notebook.cache import CacheStats
+from openclean_notebook.version import __version__
+
+
+"""Default size limit (in bytes) for the files in a profile cache."""
+DEFAULT_PROFILE_CACHE_SIZE = 256 * 1024 * 1024
+
+
+class ProfileCache(object):
+    """Content-addressed cache for column profiles on disk. Entries contain
+    the number of profiled rows ('nbProfiledRows') and the profiler result for
+    the column ('profile').
+
+    The cache is thread-safe. Concurrent writes from different processes are
+    safe since entry files are replaced atomically. The size of the cache is
+    only tracked for entries that are written by the same cache object, i.e.,
+    the total size may temporarily exceed the capacity if multiple processes
+    write to the same directory.
+    """
+    def __init__(self, basedir: str, capacity: Optional[int] = DEFAULT_PROFILE_CACHE_SIZE):
+        """Initialize the cache directory and the size limit. The directory is
+        created if it does not exist.
+
+        Parameters
+        ----------
+        basedir: string
+            Path to the cache directory.
+        capacity: int, default=DEFAULT_PROFILE_CACHE_SIZE
+            Maximum size (in bytes) of all entry files.
+        """
+        self.basedir = basedir
+        self.capacity = capacity
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(basedir, exist_ok=True)
+        # Get the total size of the entries that were written in previous
+        # sessions.
+        self.size = sum(os.path.getsize(f) for f in self._files())
+
+    def get(self, key: str, profiler: str) -> Optional[Dict]:
+        """Get the cached entry for a column with the given content key that
+        was profiled by the profiler with the given fingerprint. Returns None
+        if no such entry exists.
+
+        Parameters
+        ----------
+        key: string
+            Content key for the profiled column.
+        profiler: string
+            Profiler fingerprint (see :func:`profiler_key`).
+
+        Returns
+        -------
+        dict
+        """
+        filename = self._filename(key, profiler)
+        try:
+            with open(filename, 'r') as f:
+                entry = json.load(f)
+            # Mark the entry as recently used.
+            os.utime(filename)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        with self._lock:
+            self.stats.hits += 1
+        return entry
+
+    def put(self, key: str, profiler: str, entry: Dict):
+        """Add the entry for a column with the given content key that was
+        profiled by the profiler with the given fingerprint to the cache. The
+        least recently used entries are removed if the total size of the cache
+        exceeds the capacity after adding the entry.
+
+        Parameters
+        ----------
+        key: string
+            Content key for the profiled column.
+        profiler: string
+            Profiler fingerprint (see :func:`profiler_key`).
+        entry: dict
+            Number of profiled rows and profiler result for the column.
+        """
+        data = json.dumps(entry, default=str).encode('utf-8')
+        if len(data) > self.capacity:
+            return
+        filename = self._filename(key, profiler)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Write to a temporary file first to ensure that readers never see
+        # partially written entries.
+        tmpfile = '{}.{}.tmp'.format(filename, uuid.uuid4().hex)
+        with open(tmpfile, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            prev = os.path.getsize(filename) if os.path.isfile(filename) else 0
+            os.replace(tmpfile, filename)
+            self.size += len(data) - prev
+            if self.size > self.capacity:
+                self._evict()
+
+    def _evict(self):
+        """Remove the least recently used entries until the total size of the
+        cache is within the capacity. Expects that the caller holds the lock.
+        """
+        files = list()
+        for filename in self._files():
+            try:
+                stat = os.stat(filename)
+            except OSError:  # pragma: no cover
+                continue
+            files.append((stat.st_mtime, stat.st_size, filename))
+        self.size = sum(size for _, size, _ in files)
+        for _, size, filename in sorted(files):
+            if self.size <= self.capacity:
+                break
+            try:
+                os.remove(filename)
+            except OSError:  # pragma: no cover
+                continue
+            self.size -= size
+            self.stats.evictions += 1
+
+    def _filename(self, key: str, profiler: str) -> str:
+        """Get the path to the file for the cache entry with the given column
+        key and profiler fingerprint. Files are distributed over subfolders to
+        keep the number of files per folder small.
+
+        Parameters
+        ----------
+        key: string
+            Content key for the profiled column.
+        profiler: string
+            Profiler fingerprint.
+
+        Returns
+        -------
+        string
+        """
+        h = hashlib.blake2b('{}:{}'.format(key, profiler).encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.basedir, h[:2], '{}.json'.format(h))
+
+    def _files(self):
+        """Iterate over the paths of all entry files in the cache directory."""
+        for folder in os.scandir(self.basedir):
+            if folder.is_dir():
+                for entry in os.scandir(folder.path):
+                    if entry.name.endswith('.json'):
+                        yield entry.path
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def profiler_key(profiler: Profiler) -> str:
+    """Get a fingerprint for a profiler. The fingerprint contains the profiler
+    class, the versions of this package and of the datamart profiler, and
+    the profiler options that determine the profiling results. Profilers
+    define these options in a `cache_options()` method (e.g., the sampling
+    options of the datamart profiler but not the number of workers of the
+    parallel profiler). For other profilers, all public attributes with
+    scalar values are used. Profiles are only shared between profilers with
+    identical fingerprints.
+
+    Parameters
+    ----------
+    profiler: openclean.profiling.dataset.Profiler
+        Profiler for dataset columns.
+
+    Returns
+    -------
+    string
+    """
+    try:
+        import datamart_profiler
+        dmp_version = getattr(datamart_profiler, '__version__', None)
+    except ImportError:  # pragma: no cover
+        dmp_version = None
+    if hasattr(profiler, 'cache_options'):
+        options = profiler.cache_options()
+    else:
+        options = {
+            k: v for k, v in vars(profiler).items()
+            if not k.startswith('_') and isinstance(v, (bool, float, int, str, type(None)))
+        }
+    doc = {
+        'class': '{}.{}'.format(type(profiler).__module__, type(profiler).__qualname__),
+        'version': __version__,
+        'datamart': dmp_version,
+        'options': options
+    }
+    return hashlib.blake2b(json.dumps(doc, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
@@ -6,18 +6,83 @@
 # full license details.
 
 
-from typing import Dict, Optional
+from collections import Counter
+from typing import Dict, List, Optional, Union
 
-import datamart_profiler as dmp
+import hashlib
 import pandas as pd
 
+
 from openclean.data.types import Columns
 from openclean.operator.transform.select import select
 from openclean.profiling.dataset import Profiler
+from openclean_notebook.sampling import (
+    sample_rows, SAMPLE_STRATIFIED, SAMPLE_UNIFORM, SAMPLING_METHODS
+)
 
 
 class DatamartProfiler(Profiler):
-    """Profiler interface implementation for the datamart profiler."""
+    """Profiler interface implementation for the datamart profiler.
+
+    The profiler can be configured to only profile a random sample of the
+    rows in a dataset. The number of rows in the dataset and the number of
+    profiled rows are reported in the 'nb_rows' and 'nb_profiled_rows'
+    elements of the profiling result. Results that were computed for a sample
+    have the 'approximate' flag set to True.
+    """
+    def __init__(
+        self, max_rows: Optional[int] = None,
+        sampling: Optional[str] = SAMPLE_UNIFORM,
+        stratify: Optional[Union[int, str]] = None,
+        random_state: Optional[int] = None
+    ):
+        """Initialize the sampling options.
+
+        Parameters
+        ----------
+        max_rows: int, default=None
+            Maximum number of rows that are profiled. Datasets with more rows
+            are sampled. Profile all rows if None.
+        sampling: string, default='uniform'
+            Sampling strategy. One of 'reservoir', 'stratified', or 'uniform'.
+        stratify: int or string, default=None
+            Index position or name of the column that defines the strata for
+            stratified sampling.
+        random_state: int, default=None
+            Seed for the random number generator.
+
+        Raises
+        ------
+        ValueError
+        """
+        if max_rows is not None and max_rows < 1:
+            raise ValueError('invalid maximum number of rows {}'.format(max_rows))
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError("unknown sampling method '{}'".format(sampling))
+        if sampling == SAMPLE_STRATIFIED and stratify is None:
+            raise ValueError('missing column for stratified sampling')
+        self.max_rows = max_rows
+        self.sampling = sampling
+        self.stratify = stratify
+        self.random_state = random_state
+
+    def cache_options(self) -> Dict:
+        """Get the profiler options that determine the profiling results.
+        The options are part of the profiler fingerprint for cached column
+        profiles (see :func:`openclean_notebook.metadata.cache.profiler_key`).
+        Options that only affect how the profiler is executed are excluded.
+
+        Returns
+        -------
+        dict
+        """
+        return {
+            'max_rows': self.max_rows,
+            'sampling': self.sampling,
+            'stratify': self.stratify,
+            'random_state': self.random_state
+        }
+
     def profile(self, df: pd.DataFrame, columns: Optional[Columns] = None) -> Dict:
         """Run profiler on a given data frame. Ensure to create a new data frame
         first that has the row index reset.
@@ -35,9 +100,128 @@ class DatamartProfiler(Profiler):
         -------
         dict
         """
+        nb_rows = df.shape[0]
+        # Sample the dataset before filtering columns since the column that
+        # is used for stratified sampling may not be profiled.
+        if self.max_rows is not None:
+            df = sample_rows(
+                df=df,
+                n=self.max_rows,
+                method=self.sampling,
+                stratify=self.stratify,
+                random_state=self.random_state
+            )
         # Filter columns if list of columns is given. Otherwise project on all
         # columns in the schema to get a new data frame where we can securely
         # reset the row index.
         columns = list(range(len(df.columns))) if columns is None else columns
         df = select(df=df, columns=columns).reset_index(drop=True)
+        profiles = self.process(df)
+        profiles['nb_rows'] = nb_rows
+        profiles['nb_profiled_rows'] = df.shape[0]
+        profiles['approximate'] = df.shape[0] < nb_rows
+        return profiles
+
+    def process(self, df: pd.DataFrame) -> Dict:
+        """Run the datamart profiler on all columns of the given data frame.
+        The data frame is expected to have a reset row index.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Input data frame.
+
+        Returns
+        -------
+        dict
+        """
+        # Import the datamart profiler here since importing it is expensive
+        # and the profiler is not needed by all users of the package.
+        import datamart_profiler as dmp
         return dmp.process_dataset(df, include_sample=False, plots=True)
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def column_key(values: pd.Series) -> str:
+    """Get a fingerprint for the content of a data frame column. The key is
+    computed from the hashed cell values (ignoring the row index). Columns that
+    have identical keys are expected to have identical profiling results.
+
+    Parameters
+    ----------
+    values: pd.Series
+        Cell values for a data frame column.
+
+    Returns
+    -------
+    string
+    """
+    try:
+        hashes = pd.util.hash_pandas_object(values, index=False)
+    except TypeError:
+        # Fallback for columns that contain unhashable values (e.g., lists).
+        hashes = pd.util.hash_pandas_object(values.astype(str), index=False)
+    h = hashlib.blake2b(hashes.to_numpy().tobytes(), digest_size=16)
+    h.update(str(len(values)).encode('utf-8'))
+    return h.hexdigest()
+
+
+def dataset_types(columns: List[Dict]) -> Dict:
+    """Get the overall dataset types (numerical, categorical, spatial, or
+    temporal) and the number of columns for each of them from a list of column
+    profiles. Uses the same rules as the datamart profiler for full datasets.
+    The result contains the 'types' element and a 'nb_{type}_columns' counter
+    for each type that occurs in the given profiles.
+
+    Parameters
+    ----------
+    columns: list of dict
+        List of column profiling results.
+
+    Returns
+    -------
+    dict
+    """
+    from datamart_profiler.profile_types import determine_dataset_type
+    counts = Counter()
+    for col in columns:
+        dstype = determine_dataset_type(
+            col.get('structural_type'),
+            col.get('semantic_types', [])
+        )
+        if dstype:
+            counts[dstype] += 1
+    result = {'nb_{}_columns'.format(t): c for t, c in counts.items()}
+    result['types'] = sorted(counts)
+    return result
+
+
+def merge_profiles(profiles: List[Dict]) -> Dict:
+    """Merge the profiling results for disjoint lists of columns from the same
+    dataset into a single result. The merged result contains the concatenated
+    list of column profiles and the overall dataset types for all columns.
+
+    Parameters
+    ----------
+    profiles: list of dict
+        Profiling results for consecutive lists of columns in a dataset.
+
+    Returns
+    -------
+    dict
+    """
+    columns = [col for p in profiles for col in p.get('columns', [])]
+    result = {
+        'nb_profiled_rows': min([p['nb_profiled_rows'] for p in profiles], default=0),
+        'nb_columns': len(columns),
+        'columns': columns,
+        'attribute_keywords': [
+            kw for p in profiles for kw in p.get('attribute_keywords', [])
+        ]
+    }
+    coverage = [c for p in profiles for c in p.get('spatial_coverage', [])]
+    if coverage:
+        result['spatial_coverage'] = coverage
+    result.update(dataset_types(columns))
+    return result
@@ -0,0 +1,304 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Parallel version of the datamart profiler. Columns are partitioned across
+a pool of worker processes. Column values are shipped to the workers via
+shared memory blocks instead of pickling the data frame.
+
+The datamart profiler converts all values to strings before profiling. Columns
+with a numeric, boolean, or datetime data type are therefore copied as raw
+buffers and converted in the worker. All other columns are converted to
+strings in the main process and copied as UTF-8 encoded data together with
+the offsets for each value.
+
+Shared memory requires Python 3.8 or later. On older Python versions, the
+column partitions are pickled and sent to the workers instead.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import os
+import pandas as pd
+import weakref
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover
+    # Python 3.7 does not support shared memory blocks.
+    shared_memory = None
+
+from openclean_notebook.metadata.datamart import DatamartProfiler, merge_profiles
+from openclean_notebook.sampling import SAMPLE_UNIFORM
+
+
+class ParallelProfiler(DatamartProfiler):
+    """Datamart profiler that profiles partitions of the dataset columns in
+    parallel using a process pool.
+
+    Note that the datamart profiler detects pairs of latitude and longitude
+    columns only within the same partition.
+
+    The worker processes are shut down by :meth:`close`, when the profiler is
+    used as a context manager, or when the profiler is garbage collected.
+    """
+    def __init__(
+        self, workers: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        sampling: Optional[str] = SAMPLE_UNIFORM,
+        stratify: Optional[Union[int, str]] = None,
+        random_state: Optional[int] = None
+    ):
+        """Initialize the number of worker processes and the sampling options.
+
+        Parameters
+        ----------
+        workers: int, default=None
+            Number of worker processes. Uses the number of CPUs by default.
+        max_rows: int, default=None
+            Maximum number of rows that are profiled. Datasets with more rows
+            are sampled. Profile all rows if None.
+        sampling: string, default='uniform'
+            Sampling strategy. One of 'reservoir', 'stratified', or 'uniform'.
+        stratify: int or string, default=None
+            Index position or name of the column that defines the strata for
+            stratified sampling.
+        random_state: int, default=None
+            Seed for the random number generator.
+
+        Raises
+        ------
+        ValueError
+        """
+        super(ParallelProfiler, self).__init__(
+            max_rows=max_rows,
+            sampling=sampling,
+            stratify=stratify,
+            random_state=random_state
+        )
+        workers = workers if workers is not None else os.cpu_count()
+        if workers < 1:
+            raise ValueError('invalid number of workers {}'.format(workers))
+        self.workers = workers
+        # The process pool is created when it is needed for the first time.
+        # The finalizer shuts down the pool when the profiler is garbage
+        # collected or the interpreter exits.
+        self._pool = None
+        self._finalizer = None
+
+    def __enter__(self) -> ParallelProfiler:
+        """Enter the runtime context for the profiler."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Shut down the process pool when leaving the runtime context."""
+        self.close()
+
+    def close(self):
+        """Shut down the process pool (if it was created)."""
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        self._pool = None
+
+    @property
+    def pool(self) -> Executor:
+        """Get the process pool for profiling column partitions.
+
+        Returns
+        -------
+        concurrent.futures.Executor
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._finalizer = weakref.finalize(self, self._pool.shutdown)
+        return self._pool
+
+    def process(self, df: pd.DataFrame) -> Dict:
+        """Profile partitions of the data frame columns in parallel and merge
+        the results. Uses the sequential profiler if there is only a single
+        worker or a single column.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Input data frame.
+
+        Returns
+        -------
+        dict
+        """
+        n = min(self.workers, len(df.columns))
+        if n <= 1:
+            return super(ParallelProfiler, self).process(df)
+        partitions = np.array_split(np.arange(len(df.columns)), n)
+        if shared_memory is None:
+            # Pickle the column partitions if shared memory is not supported.
+            tasks = [self.pool.submit(profile_frame, df.iloc[:, list(columns)]) for columns in partitions]
+            profiles = [t.result() for t in tasks]
+            result = merge_profiles(profiles)
+            result['nb_rows'] = df.shape[0]
+            return result
+        # Copy the values for each partition into a shared memory block and
+        # submit the profiling tasks before waiting for any of the results.
+        blocks, tasks = list(), list()
+        try:
+            for columns in partitions:
+                shm, layout = share_columns(df, columns=list(columns))
+                blocks.append(shm)
+                tasks.append(self.pool.submit(profile_shared, shm.name, layout))
+            profiles = [t.result() for t in tasks]
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+        result = merge_profiles(profiles)
+        result['nb_rows'] = df.shape[0]
+        return result
+
+
+# -- Shared memory serialization ----------------------------------------------
+
+def share_columns(
+    df: pd.DataFrame, columns: List[int]
+) -> Tuple[shared_memory.SharedMemory, List[Dict]]:
+    """Copy the values of the given data frame columns into a new shared
+    memory block. Returns the memory block and the list of column descriptors
+    that are needed to read the column values from the block.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Input data frame.
+    columns: list of int
+        Index positions of the copied columns.
+
+    Returns
+    -------
+    tuple of multiprocessing.shared_memory.SharedMemory, list of dict
+    """
+    # Get the buffers for all columns first to compute the size of the shared
+    # memory block.
+    layout, buffers = list(), list()
+    for pos in columns:
+        desc, arrays = encode_values(df.iloc[:, pos])
+        desc['name'] = str(df.columns[pos])
+        layout.append(desc)
+        buffers.append(arrays)
+    size = sum(arr.nbytes for arrays in buffers for arr in arrays)
+    # Shared memory blocks cannot be empty.
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    offset = 0
+    for desc, arrays in zip(layout, buffers):
+        desc['buffers'] = list()
+        for arr in arrays:
+            target = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf, offset=offset)
+            target[:] = arr
+            desc['buffers'].append((arr.dtype.str, offset, len(arr)))
+            offset += arr.nbytes
+            del target
+    return shm, layout
+
+
+def encode_values(values: pd.Series) -> Tuple[Dict, List[np.ndarray]]:
+    """Get the list of arrays that represent the values of a data frame column.
+    Numeric, boolean, and datetime columns are represented by the array of
+    column values. All other columns are represented by the UTF-8 encoded
+    string values (converted in the same way as by the datamart profiler) and
+    the array of value offsets.
+
+    Parameters
+    ----------
+    values: pd.Series
+        Data frame column.
+
+    Returns
+    -------
+    tuple of dict, list of np.ndarray
+    """
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufM':
+        return {'type': 'array'}, [values.to_numpy()]
+    strings = values.astype(object).fillna('').astype(str)
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return {'type': 'utf8'}, [data, offsets]
+
+
+def decode_values(buf: memoryview, desc: Dict) -> pd.Series:
+    """Read the values of a data frame column from a shared memory buffer.
+
+    Parameters
+    ----------
+    buf: memoryview
+        Buffer for a shared memory block.
+    desc: dict
+        Column descriptor that was generated by :func:`share_columns`.
+
+    Returns
+    -------
+    pd.Series
+    """
+    arrays = [
+        np.ndarray((length,), dtype=np.dtype(dtype), buffer=buf, offset=offset).copy()
+        for dtype, offset, length in desc['buffers']
+    ]
+    if desc['type'] == 'array':
+        return pd.Series(arrays[0], name=desc['name'])
+    data, offsets = arrays[0].tobytes(), arrays[1]
+    values = [
+        data[offsets[i]:offsets[i + 1]].decode('utf-8')
+        for i in range(len(offsets) - 1)
+    ]
+    return pd.Series(values, name=desc['name'], dtype=object)
+
+
+def profile_shared(name: str, layout: List[Dict]) -> Dict:
+    """Profile the columns in a shared memory block. This function is executed
+    by the worker processes.
+
+    Parameters
+    ----------
+    name: string
+        Name of the shared memory block.
+    layout: list of dict
+        Column descriptors that were generated by :func:`share_columns`.
+
+    Returns
+    -------
+    dict
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        columns = [decode_values(shm.buf, desc) for desc in layout]
+    finally:
+        shm.close()
+    df = pd.concat(columns, axis=1) if columns else pd.DataFrame()
+    return profile_frame(df)
+
+
+def profile_frame(df: pd.DataFrame) -> Dict:
+    """Run the datamart profiler on a partition of the data frame columns.
+    This function is executed by the worker processes.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data frame with the profiled columns.
+
+    Returns
+    -------
+    dict
+    """
+    # Import the datamart profiler in the worker on first use.
+    import datamart_profiler as dmp
+    return dmp.process_dataset(df, include_sample=False, plots=True)
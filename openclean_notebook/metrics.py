@@ -0,0 +1,284 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Timers and byte counters for requests from user-interface components and
+a process-wide registry that aggregates them. Each request is instrumented
+with a :class:`RequestTimer` that records the time spent in the different
+phases of processing the request (e.g., validation, checkout, serialization)
+and the sizes of transferred data. The timers of completed requests are added
+to the metrics registry where they are aggregated in histograms per phase for
+each scope (e.g., an engine identifier or a comm channel).
+"""
+
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import threading
+import time
+
+
+"""Upper bounds for the histogram buckets of phase times (in seconds) and of
+byte counts. Bounds grow exponentially to cover durations from microseconds
+to hours and sizes from bytes to terabytes.
+"""
+TIME_BUCKETS = [1e-6 * 2 ** k for k in range(33)]
+BYTE_BUCKETS = [2 ** k for k in range(41)]
+
+
+class Histogram(object):
+    """Histogram with fixed bucket bounds. Maintains the number of observed
+    values, their sum, minimum, and maximum in addition to the bucket counts.
+    Quantiles are estimated by the upper bound of the bucket that contains
+    the quantile.
+    """
+    def __init__(self, bounds: List[float]):
+        """Initialize the (sorted) upper bounds for the histogram buckets. An
+        additional bucket is maintained for values that exceed the last bound.
+
+        Parameters
+        ----------
+        bounds: list of float
+            Sorted upper bounds for the histogram buckets.
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float):
+        """Add a value to the histogram.
+
+        Parameters
+        ----------
+        value: float
+            Observed value.
+        """
+        # Find the first bucket whose upper bound is greater or equal to the
+        # value (binary search).
+        lo, hi = 0, len(self.bounds)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.bounds[mid] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        self.counts[lo] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Get an estimate for the given quantile. Returns None if the
+        histogram is empty.
+
+        Parameters
+        ----------
+        q: float
+            Quantile (between 0 and 1).
+
+        Returns
+        -------
+        float
+        """
+        if self.count == 0:
+            return None
+        rank, seen = q * self.count, 0
+        for pos, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                # The estimate is bounded by the observed extreme values.
+                bound = self.bounds[pos] if pos < len(self.bounds) else self.max
+                return max(min(bound, self.max), self.min)
+        return self.max  # pragma: no cover
+
+    def to_dict(self) -> Dict:
+        """Get a serialization of the histogram that contains summary
+        statistics, quantile estimates, and the non-empty buckets (as pairs
+        of upper bound and count).
+
+        Returns
+        -------
+        dict
+        """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': [
+                [self.bounds[i] if i < len(self.bounds) else None, c]
+                for i, c in enumerate(self.counts) if c
+            ]
+        }
+
+
+class RequestTimer(object):
+    """Timer for the phases of a single request. Phase times are accumulated
+    if the same phase is entered multiple times. Byte counts are accumulated
+    in the same way.
+    """
+    def __init__(self):
+        """Start the timer for the request."""
+        self.start = time.perf_counter()
+        self.phases = dict()
+        self.bytes = dict()
+
+    def add_bytes(self, name: str, size: int):
+        """Add a byte count for the request.
+
+        Parameters
+        ----------
+        name: string
+            Name of the counter (e.g., 'request' or 'buffers').
+        size: int
+            Number of bytes.
+        """
+        self.bytes[name] = self.bytes.get(name, 0) + size
+
+    def elapsed(self) -> float:
+        """Get the time (in seconds) since the timer was started.
+
+        Returns
+        -------
+        float
+        """
+        return time.perf_counter() - self.start
+
+    @contextmanager
+    def phase(self, name: str):
+        """Context manager that adds the time that is spent in the context to
+        the time for the phase with the given name.
+
+        Parameters
+        ----------
+        name: string
+            Name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+    def to_dict(self) -> Dict:
+        """Get serialization of the phase times (in seconds), byte counts, and
+        the total time of the request.
+
+        Returns
+        -------
+        dict
+        """
+        return {'phases': dict(self.phases), 'bytes': dict(self.bytes), 'total': self.elapsed()}
+
+
+class MetricsRegistry(object):
+    """Registry that aggregates the timers of completed requests. For each
+    scope, the registry maintains a histogram for the times of each phase,
+    for each byte counter, and for the total request time. The registry is
+    thread-safe since requests may be completed by background workers.
+
+    The sizes of request and response messages are only measured if the
+    message_sizes flag of the registry is set, since measuring them requires
+    an additional Json serialization of each message. The sizes of binary
+    buffers are always recorded.
+    """
+    def __init__(self, message_sizes: Optional[bool] = False):
+        """Initialize the empty registry.
+
+        Parameters
+        ----------
+        message_sizes: bool, default=False
+            Measure the sizes of request and response messages.
+        """
+        self.message_sizes = message_sizes
+        self._scopes = dict()
+        self._lock = threading.Lock()
+
+    def get(self, scope: str) -> Dict:
+        """Get serialization of the histograms for the given scope. The result
+        contains the number of recorded requests ('requests') and the
+        serialized histograms for the total request time ('total'), the phase
+        times ('phases'), and the byte counts ('bytes').
+
+        Parameters
+        ----------
+        scope: string
+            Scope identifier (e.g., an engine identifier).
+
+        Returns
+        -------
+        dict
+        """
+        with self._lock:
+            metrics = self._scopes.get(scope)
+            if metrics is None:
+                return {'requests': 0, 'total': Histogram(TIME_BUCKETS).to_dict(), 'phases': dict(), 'bytes': dict()}
+            return {
+                'requests': metrics['total'].count,
+                'total': metrics['total'].to_dict(),
+                'phases': {k: h.to_dict() for k, h in metrics['phases'].items()},
+                'bytes': {k: h.to_dict() for k, h in metrics['bytes'].items()}
+            }
+
+    def record(self, scope: str, timer: RequestTimer):
+        """Add the phase times and byte counts of a completed request to the
+        histograms for the given scope.
+
+        Parameters
+        ----------
+        scope: string
+            Scope identifier (e.g., an engine identifier).
+        timer: openclean_notebook.metrics.RequestTimer
+            Timer for a completed request.
+        """
+        total = timer.elapsed()
+        with self._lock:
+            metrics = self._scopes.get(scope)
+            if metrics is None:
+                metrics = {'total': Histogram(TIME_BUCKETS), 'phases': dict(), 'bytes': dict()}
+                self._scopes[scope] = metrics
+            metrics['total'].add(total)
+            for name, value in timer.phases.items():
+                metrics['phases'].setdefault(name, Histogram(TIME_BUCKETS)).add(value)
+            for name, value in timer.bytes.items():
+                metrics['bytes'].setdefault(name, Histogram(BYTE_BUCKETS)).add(value)
+
+    def reset(self, scope: Optional[str] = None):
+        """Remove the recorded metrics for the given scope or for all scopes
+        if no scope is given.
+
+        Parameters
+        ----------
+        scope: string, default=None
+            Scope identifier (e.g., an engine identifier).
+        """
+        with self._lock:
+            if scope is None:
+                self._scopes.clear()
+            else:
+                self._scopes.pop(scope, None)
+
+    def scopes(self) -> List[str]:
+        """Get the identifiers of all scopes with recorded metrics.
+
+        Returns
+        -------
+        list of string
+        """
+        with self._lock:
+            return list(self._scopes)
+
+
+"""Process-wide registry for request metrics."""
+registry = MetricsRegistry()
@@ -0,0 +1,465 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Row sampling strategies for data frames. Sampling is used to bound the
+number of rows that are processed by expensive operations like data profiling.
+
+All sampling functions return the sorted index positions of the selected rows
+in order to maintain the original row order in the sample. Streams of rows
+(e.g., the rows of an archived dataset snapshot) are sampled in a single pass
+without materializing the full stream (see :func:`sample_stream`).
+"""
+
+from itertools import islice
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+import math
+import numpy as np
+import pandas as pd
+
+
+"""Identifier for supported sampling strategies."""
+SAMPLE_RESERVOIR = 'reservoir'
+SAMPLE_STRATIFIED = 'stratified'
+SAMPLE_UNIFORM = 'uniform'
+
+SAMPLING_METHODS = [SAMPLE_RESERVOIR, SAMPLE_STRATIFIED, SAMPLE_UNIFORM]
+
+
+"""Maximum number of distinct values in the column that defines the strata for
+stratified samples of row streams. Bounds the number of rows that are kept in
+the reservoirs for the strata.
+"""
+DEFAULT_MAX_STRATA = 1000
+
+
+def sample_rows(
+    df: pd.DataFrame, n: int, method: Optional[str] = SAMPLE_UNIFORM,
+    stratify: Optional[Union[int, str]] = None,
+    random_state: Optional[int] = None
+) -> pd.DataFrame:
+    """Get a random sample of at most n rows from a given data frame. Returns
+    the original data frame if it has no more than n rows.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Input data frame.
+    n: int
+        Maximum number of rows in the sample.
+    method: string, default='uniform'
+        Sampling strategy. One of 'reservoir', 'stratified', or 'uniform'.
+    stratify: int or string, default=None
+        Index position or name of the column that defines the strata for
+        stratified sampling.
+    random_state: int, default=None
+        Seed for the random number generator.
+
+    Returns
+    -------
+    pd.DataFrame
+
+    Raises
+    ------
+    ValueError
+    """
+    if method not in SAMPLING_METHODS:
+        raise ValueError("unknown sampling method '{}'".format(method))
+    if df.shape[0] <= n:
+        return df
+    if method == SAMPLE_RESERVOIR:
+        positions = reservoir_positions(df.shape[0], n, random_state=random_state)
+    elif method == SAMPLE_STRATIFIED:
+        if stratify is None:
+            raise ValueError('missing column for stratified sampling')
+        values = df.iloc[:, stratify] if isinstance(stratify, int) else df[stratify]
+        positions = stratified_positions(values, n, random_state=random_state)
+    else:
+        positions = uniform_positions(df.shape[0], n, random_state=random_state)
+    return df.iloc[positions]
+
+
+def reservoir_positions(
+    size: int, n: int, random_state: Optional[int] = None
+) -> np.ndarray:
+    """Select n out of size positions using reservoir sampling. Uses the skip
+    based Algorithm L (Li, 1994) that only draws O(n * log(size/n)) random
+    numbers instead of one random number per row.
+
+    Parameters
+    ----------
+    size: int
+        Number of rows in the sampled dataset.
+    n: int
+        Sample size.
+    random_state: int, default=None
+        Seed for the random number generator.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    if size <= n:
+        return np.arange(size)
+    rng = np.random.default_rng(random_state)
+    reservoir = np.arange(n)
+    # Use 1 - random() to avoid log(0) since random() is in [0, 1).
+    w = math.exp(math.log(1.0 - rng.random()) / n)
+    i = n - 1
+    while True:
+        i += math.floor(math.log(1.0 - rng.random()) / math.log(1.0 - w)) + 1
+        if i >= size:
+            break
+        reservoir[rng.integers(n)] = i
+        w *= math.exp(math.log(1.0 - rng.random()) / n)
+    return np.sort(reservoir)
+
+
+def stratified_positions(
+    values: pd.Series, n: int, random_state: Optional[int] = None
+) -> np.ndarray:
+    """Select n positions such that each distinct value in the given column
+    is represented in proportion to its frequency. If the number of distinct
+    values does not exceed the sample size, each value is represented by at
+    least one row. Missing values form a separate stratum.
+
+    Parameters
+    ----------
+    values: pd.Series
+        Column values that define the strata.
+    n: int
+        Sample size.
+    random_state: int, default=None
+        Seed for the random number generator.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    size = len(values)
+    if size <= n:
+        return np.arange(size)
+    rng = np.random.default_rng(random_state)
+    codes, _ = pd.factorize(values)
+    groups, counts = np.unique(codes, return_counts=True)
+    quota = stratum_quotas(counts, n)
+    # Order rows by stratum and by a random key within each stratum. Take the
+    # first rows from each stratum according to its quota.
+    order = np.lexsort((rng.random(size), codes))
+    starts = np.searchsorted(codes[order], groups)
+    rank = np.arange(size) - np.repeat(starts, counts)
+    return np.sort(order[rank < np.repeat(quota, counts)])
+
+
+def stratum_quotas(counts: np.ndarray, n: int) -> np.ndarray:
+    """Get the number of sampled rows for each stratum such that each stratum
+    is represented in proportion to its size. If the number of strata does
+    not exceed the sample size, each stratum is represented by at least one
+    row. Expects that the total size of all strata exceeds the sample size.
+
+    Parameters
+    ----------
+    counts: np.ndarray
+        Number of rows in each stratum.
+    n: int
+        Sample size.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    # Reserve one row for each stratum if possible and distribute the remaining
+    # rows proportionally using the largest remainder method.
+    base = np.minimum(counts, 1) if len(counts) <= n else np.zeros_like(counts)
+    remaining = counts - base
+    exact = remaining * ((n - base.sum()) / remaining.sum())
+    quota = np.floor(exact).astype(int)
+    rest = n - base.sum() - quota.sum()
+    if rest > 0:
+        quota[np.argsort(quota - exact, kind='stable')[:rest]] += 1
+    return quota + base
+
+
+def uniform_positions(
+    size: int, n: int, random_state: Optional[int] = None
+) -> np.ndarray:
+    """Select n out of size positions uniformly at random without
+    replacement.
+
+    Parameters
+    ----------
+    size: int
+        Number of rows in the sampled dataset.
+    n: int
+        Sample size.
+    random_state: int, default=None
+        Seed for the random number generator.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    if size <= n:
+        return np.arange(size)
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.choice(size, size=n, replace=False))
+
+
+# -- Stream sampling ----------------------------------------------------------
+
+class Reservoir(object):
+    """Reservoir for a random sample of n items from a stream of unknown
+    length. Implements Algorithm L (Li, 1994). After the reservoir is full,
+    the position of the next stream item that replaces an item in the
+    reservoir is drawn in advance ('next'). Items before that position can
+    be skipped without being offered to the reservoir (see :meth:`skip`).
+
+    For the same random number generator state, the selected stream positions
+    are the same as the positions that are returned by
+    :func:`reservoir_positions`.
+    """
+    def __init__(self, n: int, rng: np.random.Generator):
+        """Initialize the sample size and the random number generator.
+
+        Parameters
+        ----------
+        n: int
+            Sample size.
+        rng: np.random.Generator
+            Random number generator.
+        """
+        self.n = n
+        self.rng = rng
+        self.items = list()
+        # Number of stream items that were offered to or skipped by the
+        # reservoir and the position of the next item that is added.
+        self.count = 0
+        self.next = 0
+        self.w = None
+
+    def offer(self, item: Any):
+        """Offer the next item in the stream. The item is added to the
+        reservoir if its position was selected.
+
+        Parameters
+        ----------
+        item: any
+            Stream item.
+        """
+        pos = self.count
+        self.count += 1
+        if pos != self.next:
+            return
+        if len(self.items) < self.n:
+            self.items.append(item)
+            if len(self.items) < self.n:
+                self.next = pos + 1
+                return
+            # Use 1 - random() to avoid log(0) since random() is in [0, 1).
+            self.w = math.exp(math.log(1.0 - self.rng.random()) / self.n)
+        else:
+            self.items[self.rng.integers(self.n)] = item
+            self.w *= math.exp(math.log(1.0 - self.rng.random()) / self.n)
+        self.next = pos + math.floor(math.log(1.0 - self.rng.random()) / math.log(1.0 - self.w)) + 1
+
+    def skip(self, k: int):
+        """Skip the next k items in the stream. Only items before the next
+        selected position should be skipped.
+
+        Parameters
+        ----------
+        k: int
+            Number of skipped items.
+        """
+        self.count += k
+
+
+def sample_stream(
+    rows: Iterable[Tuple[int, List]], columns: List[str], n: int,
+    stratify: Optional[Union[int, str]] = None,
+    random_state: Optional[int] = None,
+    max_strata: Optional[int] = DEFAULT_MAX_STRATA
+) -> pd.DataFrame:
+    """Get a random sample of at most n rows from a stream of (row identifier,
+    row values)-pairs in a single pass. Only the rows in the sample are kept
+    in memory. Rows are skipped without inspection between selected rows.
+
+    If a stratify column is given, a separate reservoir of up to n rows is
+    maintained for each distinct value in the column. The sample then
+    contains rows from each stratum in proportion to its size (see
+    :func:`stratum_quotas`). At most n rows are kept for each stratum. Raises
+    a ValueError if the column has more than max_strata distinct values.
+
+    The returned data frame contains the sampled rows in stream order. Values
+    have object type (like data frames that are collected from an openclean
+    data pipeline).
+
+    Parameters
+    ----------
+    rows: iterable of tuple of int and list
+        Stream of row identifiers and row values.
+    columns: list of string
+        Column names for the rows in the stream.
+    n: int
+        Maximum number of rows in the sample.
+    stratify: int or string, default=None
+        Index position or name of the column that defines the strata for
+        stratified sampling.
+    random_state: int, default=None
+        Seed for the random number generator.
+    max_strata: int, default=DEFAULT_MAX_STRATA
+        Maximum number of strata for stratified sampling.
+
+    Returns
+    -------
+    pd.DataFrame
+
+    Raises
+    ------
+    ValueError
+    """
+    if n < 1:
+        raise ValueError('invalid sample size {}'.format(n))
+    rng = np.random.default_rng(random_state)
+    if stratify is None:
+        items = stream_reservoir(rows=rows, n=n, rng=rng)
+    else:
+        items = stream_strata(
+            rows=rows,
+            n=n,
+            column=stream_column(columns, stratify),
+            rng=rng,
+            max_strata=max_strata
+        )
+    return pd.DataFrame(
+        data=[row for _, _, row in items],
+        columns=columns,
+        index=[rowid for _, rowid, _ in items],
+        dtype=object
+    )
+
+
+def stream_column(columns: List[str], column: Union[int, str]) -> int:
+    """Get the index position of a column in the schema of a row stream.
+    Raises a ValueError if the column is unknown.
+
+    Parameters
+    ----------
+    columns: list of string
+        Column names for the rows in the stream.
+    column: int or string
+        Index position or name of the column.
+
+    Returns
+    -------
+    int
+
+    Raises
+    ------
+    ValueError
+    """
+    if isinstance(column, int):
+        if 0 <= column < len(columns):
+            return column
+    else:
+        for pos, name in enumerate(columns):
+            if name == column:
+                return pos
+    raise ValueError("unknown column '{}'".format(column))
+
+
+def stream_reservoir(
+    rows: Iterable[Tuple[int, List]], n: int, rng: np.random.Generator
+) -> List[Tuple[int, int, List]]:
+    """Select a random sample of n rows from a row stream. Returns a list of
+    (stream position, row identifier, row values)-tuples in stream order.
+
+    Parameters
+    ----------
+    rows: iterable of tuple of int and list
+        Stream of row identifiers and row values.
+    n: int
+        Sample size.
+    rng: np.random.Generator
+        Random number generator.
+
+    Returns
+    -------
+    list of tuple
+    """
+    reservoir = Reservoir(n=n, rng=rng)
+    stream = iter(rows)
+    while True:
+        # Skip all rows before the next selected position.
+        pos = reservoir.next
+        row = next(islice(stream, pos - reservoir.count, None), None)
+        if row is None:
+            break
+        reservoir.skip(pos - reservoir.count)
+        reservoir.offer((pos, row[0], row[1]))
+    return sorted(reservoir.items, key=lambda item: item[0])
+
+
+def stream_strata(
+    rows: Iterable[Tuple[int, List]], n: int, column: int,
+    rng: np.random.Generator, max_strata: Optional[int] = DEFAULT_MAX_STRATA
+) -> List[Tuple[int, int, List]]:
+    """Select a stratified random sample of n rows from a row stream. The
+    strata are defined by the values in the given column. Missing values form
+    a separate stratum. Returns a list of (stream position, row identifier,
+    row values)-tuples in stream order.
+
+    Each stratum has a reservoir of up to n rows. Raises a ValueError if the
+    number of strata exceeds the given maximum to bound the number of rows
+    that are kept in memory (e.g., for columns with unique values).
+
+    Parameters
+    ----------
+    rows: iterable of tuple of int and list
+        Stream of row identifiers and row values.
+    n: int
+        Sample size.
+    column: int
+        Index position of the column that defines the strata.
+    rng: np.random.Generator
+        Random number generator.
+    max_strata: int, default=DEFAULT_MAX_STRATA
+        Maximum number of strata.
+
+    Returns
+    -------
+    list of tuple
+
+    Raises
+    ------
+    ValueError
+    """
+    reservoirs = dict()
+    for pos, (rowid, row) in enumerate(rows):
+        value = row[column]
+        # Use a common key for all missing values (including NaN).
+        key = None if value is None or value != value else value
+        reservoir = reservoirs.get(key)
+        if reservoir is None:
+            if len(reservoirs) == max_strata:
+                raise ValueError('more than {} strata in stratify column'.format(max_strata))
+            reservoir = Reservoir(n=n, rng=rng)
+            reservoirs[key] = reservoir
+        reservoir.offer((pos, rowid, row))
+    strata = list(reservoirs.values())
+    counts = np.array([r.count for r in strata], dtype=int)
+    items = list()
+    if counts.sum() <= n:
+        for reservoir in strata:
+            items.extend(reservoir.items)
+    elif strata:
+        # Each reservoir contains a uniform sample of its stratum. Select a
+        # random subset of each reservoir according to the stratum quota.
+        for reservoir, quota in zip(strata, stratum_quotas(counts, n)):
+            for i in rng.choice(len(reservoir.items), size=quota, replace=False):
+                items.append(reservoir.items[i])
+    return sorted(items, key=lambda item: item[0])
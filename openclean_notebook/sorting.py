@@ -0,0 +1,53 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Sort orders for data frame columns. A sort order is the permutation of row
+positions that sorts the values in a column. Sort orders are computed once per
+dataset snapshot and column and are then used to serve pages of a sorted view
+on the dataset by slicing the permutation.
+
+Sorting is stable, i.e., rows with equal values keep their original order.
+Missing values are always placed at the end of the sort order.
+"""
+
+import numbers
+import numpy as np
+import pandas as pd
+
+
+def argsort(values: pd.Series, descending: bool = False) -> np.ndarray:
+    """Get the permutation of row positions that sorts the given values.
+
+    Columns with values of incomparable types (e.g., numbers and strings) are
+    sorted by type first. Numbers are placed before all other values. Values
+    that are not numbers are sorted by their string representation.
+
+    Parameters
+    ----------
+    values: pd.Series
+        Column values.
+    descending: bool, default=False
+        Sort values in descending order if True.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    values = values.reset_index(drop=True)
+    try:
+        order = values.sort_values(ascending=not descending, kind='mergesort', na_position='last')
+    except TypeError:
+        # Sort by the numeric values first and by the string representation
+        # of all other values second. Sorting by multiple keys is stable.
+        isnum = values.map(lambda v: isinstance(v, numbers.Number) and not isinstance(v, bool))
+        isnum = isnum.astype(bool) & values.notna()
+        keys = pd.DataFrame({
+            'num': pd.to_numeric(values.where(isnum), errors='coerce'),
+            'str': values.map(str).where(~isnum & values.notna())
+        })
+        order = keys.sort_values(['num', 'str'], ascending=not descending, na_position='last')
+    return order.index.to_numpy(dtype=np.int64)
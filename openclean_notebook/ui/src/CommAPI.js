@@ -3,10 +3,147 @@ const COMM_TYPES = {
   COLAB: 'COLAB',
 };
 
+/*
+ * Typed array constructors for fixed-width column types in binary responses.
+ */
+const TYPED_ARRAYS = {
+  float32: Float32Array,
+  float64: Float64Array,
+  int8: Int8Array,
+  int16: Int16Array,
+  int32: Int32Array,
+  int64: BigInt64Array,
+  uint8: Uint8Array,
+  uint16: Uint16Array,
+  uint32: Uint32Array,
+  uint64: BigUint64Array,
+};
+
+/*
+ * Get a copy of the bytes in a message buffer as an ArrayBuffer. Copying the
+ * bytes ensures proper alignment for typed arrays.
+ */
+function toArrayBuffer(buffer) {
+  if (buffer instanceof ArrayBuffer) {
+    return buffer;
+  }
+  return buffer.buffer.slice(
+    buffer.byteOffset,
+    buffer.byteOffset + buffer.byteLength
+  );
+}
+
+/*
+ * Decode a Base64-encoded string (used by Colab) into an ArrayBuffer.
+ */
+function fromBase64(str) {
+  const bytes = Uint8Array.from(atob(str), c => c.charCodeAt(0));
+  return bytes.buffer;
+}
+
+/*
+ * Decode the values of a single column from the binary buffers of a response.
+ * The column descriptor contains the value type, the number of values, and
+ * the index positions of the data, offset, and validity buffers.
+ */
+function decodeColumn(desc, buffers) {
+  let values;
+  if (desc.type === 'json') {
+    return desc.values;
+  } else if (desc.type === 'null') {
+    return new Array(desc.length).fill(null);
+  } else if (desc.type === 'utf8') {
+    const offsets = new Int32Array(buffers[desc.offsets]);
+    const data = new Uint8Array(buffers[desc.data]);
+    const decoder = new TextDecoder('utf-8');
+    values = new Array(desc.length);
+    for (let i = 0; i < desc.length; i++) {
+      values[i] = decoder.decode(data.subarray(offsets[i], offsets[i + 1]));
+    }
+  } else if (desc.type === 'bool') {
+    values = Array.from(new Uint8Array(buffers[desc.data]), v => v === 1);
+  } else {
+    const array = new TYPED_ARRAYS[desc.type](buffers[desc.data]);
+    values = Array.from(array, v =>
+      typeof v === 'bigint' ? Number(v) : Number.isNaN(v) ? null : v
+    );
+  }
+  if (desc.validity !== undefined) {
+    const validity = new Uint8Array(buffers[desc.validity]);
+    values = values.map((v, i) => (validity[i] === 1 ? v : null));
+  }
+  return values;
+}
+
+/*
+ * Decode a list of dataset rows from the descriptor for binary encoded rows.
+ */
+function decodeRows(data, buffers) {
+  const index = decodeColumn(data.index, buffers);
+  const columns = data.values.map(desc => decodeColumn(desc, buffers));
+  return index.map((id, i) => ({
+    id: id,
+    values: columns.map(col => col[i]),
+  }));
+}
+
+/*
+ * Convert a response with binary encoded rows into a response with the
+ * default row format. Responses that do not contain binary encoded data are
+ * returned as they are.
+ */
+export function decodeResponse(data, buffers) {
+  if (!data.data || data.data.encoding !== 'binary') {
+    return data;
+  }
+  if (data.buffers !== undefined) {
+    // Colab responses contain the buffers as Base64-encoded strings.
+    buffers = data.buffers.map(fromBase64);
+    delete data.buffers;
+  } else {
+    buffers = (buffers || []).map(toArrayBuffer);
+  }
+  const result = {...data, rows: decodeRows(data.data, buffers)};
+  delete result.data;
+  // Prefetched pages that are piggy-backed on the response share the
+  // buffers of the response.
+  if (result.prefetched !== undefined) {
+    result.prefetched = result.prefetched.map(page => ({
+      offset: page.offset,
+      rows: decodeRows(page.data, buffers),
+    }));
+  }
+  return result;
+}
+
+/*
+ * Get the list of responses in a message. Batch responses contain a list of
+ * responses that share the binary buffers of the message. All other messages
+ * contain a single response.
+ */
+export function decodeMessage(data, buffers) {
+  if (data.type !== 'batch') {
+    return [decodeResponse(data, buffers)];
+  }
+  if (data.buffers !== undefined) {
+    // Colab responses contain the buffers as Base64-encoded strings.
+    buffers = data.buffers.map(fromBase64);
+  } else {
+    buffers = (buffers || []).map(toArrayBuffer);
+  }
+  return data.batch.map(resp => decodeResponse(resp, buffers));
+}
+
 export default class CommAPI {
   constructor(api_call_id, callback) {
     this.callback = callback;
     this.mode = null;
+    // Requests that are made in the same event loop turn are sent together
+    // in a single batch message.
+    this.queue = [];
+    const receive = (data, buffers) => {
+      decodeMessage(data, buffers).forEach(resp => callback(resp));
+    };
     if (window.Jupyter !== undefined) {
       this.mode = COMM_TYPES.JUPYTER;
       this.comm = window.Jupyter.notebook.kernel.comm_manager.new_comm(
@@ -14,8 +151,7 @@ export default class CommAPI {
         {}
       );
       this.comm.on_msg(msg => {
-        const data = msg.content.data;
-        callback(data);
+        receive(msg.content.data, msg.buffers);
       });
     } else if (window.google !== undefined) {
       this.mode = COMM_TYPES.COLAB;
@@ -25,7 +161,7 @@ export default class CommAPI {
           [msg], // The argument
           {}
         ); // kwargs
-        callback(result.data['application/json']);
+        receive(result.data['application/json']);
       };
     } else {
       console.error(
@@ -35,12 +171,23 @@ export default class CommAPI {
   }
 
   call(msg) {
-    if (this.comm) {
-      if (this.mode === COMM_TYPES.JUPYTER) {
-        this.comm.send(msg);
-      } else if (this.mode === COMM_TYPES.COLAB) {
-        this.comm(msg);
-      }
+    if (!this.comm) {
+      return;
+    }
+    this.queue.push(msg);
+    if (this.queue.length === 1) {
+      Promise.resolve().then(() => this.flush());
+    }
+  }
+
+  flush() {
+    const requests = this.queue;
+    this.queue = [];
+    const msg = requests.length === 1 ? requests[0] : {batch: requests};
+    if (this.mode === COMM_TYPES.JUPYTER) {
+      this.comm.send(msg);
+    } else if (this.mode === COMM_TYPES.COLAB) {
+      this.comm(msg);
     }
   }
 }
@@ -287,8 +287,16 @@ function TableCompactDetailView(props: {
                           key={command.name}
                           className="menu-link"
                           onClick={() => props.onCommandClick(command, i)}
+                          title={
+                            command.vectorized
+                              ? 'Vectorized: applied to whole columns'
+                              : undefined
+                          }
                         >
                           {command.name}
+                          {command.vectorized && (
+                            <span className="badge badge-light">vec</span>
+                          )}
                         </div>
                       ))}
                   </div>
@@ -173,8 +173,21 @@ class Statistics extends React.PureComponent<StatisticsProps, StatisticsState> {
       }
     }
 
+    const metadata = this.props.result.metadata;
+    const pending = metadata !== undefined && metadata.pending === true;
+
     return (
       <div style={{fontSize: 12, color: '#5e5e5e'}}>
+        {pending && (
+          <div style={{marginBottom: 25}}>
+            <p>
+              <b>Profiling </b>
+            </p>
+            <p>
+              <i>Computing profiling results ...</i>
+            </p>
+          </div>
+        )}
         <div style={{marginBottom: 25}}>
           <p>
             <b>Updated columns </b>
@@ -12,10 +12,14 @@ import {
   AppliedOperator,
   Arg,
   CommandRef,
+  Delta,
   FunctionRef,
   FunctionSpec,
+  MetadataMessage,
   ProfilingResult,
+  ProgressMessage,
   RequestResult,
+  Row,
   SpreadsheetData,
 } from './types';
 import {DatasetSample} from './DatasetSample';
@@ -30,6 +34,7 @@ interface TableSampleState {
   result: RequestResult;
   appliedOperators: Operator[];
   recipeDialogStatus: boolean;
+  progress: ProgressMessage | null;
 }
 export interface Operator {
   name: string;
@@ -41,13 +46,28 @@ class SpreadSheet extends React.PureComponent<
   TableSampleState
 > {
   commSpreadsheetApi: CommAPI;
+  // Rows of adjacent pages that were prefetched by the server (keyed by the
+  // page offset).
+  prefetched: Map<number, Row[]>;
   constructor(props: TableSampleProps) {
     super(props);
     // Register callback handler for all messages received from the
     // spreadsheet API.
     this.commSpreadsheetApi = new CommAPI(
       'spreadsheet',
-      (msg: RequestResult) => {
+      (msg: RequestResult | MetadataMessage | ProgressMessage) => {
+        // Profiling results that were computed in the background are
+        // pushed in a separate message. Results are ignored if they are
+        // not for the snapshot that is currently pending.
+        if ('type' in msg && msg.type === 'metadata') {
+          this.onMetadata(msg);
+          return;
+        }
+        // Progress reports are pushed while a commit is running.
+        if ('type' in msg && msg.type === 'progress') {
+          this.setState({progress: msg});
+          return;
+        }
         // Each received message will contain the dataset identifier,
         // list  of column names, list of dataset rows, the row offset
         // and the total row count.
@@ -57,9 +77,22 @@ class SpreadSheet extends React.PureComponent<
         // received response. If present, the metadata object will have
         // the profling results (.profiling) and the list of applied
         // commands that define the history of the dataset (.log).
-        this.setState({result: {...this.state.result, ...msg}});
+        // Prefetched pages are only valid for the snapshot and view of the
+        // latest response.
+        const {prefetched, delta, ...result} = msg as RequestResult;
+        this.prefetched = new Map(
+          (prefetched || []).map(p => [p.offset, p.rows] as [number, Row[]])
+        );
+        // Delta responses only contain the changes with respect to the
+        // snapshot that is currently displayed.
+        const patch = delta !== undefined ? this.applyDelta(delta) : {};
+        this.setState({
+          result: {...this.state.result, ...result, ...patch},
+          progress: null,
+        });
       }
     );
+    this.prefetched = new Map();
     // Set the initial component state.
     this.state = {
       result: {
@@ -74,6 +107,7 @@ class SpreadSheet extends React.PureComponent<
       },
       appliedOperators: [],
       recipeDialogStatus: false,
+      progress: null,
     };
     // Initial call to the spreadsheet API that fetches the dataset schema,
     // the first 10 dataset rows, the profiling results (includeMetadata: true),
@@ -106,9 +140,76 @@ class SpreadSheet extends React.PureComponent<
     });
   }
 
+  /*
+   * Get the version of the displayed snapshot for delta responses. Returns
+   * undefined if the client does not display the latest snapshot.
+   */
+  knownVersion() {
+    const {version, snapshot} = this.state.result;
+    return version === null ? snapshot : undefined;
+  }
+
+  /*
+   * Patch the rows and metadata of the displayed snapshot with the changes
+   * in a delta response.
+   */
+  applyDelta(delta: Delta): Partial<RequestResult> {
+    const current = this.state.result;
+    const patch: Partial<RequestResult> = {};
+    if (delta.cells !== undefined) {
+      const rows = current.rows.map(row => ({...row, values: [...row.values]}));
+      delta.cells.forEach(cell => {
+        rows[cell.row].values[cell.column] = cell.value;
+      });
+      patch.rows = rows;
+    }
+    if (delta.metadata !== undefined) {
+      const {log, columns, profiling, ...rest} = delta.metadata;
+      const prev = current.metadata;
+      // Keep the log entries up to the known snapshot.
+      const known = prev
+        ? prev.log.filter(
+            e => e.id !== null && Number(e.id) <= delta.knownVersion
+          )
+        : [];
+      patch.metadata = {...rest, log: [...known, ...log]};
+      if (profiling !== undefined) {
+        const profiles = prev && prev.profiling ? [...prev.profiling.columns] : [];
+        (columns || []).forEach(c => {
+          profiles[c.column] = c.profile;
+        });
+        patch.metadata.profiling = {...profiling, columns: profiles};
+      }
+    }
+    return patch;
+  }
+
+  /*
+   * Update the profiling results for the pending dataset snapshot with the
+   * results from a pushed metadata message.
+   */
+  onMetadata(msg: MetadataMessage) {
+    const current = this.state.result.metadata;
+    if (!current || !current.pending || current.snapshot !== msg.snapshot) {
+      return;
+    }
+    if (msg.error !== undefined || msg.metadata === undefined) {
+      console.error(new Error(`Profiling failed: ${msg.error}`));
+      this.setState({
+        result: {
+          ...this.state.result,
+          metadata: {...current, pending: false},
+        },
+      });
+      return;
+    }
+    this.setState({result: {...this.state.result, metadata: msg.metadata}});
+  }
+
   /*
    * Create a spreadsheet data object that contains the column names and row
-   * sample together with the optional profiler results.
+   * sample together with the optional profiler results. Use empty column
+   * profiles while the profiling results are pending.
    */
   getSpreadsheetData(requestResult: RequestResult): SpreadsheetData {
     const columnNames = [requestResult.columns.map(col => col)];
@@ -121,6 +222,15 @@ class SpreadSheet extends React.PureComponent<
         id: profile.id,
         columns: profile.columns,
       };
+    } else if (requestResult.metadata) {
+      metadata = {
+        id: requestResult.metadata.snapshot,
+        columns: requestResult.columns.map(name => ({
+          name: name,
+          structural_type: '',
+          semantic_types: [],
+        })),
+      };
     }
 
     return {
@@ -209,6 +319,7 @@ class SpreadSheet extends React.PureComponent<
         fetch: {
           offset: this.state.result.offset,
           limit: limit,
+          knownVersion: this.knownVersion(),
         },
       };
       this.commSpreadsheetApi.call(payload);
@@ -229,6 +340,7 @@ class SpreadSheet extends React.PureComponent<
         fetch: {
           offset: this.state.result.offset,
           limit: limit,
+          knownVersion: this.knownVersion(),
         },
       };
     }
@@ -248,6 +360,7 @@ class SpreadSheet extends React.PureComponent<
       fetch: {
         offset: this.state.result.offset,
         limit: limit,
+        knownVersion: this.knownVersion(),
       },
     });
   }
@@ -256,12 +369,23 @@ class SpreadSheet extends React.PureComponent<
    * Fetch rows from the backend.
    */
   onPageClick(offset: number, limit: number) {
+    // Show prefetched rows right away. The response for the request replaces
+    // them and contains the prefetched pages for the new position.
+    const rows = this.prefetched.get(offset);
+    if (rows !== undefined) {
+      this.setState({result: {...this.state.result, offset: offset, rows: rows}});
+    }
+    // Rows are transferred in binary format and decoded by the CommAPI. The
+    // server prefetches the adjacent pages in the background.
     this.commSpreadsheetApi.call({
       dataset: this.props.data,
       fetch: {
         offset: offset,
         limit: limit,
         version: this.state.result.version,
+        format: 'binary',
+        prefetch: 1,
+        includePrefetched: true,
       },
     });
   }
@@ -290,6 +414,37 @@ class SpreadSheet extends React.PureComponent<
     });
   }
 
+  /*
+   * Render the progress of a running commit. Shows a progress bar once the
+   * total number of rows is known.
+   */
+  renderProgress(progress: ProgressMessage) {
+    const label = `Committing operation ${progress.step} of ${progress.steps}`;
+    if (progress.total === null) {
+      return (
+        <div className="small text-muted">
+          {label} ({progress.rows} rows)
+        </div>
+      );
+    }
+    const percent = Math.round(
+      (100 * ((progress.step - 1) * progress.total + progress.rows)) /
+        Math.max(progress.steps * progress.total, 1)
+    );
+    const eta = progress.eta !== null ? ` (${Math.ceil(progress.eta)}s left)` : '';
+    return (
+      <div className="small text-muted">
+        {label}
+        {eta}
+        <div className="progress">
+          <div className="progress-bar" style={{width: `${percent}%`}}>
+            {percent}%
+          </div>
+        </div>
+      </div>
+    );
+  }
+
   render() {
     const hit = this.getSpreadsheetData(this.state.result);
     const defaultLimit = 10;
@@ -297,6 +452,7 @@ class SpreadSheet extends React.PureComponent<
     return (
       <>
         <div className="mt-2">
+          {this.state.progress && this.renderProgress(this.state.progress)}
           <div className="d-flex flex-row">
             {this.state.result.metadata && (
               <Recipe
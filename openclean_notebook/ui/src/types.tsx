@@ -19,6 +19,92 @@ export interface RequestResult {
   metadata?: Metadata;
   library?: Library;
   version: string | null;
+  sortBy?: SortBy | null;
+  filter?: Predicate[] | null;
+  find?: FindResult;
+  prefetched?: PrefetchedPage[];
+  timings?: Timings;
+  capture?: number;
+  snapshot?: number;
+  delta?: Delta;
+}
+
+/*
+ * Changes with respect to the snapshot that is displayed by the client. The
+ * delta contains the changed cells in the visible window (if the window can
+ * be patched) and the new log entries and changed column profiles (if the
+ * schema did not change).
+ */
+export interface Delta {
+  knownVersion: number;
+  cells?: {row: number; id: number; column: number; value: string}[];
+  metadata?: {
+    log: OpProv[];
+    profiling?: Omit<ProfilingResult, 'columns'>;
+    columns?: {column: number; profile: ColumnMetadata}[];
+    pending?: boolean;
+    snapshot?: number;
+  };
+}
+
+/*
+ * Page of rows that was prefetched by the server and piggy-backed on a
+ * response.
+ */
+export interface PrefetchedPage {
+  offset: number;
+  rows: Row[];
+}
+
+/*
+ * Timing metadata for a request. Contains the time (in seconds) for each
+ * phase of processing the request and the byte counts for the request and
+ * the binary buffers of the response. Includes the hit rate of the
+ * server-side page cache if read-ahead was requested.
+ */
+export interface Timings {
+  phases: {[phase: string]: number};
+  bytes: {[counter: string]: number};
+  total: number;
+  prefetch?: {
+    depth: number;
+    hit: boolean;
+    hits: number;
+    misses: number;
+    hitRate: number;
+  };
+}
+
+/*
+ * Predicate on the values in a single column. Only rows that satisfy all
+ * predicates are included in a filtered spreadsheet view.
+ */
+export interface Predicate {
+  column: number | string;
+  op: 'contains' | 'eq' | 'null' | 'prefix' | 'range' | 'regex';
+  value?: boolean | number | string;
+  min?: number | string;
+  max?: number | string;
+  negate?: boolean;
+}
+
+/*
+ * Cells in a spreadsheet view that match the predicate of a find request.
+ * Each cell is identified by the row position in the view, the unique row
+ * identifier, and the column index.
+ */
+export interface FindResult {
+  count: number;
+  matches: {row: number; id: number; column: number}[];
+}
+
+/*
+ * Sort order for the rows in a spreadsheet view. The sort column is identified
+ * by its index position or name.
+ */
+export interface SortBy {
+  column: number | string;
+  descending?: boolean;
 }
 
 // -- Dataset -----------------------------------------------------------------
@@ -68,6 +154,7 @@ export interface FunctionSpec {
   namespace?: string;
   outputs: number;
   parameters: ParameterSpec[];
+  vectorized?: boolean;
 }
 
 /*
@@ -120,9 +207,45 @@ export interface FunctionRef {
 
 // -- Metadata ----------------------------------------------------------------
 
+/*
+ * Profiling results and the dataset history. If the profiler is run in the
+ * background the profiling results are missing and the pending flag is set.
+ * The results are sent later in a separate metadata message for the snapshot
+ * with the given version.
+ */
 export interface Metadata {
-  profiling: ProfilingResult;
+  profiling?: ProfilingResult;
   log: OpProv[];
+  pending?: boolean;
+  snapshot?: number;
+}
+
+/*
+ * Message that is pushed by the spreadsheet API when the profiling results for
+ * a dataset snapshot are available.
+ */
+export interface MetadataMessage {
+  type: 'metadata';
+  dataset: Dataset;
+  snapshot: number;
+  metadata?: Metadata;
+  error?: string;
+}
+
+/*
+ * Progress report for a commit action that is pushed by the spreadsheet API
+ * after each processed chunk of rows. The total number of rows and the
+ * estimated remaining time (in seconds) are null while they are unknown.
+ */
+export interface ProgressMessage {
+  type: 'progress';
+  dataset: Dataset;
+  action: 'commit';
+  step: number;
+  steps: number;
+  rows: number;
+  total: number | null;
+  eta: number | null;
 }
 
 /*
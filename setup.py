@@ -32,12 +32,16 @@ tests_require = [
 dev_require = ['flake8', 'python-language-server'] + tests_require
 
 
+benchmarks_require = ['pytest-benchmark'] + tests_require
+
+
 extras_require = {
     'docs': [
         'Sphinx',
         'sphinx-rtd-theme'
     ],
     'tests': tests_require,
+    'benchmarks': benchmarks_require,
     'dev': dev_require,
     'jupyter': ['jupyter']
 }
@@ -7,6 +7,10 @@
 
 """Unit tests for the datamart profiler."""
 
+import numpy as np
+import pandas as pd
+import pytest
+
 from openclean_notebook.metadata.datamart import DatamartProfiler
 
 
@@ -19,3 +23,30 @@ def test_profile_dataset(dataset):
     profile = DatamartProfiler().profile(dataset, columns=['A', 'C'])
     assert len(profile['columns']) == 2
     assert profile['attribute_keywords'] == ['A', 'C']
+
+
+def test_profile_sample():
+    """Test profiling a sample of the rows in a dataset."""
+    df = pd.DataFrame(data={'A': np.arange(1000), 'B': ['x', 'y'] * 500})
+    profile = DatamartProfiler(max_rows=100, random_state=42).profile(df)
+    assert profile['nb_rows'] == 1000
+    assert profile['nb_profiled_rows'] == 100
+    assert profile['approximate']
+    profiler = DatamartProfiler(max_rows=100, sampling='stratified', stratify='B')
+    profile = profiler.profile(df, columns=['A'])
+    assert profile['nb_profiled_rows'] == 100
+    assert len(profile['columns']) == 1
+    # No sampling for small datasets.
+    profile = DatamartProfiler(max_rows=1000).profile(df)
+    assert profile['nb_profiled_rows'] == 1000
+    assert not profile['approximate']
+
+
+@pytest.mark.parametrize(
+    'args',
+    [{'max_rows': 0}, {'sampling': 'unknown'}, {'sampling': 'stratified'}]
+)
+def test_invalid_profiler_options(args):
+    """Test error cases for invalid sampling options."""
+    with pytest.raises(ValueError):
+        DatamartProfiler(**args)
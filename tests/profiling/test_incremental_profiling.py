@@ -0,0 +1,130 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for column-granular profiling of dataset snapshots."""
+
+import pandas as pd
+import pytest
+
+from openclean.engine.object.function import Int
+
+from openclean_notebook.controller.spreadsheet.base import spreadsheet_api
+from openclean_notebook.engine import DB
+from openclean_notebook.metadata.datamart import DatamartProfiler, column_key
+
+import openclean_notebook.controller.spreadsheet.data as ds
+
+
+@pytest.fixture
+def profiled(monkeypatch):
+    """Record the columns that are passed to the datamart profiler."""
+    calls = list()
+    profile = DatamartProfiler.profile
+
+    def recorder(self, df, columns=None):
+        calls.append([df.columns[c] for c in columns])
+        return profile(self, df, columns=columns)
+
+    monkeypatch.setattr(DatamartProfiler, 'profile', recorder)
+    return calls
+
+
+def test_column_key():
+    """Test content fingerprints for data frame columns."""
+    df = pd.DataFrame(data=[[1, 'a', 1], [2, 'b', 1]], columns=['A', 'B', 'C'])
+    assert column_key(df['A']) == column_key(df['A'].copy().rename('X'))
+    assert column_key(df['A']) != column_key(df['B'])
+    assert column_key(df['A']) != column_key(df['C'])
+    assert column_key(df['A']) != column_key(df['A'].iloc[:1])
+
+
+def test_incremental_profiling(dataset, profiled):
+    """Test that only modified columns are profiled after an action."""
+    engine = DB()
+    engine.register.eval('myadd', parameters=[Int('value', default=1)])(lambda n, value=1: n + value)
+    engine.create(source=dataset, name='DS', primary_key='A')
+    handle = ds.serialize(name='DS', engine=engine.identifier)
+    # -- Profile the initial snapshot --
+    doc = spreadsheet_api({'dataset': handle, 'fetch': {'includeMetadata': True}})
+    assert profiled == [['A', 'B', 'C']]
+    profiling = doc['metadata']['profiling']
+    assert profiling['nb_rows'] == 4
+    assert [c['name'] for c in profiling['columns']] == ['A', 'B', 'C']
+    # -- Update column 'B' --
+    args = [{'name': 'value', 'value': 10}]
+    action = {'type': 'update', 'payload': {'columns': [1], 'func': {'name': 'myadd'}, 'args': args}}
+    doc = spreadsheet_api({'dataset': handle, 'fetch': {}, 'action': action})
+    assert profiled[1:] == [['B']]
+    profiling = doc['metadata']['profiling']
+    assert [c['name'] for c in profiling['columns']] == ['A', 'B', 'C']
+    assert profiling['nb_numerical_columns'] == 3
+    assert profiling['types'] == ['numerical']
+    # -- Insert a column with a constant value --
+    action = {'type': 'inscol', 'payload': {'names': ['D'], 'pos': 0, 'values': [5]}}
+    doc = spreadsheet_api({'dataset': handle, 'fetch': {}, 'action': action})
+    assert profiled[2:] == [['D']]
+    profiling = doc['metadata']['profiling']
+    assert [c['name'] for c in profiling['columns']] == ['D', 'A', 'B', 'C']
+    assert profiling['nb_columns'] == 4
+    # -- Rollback reuses profiles by column content --
+    version = doc['metadata']['log'][-2]['id']
+    action = {'type': 'rollback', 'payload': version}
+    doc = spreadsheet_api({'dataset': handle, 'fetch': {}, 'action': action})
+    assert len(profiled) == 3
+    assert [c['name'] for c in doc['metadata']['profiling']['columns']] == ['A', 'B', 'C']
+
+
+def test_update_without_change(dataset, profiled):
+    """Test that profiles are reused if an update does not modify the column
+    content.
+    """
+    engine = DB()
+    engine.register.eval('same')(lambda n: n)
+    engine.create(source=dataset, name='DS', primary_key='A')
+    handle = ds.serialize(name='DS', engine=engine.identifier)
+    spreadsheet_api({'dataset': handle, 'fetch': {'includeMetadata': True}})
+    action = {'type': 'update', 'payload': {'columns': [2], 'func': {'name': 'same'}}}
+    doc = spreadsheet_api({'dataset': handle, 'fetch': {}, 'action': action})
+    assert profiled == [['A', 'B', 'C']]
+    assert len(doc['metadata']['profiling']['columns']) == 3
+
+
+def test_engine_profiler(profiled):
+    """Test profiling a sample of rows with the profiler of an engine."""
+    df = pd.DataFrame(data={'A': range(100), 'B': ['x', 'y'] * 50})
+    engine = DB(profiler=DatamartProfiler(max_rows=10, random_state=42))
+    engine.create(source=df, name='DS', primary_key='A')
+    handle = ds.serialize(name='DS', engine=engine.identifier)
+    doc = spreadsheet_api({'dataset': handle, 'fetch': {'includeMetadata': True}})
+    profiling = doc['metadata']['profiling']
+    assert profiling['nb_rows'] == 100
+    assert profiling['nb_profiled_rows'] == 10
+    assert profiling['approximate']
+
+
+def test_profiles_after_unprofiled_snapshot(profiled):
+    """Test that columns are not reused by name if a snapshot in between was
+    not profiled.
+    """
+    engine = DB()
+    engine.register.eval('const')(lambda v: 'Q')
+    engine.register.eval('same')(lambda v: v)
+    df = pd.DataFrame(data=[[1, 'a'], [2, 'b'], [3, 'c'], [4, 'd']], columns=['A', 'B'])
+    engine.create(source=df, name='DS', primary_key='A')
+    handle = ds.serialize(name='DS', engine=engine.identifier)
+    # -- Profile the initial snapshot --
+    spreadsheet_api({'dataset': handle, 'fetch': {'includeMetadata': True}})
+    # -- Update column 'B' without profiling the snapshot --
+    action = {'type': 'update', 'payload': {'columns': [1], 'func': {'name': 'const'}}}
+    doc = spreadsheet_api({'dataset': handle, 'fetch': {'includeMetadata': False}, 'action': action})
+    assert 'metadata' not in doc
+    # -- Update column 'A' and profile the snapshot --
+    action = {'type': 'update', 'payload': {'columns': [0], 'func': {'name': 'same'}}}
+    doc = spreadsheet_api({'dataset': handle, 'fetch': {'includeMetadata': True}, 'action': action})
+    assert profiled[1:] == [['B']]
+    profile = doc['metadata']['profiling']['columns'][1]
+    assert profile['num_distinct_values'] == 1
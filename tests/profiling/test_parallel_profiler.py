@@ -0,0 +1,88 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for the parallel datamart profiler."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from openclean_notebook.metadata.datamart import DatamartProfiler
+from openclean_notebook.metadata.parallel import (
+    ParallelProfiler, decode_values, share_columns
+)
+
+import openclean_notebook.metadata.parallel as parallel
+
+
+@pytest.fixture
+def mixed():
+    """Data frame with columns of different data types."""
+    return pd.DataFrame(data={
+        'int': [1, 2, 3, 4, 5, 6],
+        'float': [1.5, np.nan, 2.5, 3.0, 4.0, 5.0],
+        'bool': [True, False, True, True, False, False],
+        'date': pd.to_datetime(['2020-01-01'] * 6),
+        'str': ['a', None, 'ü', 'b', 'a', 'c'],
+        'mixed': [1, 'x', 2.5, None, 'x', 1]
+    })
+
+
+def test_parallel_profiler(mixed):
+    """Test that parallel profiling returns the same column profiles as the
+    sequential profiler.
+    """
+    expected = DatamartProfiler().profile(mixed)
+    profiler = ParallelProfiler(workers=2)
+    try:
+        profile = profiler.profile(mixed)
+        assert profile['nb_rows'] == 6
+        assert profile['nb_profiled_rows'] == 6
+        assert profile['nb_columns'] == 6
+        assert profile['columns'] == expected['columns']
+        assert profile['types'] == expected['types']
+        # Profile a subset of the columns.
+        profile = profiler.profile(mixed, columns=['str', 'int', 'float'])
+        assert [c['name'] for c in profile['columns']] == ['str', 'int', 'float']
+    finally:
+        profiler.close()
+
+
+def test_pickled_partitions(mixed, monkeypatch):
+    """Test parallel profiling without shared memory (Python 3.7)."""
+    expected = DatamartProfiler().profile(mixed)
+    monkeypatch.setattr(parallel, 'shared_memory', None)
+    with ParallelProfiler(workers=2) as profiler:
+        profile = profiler.profile(mixed)
+        pool = profiler._pool
+    assert profile['columns'] == expected['columns']
+    # The process pool is shut down when leaving the context.
+    assert profiler._pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(print)
+
+
+@pytest.mark.skipif(parallel.shared_memory is None, reason='requires shared memory')
+def test_shared_columns(mixed):
+    """Test copying data frame columns to shared memory and back."""
+    shm, layout = share_columns(mixed, columns=list(range(6)))
+    try:
+        columns = [decode_values(shm.buf, desc) for desc in layout]
+    finally:
+        shm.close()
+        shm.unlink()
+    assert [c.name for c in columns] == list(mixed.columns)
+    assert list(columns[0]) == [1, 2, 3, 4, 5, 6]
+    assert columns[1].isna().sum() == 1
+    assert list(columns[4]) == ['a', '', 'ü', 'b', 'a', 'c']
+    assert list(columns[5]) == ['1', 'x', '2.5', '', 'x', '1']
+
+
+def test_invalid_worker_count():
+    """Test error case for invalid number of workers."""
+    with pytest.raises(ValueError):
+        ParallelProfiler(workers=0)
@@ -0,0 +1,114 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for the persistent cache of column profiles."""
+
+import json
+import os
+import pytest
+import time
+
+from openclean_notebook.controller.spreadsheet.base import spreadsheet_api
+from openclean_notebook.engine import DB
+from openclean_notebook.metadata.cache import ProfileCache, profiler_key
+from openclean.profiling.dataset import Profiler
+from openclean_notebook.metadata.datamart import DatamartProfiler
+from openclean_notebook.metadata.parallel import ParallelProfiler
+
+import openclean_notebook.controller.spreadsheet.data as ds
+
+
+class OptionProfiler(Profiler):
+    """Profiler with a single option and without cache options."""
+    def __init__(self, option):
+        self.option = option
+
+    def profile(self, df, columns=None):
+        return dict()
+
+
+@pytest.fixture
+def profiled(monkeypatch):
+    """Record the columns that are passed to the datamart profiler."""
+    calls = list()
+    profile = DatamartProfiler.profile
+
+    def recorder(self, df, columns=None):
+        calls.append([df.columns[c] for c in columns])
+        return profile(self, df, columns=columns)
+
+    monkeypatch.setattr(DatamartProfiler, 'profile', recorder)
+    return calls
+
+
+def test_profile_cache_entries(tmpdir):
+    """Test adding, reading, and evicting cache entries."""
+    basedir = os.path.join(str(tmpdir), 'profiles')
+    entry = {'nbProfiledRows': 10, 'profile': {'structural_type': 'integer'}}
+    size = len(json.dumps(entry))
+    cache = ProfileCache(basedir=basedir, capacity=2 * size)
+    assert cache.get('A', 'P') is None
+    cache.put('A', 'P', entry)
+    assert cache.get('A', 'P') == entry
+    assert cache.get('A', 'Q') is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+    # -- Entries persist across cache instances --
+    cache = ProfileCache(basedir=basedir, capacity=2 * size)
+    assert cache.size == size
+    assert cache.get('A', 'P') == entry
+    # -- Least recently used entries are evicted --
+    cache.put('B', 'P', entry)
+    time.sleep(0.01)
+    assert cache.get('A', 'P') is not None
+    cache.put('C', 'P', entry)
+    assert cache.stats.evictions == 1
+    assert cache.size == 2 * size
+    assert cache.get('B', 'P') is None
+    assert cache.get('A', 'P') is not None
+    assert cache.get('C', 'P') is not None
+    # -- Entries that exceed the capacity are not cached --
+    ProfileCache(basedir=basedir, capacity=0).put('D', 'P', entry)
+    assert cache.get('D', 'P') is None
+
+
+def test_profiler_key():
+    """Test fingerprints for profiler options."""
+    assert profiler_key(DatamartProfiler()) == profiler_key(DatamartProfiler())
+    assert profiler_key(DatamartProfiler()) != profiler_key(DatamartProfiler(max_rows=10))
+    # The number of workers does not affect the profiling results.
+    assert profiler_key(ParallelProfiler(workers=2)) == profiler_key(ParallelProfiler(workers=3))
+    assert profiler_key(ParallelProfiler(workers=2)) != profiler_key(ParallelProfiler(workers=2, max_rows=10))
+    # Public scalar attributes are used for profilers without cache options.
+    assert profiler_key(OptionProfiler(1)) == profiler_key(OptionProfiler(1))
+    assert profiler_key(OptionProfiler(1)) != profiler_key(OptionProfiler(2))
+
+
+def test_shared_profiles(dataset, profiled, tmpdir):
+    """Test reusing cached profiles across engines and datasets."""
+    basedir = str(tmpdir)
+    engine = DB(basedir=basedir, create=True)
+    engine.create(source=dataset, name='DS', primary_key='A')
+    handle = ds.serialize(name='DS', engine=engine.identifier)
+    doc = spreadsheet_api({'dataset': handle, 'fetch': {'includeMetadata': True}})
+    assert profiled == [['A', 'B', 'C']]
+    profiles = doc['metadata']['profiling']['columns']
+    # -- A dataset with identical content in a new engine reuses the profiles --
+    engine = DB(basedir=basedir)
+    df = dataset.rename(columns={'C': 'D'})
+    df['B'] = df['B'] * 10
+    engine.create(source=df, name='DS2')
+    handle = ds.serialize(name='DS2', engine=engine.identifier)
+    doc = spreadsheet_api({'dataset': handle, 'fetch': {'includeMetadata': True}})
+    assert profiled[1:] == [['B']]
+    columns = doc['metadata']['profiling']['columns']
+    assert [c['name'] for c in columns] == ['A', 'B', 'D']
+    assert dict(columns[2], name='C') == profiles[2]
+    assert engine.profile_cache.stats.hits == 2
+    # -- The cache can be disabled --
+    engine = DB(basedir=basedir, profile_cache_size=0)
+    assert engine.profile_cache is None
+    assert DB().profile_cache is None
@@ -0,0 +1,95 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for the serialization of data frame rows."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import openclean_notebook.controller.spreadsheet.data as ds
+
+
+@pytest.fixture
+def mixed():
+    """Data frame with columns of different types and missing values."""
+    return pd.DataFrame(
+        data={
+            'A': [1, 2, 3],
+            'B': [1.5, np.nan, 2.5],
+            'C': ['x', None, np.nan],
+            'D': pd.to_datetime(['2021-01-01', None, '2021-01-03']),
+            'E': [True, False, True],
+            'F': pd.array([1, None, 3], dtype='Int64')
+        },
+        index=[10, 11, 12]
+    )
+
+
+def test_fetch_columns(mixed):
+    """Test column-major serialization of data frame rows."""
+    data = ds.fetch_columns(mixed, offset=1, end=3)
+    assert data['index'] == [11, 12]
+    assert data['values'][0] == [2, 3]
+    assert data['values'][1] == [None, 2.5]
+    assert data['values'][2] == [None, None]
+    assert data['values'][3] == [None, '2021-01-03']
+    assert data['values'][4] == [False, True]
+    assert data['values'][5] == [None, 3]
+    # Ensure that NumPy scalars are converted.
+    assert type(data['index'][0]) is int
+    assert type(data['values'][0][0]) is int
+    assert type(data['values'][4][0]) is bool
+
+
+def test_fetch_rows(mixed):
+    """Test row-major serialization of data frame rows."""
+    rows = ds.fetch_rows(mixed, offset=0, end=2)
+    assert rows == [
+        {'id': 10, 'values': [1, 1.5, 'x', '2021-01-01', True, 1]},
+        {'id': 11, 'values': [2, None, None, None, False, None]}
+    ]
+    # Data frame without columns.
+    rows = ds.fetch_rows(pd.DataFrame(index=[0, 1]), offset=0, end=2)
+    assert rows == [{'id': 0, 'values': []}, {'id': 1, 'values': []}]
+
+
+def decode(desc, buffers):
+    """Decode column values from a binary buffer descriptor."""
+    if desc['type'] == 'json':
+        return desc['values']
+    elif desc['type'] == 'null':
+        return [None] * desc['length']
+    elif desc['type'] == 'utf8':
+        offsets = np.frombuffer(buffers[desc['offsets']], dtype='<i4')
+        data = bytes(buffers[desc['data']])
+        values = [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(desc['length'])]
+    elif desc['type'] == 'bool':
+        values = [bool(v) for v in np.frombuffer(buffers[desc['data']], dtype=np.uint8)]
+    else:
+        dtype = np.dtype(desc['type']).newbyteorder('<')
+        values = np.frombuffer(buffers[desc['data']], dtype=dtype).tolist()
+        values = [None if v != v else v for v in values]
+    if 'validity' in desc:
+        validity = np.frombuffer(buffers[desc['validity']], dtype=np.uint8)
+        values = [v if valid else None for v, valid in zip(values, validity)]
+    return values
+
+
+def test_fetch_buffers(mixed):
+    """Test binary serialization of data frame rows."""
+    mixed['G'] = pd.Series([1, None, 3], dtype=object, index=mixed.index)
+    mixed['H'] = pd.Series(['a', 1, 2.5], dtype=object, index=mixed.index)
+    mixed['I'] = pd.Series([None, None, None], dtype=object, index=mixed.index)
+    mixed['J'] = pd.Series(['ä', 'b', None], dtype=object, index=mixed.index)
+    doc, buffers = ds.fetch_buffers(mixed, offset=0, end=3)
+    assert doc['encoding'] == 'binary'
+    assert decode(doc['index'], buffers) == [10, 11, 12]
+    columns = [decode(desc, buffers) for desc in doc['values']]
+    assert columns == ds.fetch_columns(mixed, offset=0, end=3)['values']
+    types = [desc['type'] for desc in doc['values']]
+    assert types == ['int64', 'float64', 'utf8', 'utf8', 'bool', 'int64', 'int64', 'json', 'null', 'utf8']
@@ -0,0 +1,56 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for serializing and prefetching pages of dataset views."""
+
+import json
+import numpy as np
+
+from openclean_notebook.controller.spreadsheet.prefetch import (
+    adjacent_offsets, page_key, prefetch_pages, serialize_page
+)
+from openclean_notebook.engine import DB
+
+import openclean_notebook.controller.spreadsheet.data as ds
+
+
+def test_adjacent_offsets():
+    """Test getting the offsets of adjacent pages."""
+    assert adjacent_offsets(offset=0, limit=10, row_count=100, depth=2) == [10, 20]
+    assert adjacent_offsets(offset=50, limit=10, row_count=100, depth=2) == [60, 40, 70, 30]
+    assert adjacent_offsets(offset=90, limit=10, row_count=100, depth=1) == [80]
+    assert adjacent_offsets(offset=0, limit=10, row_count=5, depth=3) == []
+
+
+def test_serialize_page(dataset):
+    """Test serializing pages of views in different formats."""
+    page = serialize_page(df=dataset, view=None, offset=1, limit=2, data_format='rows')
+    assert page.doc == {'rows': ds.fetch_rows(dataset, offset=1, end=3)}
+    assert page.buffers is None
+    view = np.array([3, 1, 0, 2])
+    page = serialize_page(df=dataset, view=view, offset=1, limit=5, data_format='columns')
+    assert page.doc['data']['index'] == [1, 0, 2]
+    page = serialize_page(df=dataset, view=None, offset=3, limit=2, data_format='binary')
+    assert page.doc['data']['encoding'] == 'binary'
+    assert len(page.buffers) == 4
+    assert page.nbytes > sum(b.nbytes for b in page.buffers)
+    # The size of pages in Json formats is estimated from the page rows.
+    page = serialize_page(df=dataset, view=None, offset=0, limit=4, data_format='rows')
+    assert page.nbytes >= len(json.dumps(page.doc))
+
+
+def test_stale_prefetch(dataset):
+    """Test that pages which are prefetched for a modified dataset are never
+    served.
+    """
+    engine = DB()
+    engine.create(source=dataset, name='DS')
+    key = page_key(engine, 'DS', 0, filters=None, sort_by=None, data_format='rows', offset=0, limit=1)
+    engine.invalidate('DS')
+    prefetch_pages(engine.pages, df=dataset, view=None, pages=[(key, 0)], limit=1, data_format='rows')
+    assert key in engine.pages
+    assert page_key(engine, 'DS', 0, filters=None, sort_by=None, data_format='rows', offset=0, limit=1) != key
@@ -7,11 +7,18 @@
 
 """Unit test for the spreadsheet API request validator."""
 
+from jsonschema import Draft7Validator, RefResolver
 from jsonschema.exceptions import ValidationError
 
+import importlib.resources as pkg_resources
+import json
+import os
 import pytest
 
 from openclean_notebook.controller.spreadsheet.base import validator
+from openclean_notebook.controller.spreadsheet.validation import compile_schema, inline_refs
+
+import openclean_notebook.controller.spreadsheet as pkg
 
 import openclean_notebook.controller.spreadsheet.data as ds
 
@@ -49,7 +56,13 @@ def test_invalid_dataset_in_requests(locator):
 
 @pytest.mark.parametrize(
     'fetch',
-    [{'limit': 0}, {'offset': -1}, {'includeMetadata': 1}, {'includeLibrary': 'Yes'}]
+    [
+        {'limit': 0},
+        {'offset': -1},
+        {'includeMetadata': 1},
+        {'includeLibrary': 'Yes'},
+        {'format': 'xml'}
+    ]
 )
 def test_invalid_fetch_in_requests(fetch):
     """Test errors when validating a request with a invalid fetch query."""
@@ -81,7 +94,8 @@ ARGS = [{'name': 'a', 'value': 1}, {'name': 'b', 'value': ['A', 'B']}]
         {'limit': 10},
         {'offset': 0},
         {'limit': 1, 'offset': 10},
-        {'limit': 1, 'offset': 10, 'includeMetadata': True, 'includeLibrary': False}
+        {'limit': 1, 'offset': 10, 'includeMetadata': True, 'includeLibrary': False},
+        {'format': 'columns'}
     ]
 )
 def test_valid_requests(action, fetch):
@@ -90,3 +104,86 @@ def test_valid_requests(action, fetch):
     if action is not None:
         req['action'] = action
     validator.validate(req)
+
+
+@pytest.mark.parametrize(
+    'req',
+    [
+        {'dataset': {'database': 'ABC', 'name': 'XYZ'}, 'fetch': {'limit': 1.0}},
+        {'dataset': {'database': 'ABC', 'name': 'XYZ'}, 'fetch': {'offset': True}},
+        {'dataset': {'database': 'ABC'}, 'fetch': {}},
+        {'dataset': {'database': 'ABC', 'name': 'XYZ'}, 'fetch': {'format': 'xml'}},
+        {'dataset': {'database': 'ABC', 'name': 'XYZ'}, 'fetch': {}, 'action': {'type': 'unknown'}},
+        {'dataset': {'database': 'ABC', 'name': 'XYZ'}},
+        []
+    ]
+)
+def test_identical_errors(req):
+    """Test that the request validator reports the same errors as the Json
+    schema validator with reference resolution.
+    """
+    schemafile = 'file:///{}'.format(os.path.abspath(os.path.join(pkg.__file__, 'schema.json')))
+    schema = json.load(pkg_resources.open_text(pkg, 'schema.json'))
+    resolver = RefResolver(schemafile, schema)
+    expected = Draft7Validator(schema=schema['definitions']['request'], resolver=resolver)
+    assert validator.is_valid(req) == expected.is_valid(req)
+    errors = [str(e) for e in validator.iter_errors(req)]
+    assert errors == [str(e) for e in expected.iter_errors(req)]
+    if errors:
+        with pytest.raises(ValidationError) as ex:
+            validator.validate(req)
+        assert str(ex.value) == errors[0]
+
+
+@pytest.mark.parametrize(
+    'fetch',
+    [{}, {'limit': 10, 'offset': 20}, {'version': None, 'format': 'binary', 'includeMetadata': False}]
+)
+def test_fast_path_for_fetch_requests(fetch):
+    """Test that fetch-only requests are accepted by the compiled predicate."""
+    req = {'dataset': {'database': 'ABC', 'name': 'XYZ'}, 'fetch': fetch}
+    assert validator.accept(req)
+    # Requests with actions are not accepted by the predicate.
+    req['action'] = {'type': 'commit'}
+    assert not validator.accept(req)
+    validator.validate(req)
+
+
+def test_compile_schema():
+    """Test compiling simple Json schemas into predicates."""
+    f = compile_schema({'type': 'integer', 'minimum': 1})
+    assert f(1) and f(10)
+    assert not f(0) and not f(True) and not f('1')
+    f = compile_schema({'enum': [1, 'a']})
+    assert f(1) and f('a')
+    assert not f(True) and not f(1.0)
+    f = compile_schema({'anyOf': [{'type': 'null'}, {'type': 'string'}]})
+    assert f(None) and f('a') and not f(1)
+    f = compile_schema({'type': 'array', 'items': {'type': 'string'}})
+    assert f([]) and f(['a']) and not f([1])
+    f = compile_schema({'type': 'array', 'minItems': 1})
+    assert f([1]) and not f([])
+    f = compile_schema({
+        'type': 'object',
+        'properties': {'a': {'type': 'integer'}, 'b': {'oneOf': [{'type': 'integer'}]}},
+        'required': ['a'],
+        'additionalProperties': False
+    })
+    assert f({'a': 1})
+    assert not f({'a': 1, 'b': 1}) and not f({'a': 1, 'c': 1}) and not f({})
+    # Unsupported keywords.
+    assert compile_schema({'oneOf': [{'type': 'integer'}]}) is None
+    assert compile_schema({'type': 'string', 'pattern': '^a'}) is None
+
+
+def test_inline_refs():
+    """Test inlining references to schema definitions."""
+    definitions = {
+        'a': {'type': 'integer'},
+        'b': {'type': 'array', 'items': {'$ref': '#/definitions/a'}},
+        'c': {'anyOf': [{'type': 'null'}, {'$ref': '#/definitions/c'}]}
+    }
+    schema = inline_refs({'$ref': '#/definitions/b'}, definitions)
+    assert schema == {'type': 'array', 'items': {'type': 'integer'}}
+    schema = inline_refs({'$ref': '#/definitions/c'}, definitions)
+    assert schema == {'anyOf': [{'type': 'null'}, {'$ref': '#/definitions/c'}]}
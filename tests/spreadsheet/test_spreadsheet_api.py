@@ -7,21 +7,28 @@
 
 """Unit tests for the spreadsheet API."""
 
-from jsonschema import Draft7Validator, RefResolver
+from jsonschema import Draft7Validator, RefResolver, ValidationError
 from typing import Dict, Optional
+from unittest import mock
 
 import importlib.resources as pkg_resources
 import json
+import numpy as np
 import os
+import pandas as pd
 import pytest
+import threading
 
 from openclean.engine.object.function import Int
 
+from openclean_notebook.compact import expand_frame
 from openclean_notebook.controller.spreadsheet.base import spreadsheet_api
 from openclean_notebook.engine import DB
+from openclean_notebook.metrics import registry
 
 import openclean_notebook.controller.spreadsheet as pkg
 import openclean_notebook.controller.spreadsheet.data as ds
+import openclean_notebook.controller.spreadsheet.delta as delta
 
 
 # -- Helper functions ---------------------------------------------------------
@@ -206,3 +213,567 @@ def test_unknown_parameter(engine, validator):
     }
     with pytest.raises(ValueError):
         spreadsheet_api(request(handle, fetch={}, action=action))
+
+
+def test_snapshot_cache(engine, dataset):
+    """Test serving snapshots from the engine cache and invalidating cached
+    snapshots after an action.
+    """
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    # -- Repeated fetches are served from the cache --
+    spreadsheet_api(request(handle, fetch={'limit': 2}))
+    spreadsheet_api(request(handle, fetch={'limit': 2, 'offset': 2}))
+    stats = engine.cache_stats()
+    assert stats.misses == 1
+    assert stats.hits == 1
+    # -- Actions invalidate the cached snapshots --
+    action = {'type': 'inscol', 'payload': {'names': ['D'], 'values': [5]}}
+    doc = spreadsheet_api(request(handle, fetch={}, action=action))
+    assert doc['columns'] == ['A', 'B', 'C', 'D']
+    assert engine.cache_stats().misses == 2
+    # -- Disable the cache --
+    engine = DB(cache_size=0)
+    engine.create(source=dataset, name=DS_NAME)
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    spreadsheet_api(request(handle, fetch={}))
+    spreadsheet_api(request(handle, fetch={}))
+    assert engine.cache_stats().hits == 0
+
+
+def test_fetch_columns_format(engine, validator):
+    """Test fetching rows in column-major format."""
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    # -- Fetch rows as columns --
+    doc = spreadsheet_api(request(handle, fetch={'format': 'columns', 'limit': 3}))
+    validator.validate(doc)
+    assert 'rows' not in doc
+    assert doc['data']['index'] == [0, 1, 2]
+    assert doc['data']['values'] == [[1, 3, 5], [2, 4, 6], [3, 5, 7]]
+
+
+def test_fetch_binary_format(engine, validator):
+    """Test fetching rows as binary buffers."""
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    # -- Fetch rows as binary buffers --
+    doc = spreadsheet_api(request(handle, fetch={'format': 'binary', 'limit': 3}))
+    validator.validate(doc)
+    assert doc['data']['encoding'] == 'binary'
+    assert len(doc['data']['values']) == 3
+    assert len(doc.buffers) == 4
+
+
+def test_batch_request(dataset):
+    """Test processing a batch of requests with shared snapshots."""
+    # -- Setup --
+    engine = DB(cache_size=0)
+    engine.create(source=dataset, name=DS_NAME)
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    schemafile = os.path.abspath(os.path.join(pkg.__file__, "schema.json"))
+    schema = json.load(pkg_resources.open_text(pkg, 'schema.json'))
+    validator = Draft7Validator(
+        schema=schema['definitions']['batchResponse'],
+        resolver=RefResolver(schemafile, schema)
+    )
+    # -- Binary responses share a single buffer list --
+    batch = [
+        request(handle, fetch={'format': 'binary', 'limit': 2}),
+        request(handle, fetch={'format': 'binary', 'limit': 2, 'offset': 2}),
+        request(handle, fetch={'includeLibrary': True})
+    ]
+    with mock.patch.object(engine, 'snapshot', wraps=engine.snapshot) as snapshot:
+        doc = spreadsheet_api({'batch': batch})
+        assert snapshot.call_count == 1
+    validator.validate(doc)
+    assert doc['type'] == 'batch'
+    assert len(doc['batch']) == 3
+    assert len(doc.buffers) == 8
+    first, second, third = doc['batch']
+    assert first['data']['values'][0]['data'] == 1
+    assert second['data']['values'][0]['data'] == 5
+    assert second['offset'] == 2
+    assert 'library' in third
+    assert bytes(doc.buffers[5]) == bytes(ds.fetch_buffers(dataset, offset=2, end=4)[1][1])
+    # -- Actions invalidate shared snapshots --
+    action = {'type': 'inscol', 'payload': {'names': ['D'], 'values': [5]}}
+    doc = spreadsheet_api({
+        'batch': [
+            request(handle, fetch={}),
+            request(handle, fetch={}, action=action),
+            request(handle, fetch={})
+        ]
+    })
+    assert 'buffers' not in doc
+    assert [len(r['columns']) for r in doc['batch']] == [3, 4, 4]
+    # -- All requests are validated before the first request is processed --
+    with pytest.raises(ValidationError):
+        spreadsheet_api({'batch': [request(handle, fetch={}, action=action), {'fetch': {}}]})
+    assert engine.checkout(DS_NAME).shape[1] == 4
+    with pytest.raises(ValidationError):
+        spreadsheet_api({'batch': []})
+
+
+def test_async_metadata(engine, validator):
+    """Test pushing profiling results to the client in a separate message."""
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    schemafile = os.path.abspath(os.path.join(pkg.__file__, "schema.json"))
+    schema = json.load(pkg_resources.open_text(pkg, 'schema.json'))
+    msg_validator = Draft7Validator(
+        schema=schema['definitions']['metadataMessage'],
+        resolver=RefResolver(schemafile, schema)
+    )
+    messages = list()
+    # -- Response contains the log but no profiling results --
+    doc = spreadsheet_api(request(handle, fetch={'includeMetadata': True}), send=messages.append)
+    validator.validate(doc)
+    assert len(doc['rows']) == 4
+    assert doc['metadata']['pending']
+    assert 'profiling' not in doc['metadata']
+    assert len(doc['metadata']['log']) == 1
+    # Wait for all background tasks to finish.
+    engine.submit(lambda: None).result()
+    assert len(messages) == 1
+    msg = messages[0]
+    msg_validator.validate(msg)
+    assert msg['type'] == 'metadata'
+    assert msg['snapshot'] == doc['metadata']['snapshot']
+    assert len(msg['metadata']['profiling']['columns']) == 3
+    # -- Existing profiling results are included in the response --
+    doc = spreadsheet_api(request(handle, fetch={'includeMetadata': True}), send=messages.append)
+    assert 'pending' not in doc['metadata']
+    assert len(doc['metadata']['profiling']['columns']) == 3
+    engine.submit(lambda: None).result()
+    assert len(messages) == 1
+
+
+def test_async_metadata_after_action(engine):
+    """Test that pushed profiling results refer to the requested snapshot if
+    an action modifies the dataset before the background task runs.
+    """
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    messages = list()
+    # Block the background executor until the action was applied.
+    release = threading.Event()
+    engine.submit(release.wait, 10)
+    doc = spreadsheet_api(request(handle, fetch={'includeMetadata': True}), send=messages.append)
+    snapshot = doc['metadata']['snapshot']
+    action = {'type': 'inscol', 'payload': {'names': ['D'], 'values': [5]}}
+    spreadsheet_api(request(handle, fetch={'includeMetadata': False}, action=action), send=messages.append)
+    release.set()
+    engine.submit(lambda: None).result()
+    assert len(messages) == 1
+    assert messages[0]['snapshot'] == snapshot
+    assert messages[0]['metadata']['profiling']['id'] == snapshot
+    assert len(messages[0]['metadata']['profiling']['columns']) == 3
+
+
+def test_async_metadata_error(engine, monkeypatch):
+    """Test error message for failed background profiling."""
+    def error(**kwargs):
+        raise ValueError('profiler failed')
+
+    monkeypatch.setattr(ds, 'fetch_metadata', error)
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    messages = list()
+    spreadsheet_api(request(handle, fetch={'includeMetadata': True}), send=messages.append)
+    engine.submit(lambda: None).result()
+    assert messages[0]['error'] == 'profiler failed'
+    assert 'metadata' not in messages[0]
+
+
+@pytest.mark.parametrize(
+    'sort_by,offset,values',
+    [
+        ({'column': 'B', 'descending': True}, 0, [8, 6, 4]),
+        ({'column': 1, 'descending': True}, 2, [4, 2]),
+        ({'column': 0}, 1, [4, 6, 8])
+    ]
+)
+def test_fetch_sorted_rows(sort_by, offset, values, engine, validator):
+    """Test fetching pages of a sorted dataset view."""
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    # -- Fetch rows in all formats --
+    fetch = {'sortBy': sort_by, 'offset': offset, 'limit': 3}
+    doc = spreadsheet_api(request(handle, fetch=fetch))
+    validator.validate(doc)
+    assert doc['sortBy'] == sort_by
+    assert doc['rowCount'] == 4
+    assert [r['values'][1] for r in doc['rows']] == values
+    doc = spreadsheet_api(request(handle, fetch=dict(fetch, format='columns')))
+    assert doc['data']['values'][1] == values
+    assert doc['data']['index'] == [int((v - 2) / 2) for v in values]
+    doc = spreadsheet_api(request(handle, fetch=dict(fetch, format='binary')))
+    assert doc['data']['index']['length'] == len(values)
+    # -- Sort orders are computed once --
+    assert len(engine.sort_orders) == 1
+    # -- Unknown sort column --
+    with pytest.raises(ValueError):
+        spreadsheet_api(request(handle, fetch={'sortBy': {'column': 'X'}}))
+    with pytest.raises(ValueError):
+        spreadsheet_api(request(handle, fetch={'sortBy': {'column': 3}}))
+
+
+def test_sort_order_cache(dataset, tmpdir):
+    """Test caching and persisting sort orders for dataset snapshots."""
+    # -- Setup --
+    engine = DB(basedir=str(tmpdir))
+    engine.create(source=dataset, name=DS_NAME, primary_key='A')
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    fetch = {'sortBy': {'column': 'C', 'descending': True}, 'limit': 2}
+    doc = spreadsheet_api(request(handle, fetch=fetch))
+    assert [r['id'] for r in doc['rows']] == [3, 2]
+    spreadsheet_api(request(handle, fetch=dict(fetch, offset=2)))
+    assert engine.sort_orders.stats.misses == 1
+    assert engine.sort_orders.stats.hits == 1
+    # -- Actions invalidate the cached sort orders --
+    action = {'type': 'inscol', 'payload': {'names': ['D'], 'values': [5]}}
+    spreadsheet_api(request(handle, fetch={}, action=action))
+    assert len(engine.sort_orders) == 0
+    # -- Sort orders are loaded from disk by a new engine instance --
+    engine = DB(basedir=str(tmpdir))
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    with mock.patch('openclean_notebook.engine.argsort') as sort:
+        doc = spreadsheet_api(request(handle, fetch=dict(fetch, version=0)))
+        assert not sort.called
+    assert [r['id'] for r in doc['rows']] == [3, 2]
+
+
+@pytest.mark.parametrize(
+    'filters,sort_by,values',
+    [
+        ([{'column': 'A', 'op': 'range', 'min': 3}], None, [3, 5, 7]),
+        ([{'column': 'A', 'op': 'range', 'min': 3}], {'column': 0, 'descending': True}, [7, 5, 3]),
+        ([{'column': 0, 'op': 'eq', 'value': 3, 'negate': True}, {'column': 'B', 'op': 'prefix', 'value': '8'}], None, [7]),
+        ([{'column': 'C', 'op': 'null'}], None, [])
+    ]
+)
+def test_fetch_filtered_rows(filters, sort_by, values, engine, validator):
+    """Test fetching rows from a filtered view."""
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    # -- Fetch filtered rows --
+    fetch = {'filter': filters, 'sortBy': sort_by} if sort_by else {'filter': filters}
+    doc = spreadsheet_api(request(handle, fetch=fetch))
+    validator.validate(doc)
+    assert doc['rowCount'] == len(values)
+    assert [r['values'][0] for r in doc['rows']] == values
+    # -- Paging within the filtered view --
+    doc = spreadsheet_api(request(handle, fetch=dict(fetch, offset=1, limit=1)))
+    assert [r['values'][0] for r in doc['rows']] == values[1:2]
+
+
+def test_find_cells(engine, validator):
+    """Test finding cells in a dataset view."""
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    # -- Find in the full dataset --
+    r = request(handle, fetch={'limit': 1})
+    r['find'] = {'value': '5'}
+    doc = spreadsheet_api(r)
+    validator.validate(doc)
+    assert doc['find']['count'] == 2
+    assert doc['find']['matches'] == [{'row': 1, 'id': 1, 'column': 2}, {'row': 2, 'id': 2, 'column': 0}]
+    # -- Find in a sorted and filtered view --
+    r['fetch'] = {'sortBy': {'column': 'A', 'descending': True}, 'filter': [{'column': 'A', 'op': 'range', 'max': 5}]}
+    r['find'] = {'value': 5, 'op': 'eq', 'columns': ['A', 2], 'limit': 1}
+    doc = spreadsheet_api(r)
+    assert doc['find']['count'] == 2
+    assert doc['find']['matches'] == [{'row': 0, 'id': 2, 'column': 0}]
+    # -- Value indexes are reused and invalidated after actions --
+    assert len(engine.value_indexes) == 3
+    action = {'type': 'inscol', 'payload': {'names': ['D'], 'values': [5]}}
+    spreadsheet_api(request(handle, fetch={}, action=action))
+    assert len(engine.value_indexes) == 0
+
+
+def test_commit_progress(engine, validator):
+    """Test progress messages for a commit action."""
+    # -- Setup --
+    engine.sample(name=DS_NAME, n=2, random_state=42)
+    engine.chunk_size = 3
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    action = {'type': 'inscol', 'payload': {'names': ['D'], 'values': [5]}}
+    spreadsheet_api(request(handle, fetch={}, action=action))
+    # -- Commit --
+    messages = list()
+    spreadsheet_api(request(handle, fetch={}, action={'type': 'commit'}), send=messages.append)
+    progress = [m for m in messages if m['type'] == 'progress']
+    schema = validator.schema['definitions']['progressMessage']
+    for msg in progress:
+        Draft7Validator(schema=schema, resolver=validator.resolver).validate(msg)
+    assert [m['rows'] for m in progress] == [3, 4]
+    assert progress[-1]['dataset'] == handle
+
+
+def test_prefetch_pages(dataset):
+    """Test serving pages that were prefetched in the background."""
+    # -- Setup --
+    engine = DB()
+    engine.create(source=dataset, name=DS_NAME)
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    fetch = {'limit': 1, 'prefetch': 1, 'includePrefetched': True}
+    # -- Pages are not cached for the first request --
+    doc = spreadsheet_api(request(handle, fetch=dict(fetch, offset=1)))
+    assert doc['rows'] == [{'id': 1, 'values': [3, 4, 5]}]
+    assert not doc['timings']['prefetch']['hit']
+    assert doc['prefetched'] == []
+    # Wait for the background task to finish.
+    engine.submit_prefetch(lambda: None).result()
+    assert len(engine.pages) == 3
+    # -- Adjacent pages are served from the cache --
+    doc = spreadsheet_api(request(handle, fetch=dict(fetch, offset=2)))
+    assert doc['rows'] == [{'id': 2, 'values': [5, 6, 7]}]
+    assert doc['timings']['prefetch']['hit']
+    assert doc['timings']['prefetch']['hitRate'] == 0.5
+    assert doc['prefetched'] == [{'offset': 1, 'rows': [{'id': 1, 'values': [3, 4, 5]}]}]
+    engine.submit_prefetch(lambda: None).result()
+    doc = spreadsheet_api(request(handle, fetch=dict(fetch, offset=2)))
+    assert [p['offset'] for p in doc['prefetched']] == [3, 1]
+    # -- Prefetched pages in binary format share the response buffers --
+    binary = dict(fetch, format='binary', offset=0)
+    spreadsheet_api(request(handle, fetch=binary))
+    engine.submit_prefetch(lambda: None).result()
+    doc = spreadsheet_api(request(handle, fetch=binary))
+    assert doc['timings']['prefetch']['misses'] == 2
+    assert len(doc.buffers) == 8
+    page = doc['prefetched'][0]
+    assert page['offset'] == 1
+    assert page['data']['values'][0]['data'] == 5
+    assert bytes(doc.buffers[5]) == bytes(ds.fetch_buffers(dataset, offset=1, end=2)[1][1])
+    # -- Sorted views are cached separately --
+    sort_by = {'column': 'A', 'descending': True}
+    doc = spreadsheet_api(request(handle, fetch=dict(fetch, offset=2, sortBy=sort_by)))
+    assert doc['rows'] == [{'id': 1, 'values': [3, 4, 5]}]
+    assert not doc['timings']['prefetch']['hit']
+    # -- Actions invalidate the cached pages --
+    action = {'type': 'inscol', 'payload': {'names': ['D'], 'values': [5]}}
+    engine.submit_prefetch(lambda: None).result()
+    spreadsheet_api(request(handle, fetch={'limit': 1, 'offset': 1}, action=action))
+    assert len(engine.pages) == 0
+    doc = spreadsheet_api(request(handle, fetch=dict(fetch, offset=2)))
+    assert doc['rows'] == [{'id': 2, 'values': [5, 6, 7, 5]}]
+    assert not doc['timings']['prefetch']['hit']
+    # -- Requests without read-ahead do not use the cache --
+    doc = spreadsheet_api(request(handle, fetch={'limit': 1, 'offset': 3}))
+    assert 'timings' not in doc
+    assert 'prefetched' not in doc
+    # -- Timings are only included if requested --
+    doc = spreadsheet_api(request(handle, fetch=dict(fetch, offset=2, includeTimings=False)))
+    assert 'timings' not in doc
+    # -- Prefetching does not wait for other background tasks --
+    release = threading.Event()
+    engine.submit(release.wait, 10)
+    spreadsheet_api(request(handle, fetch=dict(fetch, offset=0, sortBy=sort_by)))
+    engine.submit_prefetch(lambda: None).result(timeout=5)
+    assert not release.is_set()
+    doc = spreadsheet_api(request(handle, fetch=dict(fetch, offset=1, sortBy=sort_by)))
+    assert doc['timings']['prefetch']['hit']
+    release.set()
+
+
+def test_prefetch_disabled(dataset):
+    """Test that no pages are prefetched if the page cache has no capacity.
+    The window cache for delta responses is not affected.
+    """
+    engine = DB(page_cache_size=0)
+    engine.create(source=dataset, name=DS_NAME)
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    fetch = {'limit': 1, 'prefetch': 1, 'includePrefetched': True}
+    with mock.patch.object(engine, 'submit_prefetch') as submit:
+        doc = spreadsheet_api(request(handle, fetch=dict(fetch, offset=1)))
+        assert doc['rows'] == [{'id': 1, 'values': [3, 4, 5]}]
+        assert doc['prefetched'] == []
+        submit.assert_not_called()
+    assert len(engine.pages) == 0
+    assert len(engine.windows) == 1
+
+
+def test_delta_response(engine, validator):
+    """Test responses that only contain changes with respect to the snapshot
+    that is displayed by the client.
+    """
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    doc = spreadsheet_api(request(handle, fetch={'limit': 2, 'includeMetadata': True}))
+    first = known = doc['snapshot']
+    # -- Update changes one cell per row in the window --
+    action = {'type': 'update', 'payload': {'columns': [1], 'func': {'name': 'myadd', 'namespace': 'mylib'}}}
+    doc = spreadsheet_api(request(handle, fetch={'limit': 2, 'knownVersion': known}, action=action))
+    validator.validate(doc)
+    assert 'rows' not in doc and 'columns' not in doc and 'metadata' not in doc
+    assert doc['snapshot'] > known
+    assert doc['delta']['knownVersion'] == known
+    assert [(c['row'], c['column'], c['value']) for c in doc['delta']['cells']] == [(0, 1, 3), (1, 1, 5)]
+    rows = spreadsheet_api(request(handle, fetch={'limit': 2}))['rows']
+    assert [c['id'] for c in doc['delta']['cells']] == [r['id'] for r in rows]
+    metadata = doc['delta']['metadata']
+    assert [e['id'] for e in metadata['log']] == [doc['snapshot']]
+    assert [c['column'] for c in metadata['columns']] == [1]
+    assert 'columns' not in metadata['profiling']
+    # -- Unchanged snapshot --
+    known = doc['snapshot']
+    doc = spreadsheet_api(request(handle, fetch={'knownVersion': known, 'includeMetadata': True}))
+    assert doc['delta']['cells'] == []
+    assert doc['delta']['metadata']['log'] == []
+    assert doc['delta']['metadata']['columns'] == []
+    # -- Rollback does not extend the log of the known snapshot --
+    doc = spreadsheet_api(request(handle, fetch={'knownVersion': known}, action={'type': 'rollback', 'payload': first}))
+    assert [(c['column'], c['value']) for c in doc['delta']['cells']] == [(1, 2), (1, 4), (1, 6), (1, 8)]
+    assert 'metadata' not in doc['delta']
+    assert len(doc['metadata']['log']) == 1
+    # -- Schema changes and unknown snapshots return full responses --
+    known = doc['snapshot']
+    action = {'type': 'inscol', 'payload': {'names': ['D'], 'values': [5]}}
+    doc = spreadsheet_api(request(handle, fetch={'knownVersion': known}, action=action))
+    assert 'delta' not in doc
+    assert len(doc['columns']) == 4
+    assert len(doc['metadata']['profiling']['columns']) == 4
+    doc = spreadsheet_api(request(handle, fetch={'knownVersion': 99}))
+    assert 'delta' not in doc
+    assert len(doc['rows']) == 4
+
+
+def test_delta_known_window(engine):
+    """Test that the visible window of the known snapshot is served from the
+    window cache of the engine instead of checking out the known snapshot.
+    """
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    doc = spreadsheet_api(request(handle, fetch={'limit': 2}))
+    known = doc['snapshot']
+    # Remove the known snapshot from the snapshot cache.
+    engine.snapshots.invalidate((engine.identifier, DS_NAME))
+    action = {'type': 'update', 'payload': {'columns': [1], 'func': {'name': 'myadd', 'namespace': 'mylib'}}}
+    with mock.patch.object(engine, 'snapshot', wraps=engine.snapshot) as snapshot:
+        doc = spreadsheet_api(request(handle, fetch={'limit': 2, 'knownVersion': known}, action=action))
+        assert known not in [c.kwargs.get('version') for c in snapshot.call_args_list]
+    assert [(c['row'], c['column'], c['value']) for c in doc['delta']['cells']] == [(0, 1, 3), (1, 1, 5)]
+
+
+def test_delta_metadata_without_profiles(engine):
+    """Test metadata deltas for snapshots without column profiles."""
+    # -- Setup --
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    doc = spreadsheet_api(request(handle, fetch={'includeMetadata': True}))
+    known = doc['snapshot']
+    dataset = engine.dataset(DS_NAME)
+    window = delta.known_view(engine=engine, dataset=dataset, name=DS_NAME, version=known, offset=0, limit=2)
+    # Remove the column profiles of the snapshot.
+    dataset.metadata(version=known).delete_annotation(key=ds.COLUMN_PROFILES)
+    metadata = delta.diff_metadata(known=window, metadata=doc['metadata'], dataset=dataset, version=known)
+    assert [c['column'] for c in metadata['columns']] == [0, 1, 2]
+
+
+def test_request_timings(engine, validator):
+    """Test phase times and byte counts for spreadsheet API requests."""
+    # -- Setup --
+    engine.metrics(reset=True)
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    # -- Timings are only included in the response if requested --
+    doc = spreadsheet_api(request(handle, fetch={'limit': 2}))
+    assert 'timings' not in doc
+    fetch = {'limit': 2, 'format': 'binary', 'includeTimings': True, 'includeLibrary': True}
+    doc = spreadsheet_api(request(handle, fetch=fetch))
+    validator.validate(doc)
+    timings = doc['timings']
+    assert {'validate', 'checkout', 'page', 'library'} <= set(timings['phases'])
+    assert 'action' not in timings['phases']
+    assert 'request' not in timings['bytes']
+    assert timings['bytes']['buffers'] == sum(b.nbytes for b in doc.buffers)
+    assert timings['total'] >= sum(timings['phases'].values())
+    # -- Request sizes are only measured if enabled --
+    registry.message_sizes = True
+    try:
+        doc = spreadsheet_api(request(handle, fetch=fetch))
+    finally:
+        registry.message_sizes = False
+    assert doc['timings']['bytes']['request'] == len(json.dumps(request(handle, fetch=fetch)))
+    # -- Requests are aggregated in the metrics registry of the engine --
+    spreadsheet_api({'batch': [request(handle, fetch={'limit': 1}), request(handle, fetch={'offset': 1})]})
+    metrics = engine.metrics()
+    assert metrics['requests'] == 5
+    assert metrics['phases']['validate']['count'] == 4
+    assert metrics['phases']['page']['count'] == 5
+    assert metrics['phases']['library']['count'] == 2
+    assert metrics['bytes']['buffers']['count'] == 2
+    assert metrics['bytes']['request']['count'] == 1
+    assert metrics['total']['p50'] <= metrics['total']['max']
+    # -- Reset the metrics for the engine --
+    assert engine.metrics(reset=True)['requests'] == 5
+    assert engine.metrics()['requests'] == 0
+
+
+def test_debug_capture(engine, validator):
+    """Test capturing profiles for individual spreadsheet API requests."""
+    handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+    doc = spreadsheet_api(request(handle, fetch={'limit': 2}))
+    assert 'capture' not in doc
+    assert len(engine.captures) == 0
+    # -- Debug flag in the request --
+    doc = spreadsheet_api(dict(request(handle, fetch={'limit': 2}), debug=True))
+    validator.validate(doc)
+    capture = engine.captures.get(doc['capture'])
+    assert capture.request['fetch'] == {'limit': 2}
+    assert doc['rows'] == spreadsheet_api(request(handle, fetch={'limit': 2}))['rows']
+    # -- Debugging enabled for the engine --
+    engine.debug = True
+    doc = spreadsheet_api({'batch': [request(handle, fetch={'limit': 1}), request(handle, fetch={'offset': 1})]})
+    assert [r['capture'] for r in doc['batch']] == [2, 3]
+    doc = spreadsheet_api(dict(request(handle, fetch={'limit': 2}), debug=False))
+    assert 'capture' not in doc
+    assert len(engine.captures) == 3
+
+
+def test_compact_snapshots(validator):
+    """Test that engines with compact snapshots return the same responses as
+    engines with plain snapshots.
+    """
+    # -- Setup --
+    df = pd.DataFrame(
+        data=[
+            ['b', 1, 0.5], ['a', 2, 1.5], [None, 3, None], ['b', 4, 2.5],
+            ['a', 5, 0.5], ['c', 6, 1.0], ['b', 7, 2.0], ['a', 8, 1.5]
+        ],
+        columns=['Name', 'Count', 'Score']
+    )
+    plain, compact = DB(), DB(compact=True)
+    for engine in [plain, compact]:
+        engine.create(source=df, name=DS_NAME, primary_key='Count')
+    # Compact snapshots are read from the datastore without checking out the
+    # snapshot with the original values.
+    with mock.patch.object(compact.dataset(DS_NAME), 'checkout', side_effect=AssertionError):
+        snapshot = compact.snapshot(DS_NAME)
+    assert isinstance(snapshot['Name'].dtype, pd.CategoricalDtype)
+    assert snapshot['Count'].dtype == np.int8
+    pd.testing.assert_frame_equal(expand_frame(snapshot), plain.snapshot(DS_NAME), check_dtype=False)
+    # -- Compare responses --
+    fetches = [
+        {'includeMetadata': True},
+        {'format': 'columns'},
+        {'sortBy': {'column': 'Name'}},
+        {'sortBy': {'column': 'Score', 'descending': True}},
+        {'filter': [{'column': 'Name', 'op': 'eq', 'value': 'b'}]},
+        {'filter': [{'column': 'Name', 'op': 'range', 'min': 'b'}, {'column': 'Score', 'op': 'range', 'max': 1.5}]},
+        {'filter': [{'column': 'Name', 'op': 'null'}]}
+    ]
+    for fetch in fetches:
+        docs = list()
+        for engine in [plain, compact]:
+            handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+            doc = spreadsheet_api(request(handle, fetch=fetch))
+            validator.validate(doc)
+            docs.append({k: v for k, v in doc.items() if k != 'dataset'})
+        assert docs[0] == docs[1]
+    # -- Binary pages are encoded with the original column types --
+    buffers = list()
+    for engine in [plain, compact]:
+        handle = ds.serialize(name=DS_NAME, engine=engine.identifier)
+        doc = spreadsheet_api(request(handle, fetch={'format': 'binary', 'sortBy': {'column': 'Name'}}))
+        assert [c['type'] for c in doc['data']['values']] == ['utf8', 'int64', 'float64']
+        buffers.append([bytes(b) for b in doc.buffers])
+    assert buffers[0] == buffers[1]
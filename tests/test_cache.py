@@ -0,0 +1,55 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for the memory-bounded LRU cache."""
+
+from openclean_notebook.cache import MemoryCache, frame_size
+
+
+def test_cache_eviction():
+    """Test least-recently-used eviction of cache entries."""
+    cache = MemoryCache(capacity=10, sizeof=lambda x: x)
+    cache.put(('E', 'A', 0), 4)
+    cache.put(('E', 'A', 1), 4)
+    assert cache.get(('E', 'A', 0)) == 4
+    # Adding a new entry evicts the least recently used entry (version 1).
+    cache.put(('E', 'B', 0), 4)
+    assert ('E', 'A', 1) not in cache
+    assert ('E', 'A', 0) in cache
+    assert cache.size == 8
+    assert cache.get(('E', 'A', 1)) is None
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.evictions == 1
+    # Objects that exceed the memory budget are not cached.
+    cache.put(('E', 'C', 0), 11)
+    assert ('E', 'C', 0) not in cache
+    assert len(cache) == 2
+    # Replace an existing entry.
+    cache.put(('E', 'A', 0), 2)
+    assert cache.size == 6
+    assert len(cache) == 2
+
+
+def test_cache_invalidation():
+    """Test removing entries by key prefix."""
+    cache = MemoryCache(capacity=100, sizeof=lambda x: 1)
+    cache.put(('E', 'A', 0), 'x')
+    cache.put(('E', 'A', 1), 'y')
+    cache.put(('E', 'B', 0), 'z')
+    cache.invalidate(('E', 'A'))
+    assert len(cache) == 1
+    assert cache.size == 1
+    assert ('E', 'B', 0) in cache
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_frame_size(dataset):
+    """Test computing the memory usage of a data frame."""
+    assert frame_size(dataset) > 0
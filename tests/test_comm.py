@@ -0,0 +1,28 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for helper classes of the notebook communication layer."""
+
+import base64
+
+from openclean_notebook.controller.comm import BinaryResponse, message_size
+
+
+def test_binary_response_to_json():
+    """Test Base64 encoding of binary response buffers."""
+    resp = BinaryResponse({'a': 1}, buffers=[memoryview(b'abc')])
+    assert resp['a'] == 1
+    doc = resp.to_json()
+    assert base64.b64decode(doc['buffers'][0]) == b'abc'
+    assert 'buffers' not in resp
+    assert BinaryResponse({}).buffers == []
+
+
+def test_message_size():
+    """Test the size of messages for the comm metrics."""
+    assert message_size({'a': 1}) == 8
+    assert message_size(BinaryResponse({'a': 1}, buffers=[memoryview(b'abc')])) == 11
@@ -0,0 +1,172 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for the streaming commit of dataset sample operations."""
+
+import json
+import pandas as pd
+import pytest
+import subprocess
+import sys
+
+from openclean_notebook.commit import commit_sample, is_picklable
+from openclean_notebook.engine import DB
+
+import openclean_notebook.commit as commit
+
+
+"""Script that commits an update with a registered function that is defined
+in the __main__ module. Prints the process identifier of the main process and
+the updated values (that contain the process identifier of the worker).
+"""
+MAIN_SCRIPT = '''
+import json
+import os
+import pandas as pd
+
+from openclean_notebook.engine import DB
+
+
+def shout(value):
+    return '{}:{}'.format(value.upper(), os.getpid())
+
+
+if __name__ == '__main__':
+    engine = DB(workers=2, chunk_size=2)
+    engine.create(source=pd.DataFrame(data={'A': list('abcdefgh')}), name='DS')
+    engine.sample('DS', n=3, random_state=42)
+    engine.register.eval('shout')(shout)
+    sample = engine.dataset('DS')
+    sample.update(columns='A', func=engine.library.functions().get(name='shout'))
+    df = engine.checkout('DS', commit=True)
+    print(json.dumps([os.getpid(), df['A'].tolist()]))
+'''
+
+
+def create_sample(basedir=None, primary_key=None):
+    """Create an engine with a modified sample of a dataset with 25 rows."""
+    engine = DB(basedir=basedir, create=True)
+    df = pd.DataFrame(data={'A': range(25), 'B': ['x{}'.format(i) for i in range(25)]})
+    engine.create(source=df, name='DS', primary_key=primary_key)
+    engine.sample('DS', n=5, random_state=42)
+    sample = engine.dataset('DS')
+    upper = engine.library.functions().get(name='upper', namespace='string')
+    sample.update(columns='B', func=upper)
+    sample.insert(names=['C'], pos=1, values=7)
+    return engine, sample
+
+
+@pytest.mark.parametrize('primary_key', [None, 'A'])
+@pytest.mark.parametrize('chunk_size', [1, 10, 100])
+def test_commit_sample(primary_key, chunk_size, tmpdir):
+    """Test that the streaming commit produces the same snapshots as applying
+    the sample operations on the full dataset.
+    """
+    engine, sample = create_sample(basedir=str(tmpdir), primary_key=primary_key)
+    reports = list()
+    actions = commit_sample(sample, chunk_size=chunk_size, progress=reports.append)
+    assert [a.optype for a in actions] == ['update', 'inscol']
+    df = engine.checkout('DS')
+    _, sample = create_sample(primary_key=primary_key)
+    sample.apply()
+    expected = sample.original.checkout()
+    assert df.values.tolist() == expected.values.tolist()
+    assert list(df.columns) == ['A', 'C', 'B']
+    assert list(df.index) == list(expected.index)
+    assert [op.action.optype for op in engine.dataset('DS').log()[1:]] == ['update', 'inscol']
+    # -- Progress reports --
+    chunks = -(-25 // chunk_size)
+    assert len(reports) == 2 * chunks
+    assert reports[chunks - 1] == {'step': 1, 'steps': 2, 'rows': 25, 'total': None, 'eta': None}
+    assert reports[-1]['step'] == 2
+    assert reports[-1]['rows'] == 25
+    assert reports[-1]['total'] == 25
+    assert reports[-1]['eta'] == 0
+
+
+def test_engine_commit_sample():
+    """Test the streaming commit via the engine."""
+    engine, _ = create_sample()
+    engine.chunk_size = 7
+    df = engine.checkout('DS', commit=True)
+    assert df.shape == (25, 3)
+    assert list(df['B'])[:2] == ['X0', 'X1']
+    with pytest.raises(ValueError):
+        engine.commit_sample('DS')
+
+
+def test_invalid_chunk_size():
+    """Test error for invalid chunk sizes and number of workers."""
+    _, sample = create_sample()
+    with pytest.raises(ValueError):
+        commit_sample(sample, chunk_size=0)
+    with pytest.raises(ValueError):
+        commit_sample(sample, workers=0)
+
+
+@pytest.mark.parametrize('primary_key', [None, 'A'])
+def test_parallel_commit_sample(primary_key, tmpdir):
+    """Test that the parallel commit produces the same snapshot as the
+    sequential commit.
+    """
+    engine, sample = create_sample(basedir=str(tmpdir), primary_key=primary_key)
+    reports = list()
+    commit_sample(sample, chunk_size=3, progress=reports.append, workers=2)
+    df = engine.checkout('DS')
+    engine, sample = create_sample(primary_key=primary_key)
+    commit_sample(sample, chunk_size=3)
+    expected = engine.checkout('DS')
+    assert df.values.tolist() == expected.values.tolist()
+    assert list(df.index) == list(expected.index)
+    assert [r['rows'] for r in reports[:9]] == [3, 6, 9, 12, 15, 18, 21, 24, 25]
+
+
+def test_parallel_commit_lambda():
+    """Test parallel commit for a lambda function in the object library."""
+    engine = DB(workers=2, chunk_size=4)
+    df = pd.DataFrame(data={'A': range(10)})
+    engine.create(source=df, name='DS')
+    engine.sample('DS', n=3, random_state=42)
+    sample = engine.dataset('DS')
+    engine.register.eval('inc')(lambda x: x + 1)
+    inc = engine.library.functions().get(name='inc')
+    sample.insert(names=['B'], values=inc, sources='A')
+    assert is_picklable(sample.log()[-1].action)
+    df = engine.checkout('DS', commit=True)
+    assert df['B'].tolist() == list(range(1, 11))
+
+
+def test_parallel_commit_main_function(tmpdir):
+    """Test that functions that are defined in the __main__ module (e.g., in
+    a notebook) and registered with the object library are applied in the
+    worker processes.
+    """
+    script = tmpdir.join('commit.py')
+    script.write(MAIN_SCRIPT)
+    result = subprocess.run([sys.executable, str(script)], stdout=subprocess.PIPE, check=True)
+    main, values = json.loads(result.stdout.decode('utf-8').strip().splitlines()[-1])
+    pids = set(int(val.split(':')[1]) for val in values)
+    assert [val.split(':')[0] for val in values] == ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']
+    assert main not in pids
+
+
+def test_parallel_commit_unpicklable(monkeypatch):
+    """Test parallel commit for operations that cannot be sent to worker
+    processes.
+    """
+    engine = DB(workers=2, chunk_size=4)
+    df = pd.DataFrame(data={'A': range(10)})
+    engine.create(source=df, name='DS')
+    engine.sample('DS', n=3, random_state=42)
+    sample = engine.dataset('DS')
+    engine.register.eval('inc')(lambda x: x + 1)
+    inc = engine.library.functions().get(name='inc')
+    sample.insert(names=['B'], values=inc, sources='A')
+    monkeypatch.setattr(commit, 'is_picklable', lambda action: False)
+    with pytest.warns(RuntimeWarning):
+        df = engine.checkout('DS', commit=True)
+    assert df['B'].tolist() == list(range(1, 11))
@@ -0,0 +1,103 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for compact data frames of dataset snapshots."""
+
+from histore.document.df import DataFrameDocument
+
+import numpy as np
+import pandas as pd
+
+from openclean_notebook.cache import frame_size
+from openclean_notebook.compact import compact_frame, compact_stream, expand_frame
+
+
+def test_compact_frame_types():
+    """Test column types of compact data frames."""
+    df = pd.DataFrame(
+        data=[
+            ['a', 1, 0.5, 'a', 1.1, 'x'],
+            ['b', 200, 1.5, 1, 2.2, 'y'],
+            [None, 3, np.nan, 'b', 3.3, 'z'],
+            ['a', 4, 2.0, None, 4.4, 'x']
+        ],
+        columns=['A', 'B', 'C', 'D', 'E', 'A']
+    )
+    df['B'] = df['B'].astype(np.int64)
+    compact = compact_frame(df, max_ratio=0.5)
+    assert list(compact.columns) == list(df.columns)
+    assert compact.index.equals(df.index)
+    dtypes = list(compact.dtypes)
+    assert isinstance(dtypes[0], pd.CategoricalDtype)
+    assert list(dtypes[0].categories) == ['a', 'b']
+    assert dtypes[1] == np.int16
+    assert dtypes[2] == np.float32
+    # Columns with mixed values, lossy floats, and too many distinct values
+    # are not converted.
+    assert dtypes[3] == object
+    assert dtypes[4] == np.float64
+    assert dtypes[5] == object
+    # Expanding the compact frame restores the original values.
+    expanded = expand_frame(compact)
+    assert list(expanded.dtypes) == list(df.dtypes)
+    assert expanded.iloc[2, 0] is None
+    pd.testing.assert_frame_equal(expanded, df)
+    # Frames without converted columns are returned as is.
+    plain = df.iloc[:, [3]]
+    assert compact_frame(plain) is plain
+    assert expand_frame(plain) is plain
+
+
+def test_compact_frame_size():
+    """Test memory savings for a string column with few distinct values."""
+    values = ['value {}'.format(i % 10) for i in range(1000)]
+    df = pd.DataFrame(data={'A': values, 'B': list(range(1000))})
+    compact = compact_frame(df)
+    assert frame_size(compact) < frame_size(df) / 4
+    pd.testing.assert_frame_equal(expand_frame(compact), df)
+
+
+def test_compact_integer_objects():
+    """Test downcasting columns of Python integers in checked out snapshots."""
+    df = pd.DataFrame(data={'A': pd.Series([1, 2, 3], dtype=object), 'B': pd.Series([1, None, 3], dtype=object)})
+    compact = compact_frame(df)
+    assert compact['A'].dtype == np.int8
+    assert compact['B'].dtype == object
+    assert expand_frame(compact)['A'].tolist() == [1, 2, 3]
+    big = pd.DataFrame(data={'A': pd.Series([1, 2 ** 70], dtype=object)})
+    assert compact_frame(big) is big
+
+
+def test_compact_stream():
+    """Test reading compact data frames from a stream of rows in chunks."""
+    df = pd.DataFrame(
+        data={
+            'A': ['a', 'b', 'a', 'b', None, 'a', 'c'],
+            'B': [1, 2, 3, 400, 5, 6, 7],
+            'C': ['x', 'x', 'x', 'y', 'y', 'x', 'z'],
+            'D': [1, None, 3, 4, 5, 6, 7]
+        },
+        index=[10, 11, 12, 13, 14, 15, 16],
+        dtype=object
+    )
+    for chunk_size in [2, 3, 100]:
+        compact = compact_stream(DataFrameDocument(df), chunk_size=chunk_size)
+        assert list(compact.columns) == list(df.columns)
+        assert compact.index.tolist() == df.index.tolist()
+        # Dictionaries of encoded chunks are merged.
+        assert isinstance(compact['A'].dtype, pd.CategoricalDtype)
+        assert list(compact['A'].dtype.categories) == ['a', 'b', 'c']
+        assert compact['B'].dtype == np.int16
+        # Columns that are encoded in some chunks only are compacted as a
+        # whole.
+        assert isinstance(compact['C'].dtype, pd.CategoricalDtype)
+        assert compact['D'].dtype == object
+        pd.testing.assert_frame_equal(expand_frame(compact), expand_frame(compact_frame(df)))
+    # Empty snapshot.
+    empty = compact_stream(DataFrameDocument(df.iloc[:0]), chunk_size=2)
+    assert list(empty.columns) == list(df.columns)
+    assert empty.shape == (0, 4)
@@ -0,0 +1,68 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for request captures under cProfile and tracemalloc."""
+
+import os
+import pstats
+import pytest
+import tracemalloc
+
+from openclean_notebook.debug import CaptureBuffer, folded_stacks
+
+
+def allocate(n: int):
+    """Function with a measurable memory allocation."""
+    return [str(i) for i in range(n)]
+
+
+def fail():
+    """Function that raises an error."""
+    raise ValueError('failed')
+
+
+def test_capture_buffer(tmpdir):
+    """Test capturing requests in a ring buffer."""
+    buffer = CaptureBuffer(capacity=2)
+    for n in [10, 20, 10000]:
+        result, capture = buffer.run(request={'n': n}, func=lambda: allocate(n))
+        assert len(result) == n
+    assert len(buffer) == 2
+    assert [c.identifier for c in buffer] == [2, 3]
+    assert not tracemalloc.is_tracing()
+    doc = capture.to_dict()
+    assert doc['id'] == 3
+    assert doc['request'] == {'n': 10000}
+    assert doc['peakMemory'] > 0
+    assert any('allocate' in f['function'] for f in doc['functions'])
+    # -- Captures for failed requests --
+    with pytest.raises(ValueError):
+        buffer.run(request={}, func=fail)
+    assert buffer.get(4).error == 'failed'
+    with pytest.raises(KeyError):
+        buffer.get(1)
+    # -- Dump captures --
+    files = buffer.dump(str(tmpdir), identifier=3)
+    assert [os.path.basename(f) for f in files] == ['capture-3.pstats', 'capture-3.folded']
+    assert pstats.Stats(files[0]).total_calls > 0
+    assert len(buffer.dump(os.path.join(str(tmpdir), 'all'))) == 4
+    buffer.clear()
+    assert len(buffer) == 0
+
+
+def test_folded_stacks():
+    """Test reconstructing call stacks from function call statistics."""
+    _, capture = CaptureBuffer().run(request={}, func=lambda: allocate(100000))
+    lines = folded_stacks(capture.stats)
+    assert lines
+    stacks = [line.rsplit(' ', 1)[0].split(';') for line in lines]
+    assert any(frames[-1].startswith('allocate (test_debug.py') for frames in stacks)
+    assert all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines)
+    # Stacks are truncated at the maximum depth.
+    assert all(len(frames) <= 2 for frames in [
+        line.rsplit(' ', 1)[0].split(';') for line in folded_stacks(capture.stats, max_depth=2)
+    ])
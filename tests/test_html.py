@@ -0,0 +1,56 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for generating embeddable HTML for UI components."""
+
+import openclean_notebook.controller.html as html
+
+
+"""Use one of the HTML templates as a stand-in for the Javascript bundle
+(which is only available after building the UI).
+"""
+LIBRARY = 'templates/spreadsheet.html'
+
+
+def test_make_html():
+    """Test generating HTML with the bundle included in every output."""
+    data = {'name': 'DS', 'database': '0000'}
+    doc1 = html.make_html(template='spreadsheet.html', library=LIBRARY, data=data)
+    doc2 = html.make_html(template='spreadsheet.html', library=LIBRARY, data=data)
+    assert 'renderOpencleanVisBundle' in doc1
+    assert '"database": "0000"' in doc1
+    assert len(doc1) == len(doc2)
+    assert doc1 != doc2
+
+
+def test_make_html_load_once():
+    """Test generating HTML where the bundle is only included once."""
+    html.reset()
+    data = {'name': 'DS', 'database': '0000'}
+    bundle = html.readfile(html.JAVASCRIPT.format(LIBRARY))
+    args = {
+        'template': 'spreadsheet.html',
+        'library': LIBRARY,
+        'data': data,
+        'bootstrap': 'spreadsheet_bootstrap.html'
+    }
+    doc = html.make_html(**args)
+    assert bundle in doc
+    doc = html.make_html(**args)
+    assert bundle not in doc
+    assert 'window.opencleanVis' in doc
+    assert '"database": "0000"' in doc
+    # The bootstrap script requests the bundle from the kernel if it is not
+    # loaded in the browser.
+    assert html.BUNDLE_CHANNEL in doc
+    assert '"{}"'.format(LIBRARY) in doc
+    assert html.bundle_api({'library': LIBRARY}) == {'library': LIBRARY, 'bundle': bundle}
+    assert 'error' in html.bundle_api({'library': 'templates/spreadsheet_bootstrap.html'})
+    # Include the bundle again after reset.
+    html.reset()
+    assert bundle in html.make_html(**args)
+    html.reset()
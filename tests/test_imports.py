@@ -0,0 +1,50 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for lazy imports of expensive dependencies. Imports are tested
+in a separate interpreter process since other tests may already have imported
+the checked modules.
+"""
+
+from typing import List
+
+import subprocess
+import sys
+
+
+def imported(statement: str, modules: List[str]) -> List[str]:
+    """Get the subset of modules that are loaded after executing the given
+    import statement in a new interpreter.
+    """
+    script = '{}\nimport sys\nprint(",".join(m for m in {} if m in sys.modules))'
+    out = subprocess.run(
+        [sys.executable, '-c', script.format(statement, modules)],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout.strip()
+    return out.split(',') if out else []
+
+
+def test_import_package():
+    """Importing the package does not load the engine or the profiler."""
+    modules = ['datamart_profiler', 'openclean.engine.base', 'openclean_notebook.engine']
+    assert imported('import openclean_notebook', modules) == []
+
+
+def test_import_engine():
+    """Importing the engine factory does not load the profiler or the UI
+    controllers.
+    """
+    modules = ['datamart_profiler', 'openclean_notebook.controller.spreadsheet.base']
+    assert imported('from openclean_notebook import DB', modules) == []
+
+
+def test_import_spreadsheet_api():
+    """Importing the spreadsheet API does not load the profiler."""
+    statement = 'from openclean_notebook.controller.spreadsheet.base import spreadsheet_api'
+    assert imported(statement, ['datamart_profiler']) == []
@@ -0,0 +1,78 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for inverted column value indexes."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from openclean_notebook.index import ValueIndex
+
+import openclean_notebook.index as idx
+
+
+@pytest.mark.parametrize(
+    'op,args,rows',
+    [
+        ('eq', {'value': 1}, [1, 5]),
+        ('eq', {'value': 'x'}, [6]),
+        ('eq', {'value': 99}, []),
+        ('null', {}, [2]),
+        ('contains', {'value': 'b'}, [0, 3]),
+        ('prefix', {'value': 'ab'}, [0, 3]),
+        ('regex', {'value': '^a.d$'}, [3]),
+        ('range', {'low': 1, 'high': 3}, [1, 5]),
+        ('range', {'low': 'abc'}, [0, 3, 6]),
+        ('range', {'high': 'abd'}, [0, 3])
+    ]
+)
+def test_select_rows(op, args, rows):
+    """Test evaluating predicates on a column with mixed values."""
+    values = pd.Series(['abc', 1, None, 'abd', 3.5, 1, 'x'], index=range(10, 17))
+    assert ValueIndex(values).select(op, **args).tolist() == rows
+
+
+def test_select_many_values(monkeypatch):
+    """Test evaluating predicates that match many distinct values."""
+    index = ValueIndex(pd.Series(np.arange(100) % 10))
+    rows = index.select('range', low=2, high=8)
+    monkeypatch.setattr(idx, 'MAX_LOOKUPS', 1)
+    assert index.select('range', low=2, high=8).tolist() == rows.tolist()
+    assert len(rows) == 70
+    assert len(index) == 100
+    assert index.nbytes > 0
+
+
+def test_invalid_predicates():
+    """Test errors for invalid predicates."""
+    index = ValueIndex(pd.Series(['a', 'b']))
+    with pytest.raises(ValueError):
+        index.select('regex', value='(')
+    with pytest.raises(ValueError):
+        index.select('unknown', value='a')
+
+
+@pytest.mark.parametrize(
+    'op,args,rows',
+    [
+        ('eq', {'value': 'b'}, [1, 4]),
+        ('eq', {'value': 'z'}, []),
+        ('null', {}, [3]),
+        ('prefix', {'value': 'a'}, [0, 2, 5]),
+        ('contains', {'value': 'c'}, [2, 5]),
+        ('range', {'low': 'ab', 'high': 'b'}, [1, 2, 4, 5])
+    ]
+)
+def test_select_categorical_rows(op, args, rows):
+    """Test evaluating predicates on a dictionary-encoded column of a compact
+    snapshot. The results are the same as for the column of strings.
+    """
+    strings = pd.Series(['a', 'b', 'ac', None, 'b', 'ac'], index=range(10, 16))
+    categories = strings.astype('category')
+    assert ValueIndex(categories).select(op, **args).tolist() == rows
+    assert ValueIndex(strings).select(op, **args).tolist() == rows
@@ -0,0 +1,175 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for vectorized library functions."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from openclean.engine.object.function import FunctionFactory
+from openclean_notebook.commit import commit_sample
+from openclean_notebook.engine import DB
+from openclean_notebook.library import (
+    NotebookFunctionFactory, VectorizedFunctionHandle, factorize, insert_column, update_columns
+)
+
+
+CALLS = list()
+
+
+def add(x, y, value=0):
+    """Vectorized function that records the length of its input."""
+    CALLS.append(len(x))
+    return x.astype(int) + y.astype(int) + value
+
+
+def label(x, y=None):
+    """Function that records its inputs."""
+    CALLS.append((x, y))
+    return '{}-{}'.format(x, y)
+
+
+def split(x):
+    """Vectorized function with two outputs."""
+    return x.astype(int) // 10, x.astype(int) % 10
+
+
+@pytest.fixture
+def engine():
+    """Engine with a dataset and registered vectorized functions."""
+    engine = DB()
+    engine.register.eval('add', columns=2, vectorized=True)(add)
+    engine.register.eval('split', outputs=2, vectorized=True)(split)
+    engine.register.eval('inc')(lambda x: x + 1)
+    df = pd.DataFrame(data={'A': [11, 23, 35, 47], 'B': [1, 2, 3, 4]})
+    engine.create(source=df, name='DS')
+    CALLS.clear()
+    return engine
+
+
+def test_factorize():
+    """Test encoding distinct (combinations of) values."""
+    values = pd.Series(['a', None, 'b', np.nan, 'a', None], dtype=object)
+    codes, uniques = factorize([values])
+    assert list(codes) == [0, 2, 1, 3, 0, 2]
+    assert uniques[0][:3] == ['a', 'b', None]
+    assert np.isnan(uniques[0][3])
+    codes, uniques = factorize([values.fillna('a'), pd.Series([1, 1, 2, 2, 1, 1])])
+    assert len(set(codes)) == 3
+    assert codes[0] == codes[4] and codes[1] == codes[5]
+    assert sorted(zip(*uniques)) == [('a', 1), ('a', 2), ('b', 2)]
+    assert factorize([pd.Series([[1], [2]])]) is None
+
+
+def test_library_listing(engine):
+    """Test the vectorized flag in the library serialization."""
+    functions = {f['name']: f for f in engine.library_dict()['functions']}
+    assert functions['add']['vectorized']
+    assert not functions['inc']['vectorized']
+    assert not functions['upper']['vectorized']
+    assert isinstance(engine.library.functions().get('add'), VectorizedFunctionHandle)
+    assert not isinstance(engine.library.functions().get('inc'), VectorizedFunctionHandle)
+
+
+def test_scalar_call(engine):
+    """Test calling a vectorized function with scalar values."""
+    func = engine.library.functions().get('add')
+    assert func(1, 2, value=3) == 6
+    assert engine.library.functions().get('split')('47') == (4, 7)
+
+
+def test_vectorized_insert_and_update(engine):
+    """Test insert and update operations on vectorized functions."""
+    ds = engine.dataset('DS')
+    func = engine.library.functions().get('add')
+    df = insert_column(ds, names='C', values=func, args={'value': 1}, sources=['A', 'B'])
+    assert df['C'].tolist() == [13, 26, 39, 52]
+    assert CALLS == [4]
+    df = update_columns(ds, columns='B', func=func, sources=['A', 'B'])
+    assert df['B'].tolist() == [12, 25, 38, 51]
+    assert CALLS == [4, 4]
+    df = update_columns(ds, columns=['A', 'B'], func=engine.library.functions().get('split'), sources='A')
+    assert df['A'].tolist() == [1, 2, 3, 4]
+    assert df['B'].tolist() == [1, 3, 5, 7]
+    # Non-vectorized functions are applied by the dataset.
+    df = update_columns(ds, columns='C', func=engine.library.functions().get('inc'))
+    assert df['C'].tolist() == [14, 27, 40, 53]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_vectorized_commit(workers, engine):
+    """Test committing vectorized operations on a dataset sample."""
+    engine.sample('DS', n=2, random_state=42)
+    sample = engine.dataset('DS')
+    update_columns(sample, columns='B', func=engine.library.functions().get('add'), sources=['A', 'B'])
+    assert CALLS == [2]
+    commit_sample(sample, chunk_size=3, workers=workers)
+    assert engine.checkout('DS')['B'].tolist() == [12, 25, 38, 51]
+    if workers == 1:
+        assert CALLS == [2, 3, 1]
+
+
+def test_memoized_update():
+    """Test evaluating update functions once per distinct input."""
+    engine = DB(memo_size=4)
+    engine.register.eval('label')(label)
+    engine.register.eval('label2', columns=2)(label)
+    engine.register.eval('add', columns=2, vectorized=True)(add)
+    df = pd.DataFrame(data={'A': ['x', 'y', None, 'x', None, None], 'B': [1, 2, 1, 1, 2, 1]})
+    engine.create(source=df, name='DS')
+    CALLS.clear()
+    ds = engine.dataset('DS')
+    func = engine.library.functions().get('label')
+    df = update_columns(ds, columns='A', func=func, memo_size=engine.memo_size)
+    assert df['A'].tolist() == ['x-None', 'y-None', 'None-None', 'x-None', 'None-None', 'None-None']
+    assert len(CALLS) == 3
+    # Distinct combinations of values from multiple columns.
+    CALLS.clear()
+    func = engine.library.functions().get('label2')
+    df = update_columns(ds, columns='A', func=func, sources=['A', 'B'], memo_size=engine.memo_size)
+    assert df['A'].tolist() == ['x-None-1', 'y-None-2', 'None-None-1', 'x-None-1', 'None-None-2', 'None-None-1']
+    assert len(CALLS) == 4
+    # Evaluate for each row if the number of distinct values exceeds the
+    # memoization size.
+    CALLS.clear()
+    df = update_columns(ds, columns='A', func=func, sources=['A', 'B'], memo_size=2)
+    assert len(CALLS) == 6
+    # Vectorized functions are called once with the distinct values.
+    CALLS.clear()
+    df = update_columns(ds, columns='B', func=engine.library.functions().get('add'), sources=['B', 'B'], memo_size=2)
+    assert df['B'].tolist() == [2, 4, 2, 2, 4, 2]
+    assert CALLS == [2]
+
+
+def test_memoized_commit():
+    """Test committing sample operations with memoization."""
+    engine = DB(memo_size=10, chunk_size=4)
+    df = pd.DataFrame(data={'A': ['a', 'b'] * 5})
+    engine.create(source=df, name='DS')
+    engine.sample('DS', n=3, random_state=42)
+    upper = engine.library.functions().get(name='upper', namespace='string')
+    engine.dataset('DS').update(columns='A', func=upper)
+    df = engine.checkout('DS', commit=True)
+    assert df['A'].tolist() == ['A', 'B'] * 5
+
+
+def test_function_serialization(engine):
+    """Test serializing library functions. Functions that were serialized by
+    the openclean function factory (without encoding) can be read.
+    """
+    factory = NotebookFunctionFactory()
+    handle = engine.library.functions().get(name='add')
+    descriptor, data = factory.serialize(handle)
+    assert descriptor['encoding'] == 'latin-1'
+    f = factory.deserialize(descriptor=descriptor, data=data)
+    assert isinstance(f, VectorizedFunctionHandle)
+    assert f(1, 2) == 3
+    descriptor, data = FunctionFactory().serialize(handle)
+    f = factory.deserialize(descriptor=descriptor, data=data)
+    assert not isinstance(f, VectorizedFunctionHandle)
+    assert f.func is add
@@ -0,0 +1,57 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for request timers and the metrics registry."""
+
+from openclean_notebook.metrics import Histogram, MetricsRegistry, RequestTimer
+
+
+def test_histogram_quantiles():
+    """Test bucket counts and quantile estimates of histograms."""
+    h = Histogram(bounds=[1, 2, 4, 8])
+    assert h.quantile(0.5) is None
+    assert h.to_dict()['mean'] is None
+    for value in [0.5, 1, 3, 3, 3, 7, 20]:
+        h.add(value)
+    doc = h.to_dict()
+    assert doc['count'] == 7
+    assert doc['min'] == 0.5 and doc['max'] == 20
+    assert doc['buckets'] == [[1, 2], [4, 3], [8, 1], [None, 1]]
+    assert h.quantile(0.5) == 4
+    assert h.quantile(0.8) == 8
+    assert h.quantile(1) == 20
+    # Estimates are bounded by the observed values.
+    h = Histogram(bounds=[1, 100])
+    h.add(10)
+    assert h.quantile(0.5) == 10
+
+
+def test_metrics_registry():
+    """Test aggregating request timers in the metrics registry."""
+    registry = MetricsRegistry()
+    assert registry.get('A')['requests'] == 0
+    for size in [10, 20]:
+        timer = RequestTimer()
+        with timer.phase('page'):
+            pass
+        with timer.phase('page'):
+            pass
+        timer.add_bytes('request', size)
+        timer.add_bytes('request', 1)
+        registry.record('A', timer)
+    timer = RequestTimer()
+    assert set(timer.to_dict()) == {'phases', 'bytes', 'total'}
+    registry.record('B', timer)
+    metrics = registry.get('A')
+    assert metrics['requests'] == 2
+    assert metrics['phases']['page']['count'] == 2
+    assert metrics['bytes']['request']['total'] == 32
+    assert sorted(registry.scopes()) == ['A', 'B']
+    registry.reset('A')
+    assert registry.scopes() == ['B']
+    registry.reset()
+    assert registry.scopes() == []
@@ -7,6 +7,7 @@
 
 """Unit tests for the openclean API extensions of the openclean engine."""
 
+import pandas as pd
 import pkg_resources
 import pytest
 
@@ -50,6 +51,26 @@ def test_edit_dataset(mock_pkg_resources, dataset, tmpdir):
     engine.edit('DS', n=1)
 
 
+def test_sample_dataset(tmpdir):
+    """Test creating a sample from a streamed dataset snapshot."""
+    engine = DB(str(tmpdir))
+    engine.create(source=pd.DataFrame({'A': range(100), 'B': ['x', 'y'] * 50}), name='DS', primary_key='A')
+    df = engine.sample('DS', n=10, random_state=42)
+    assert len(df) == 10
+    assert list(df['A']) == sorted(df['A'])
+    assert engine.dataset('DS').is_sample
+    assert engine.checkout('DS').shape == (100, 2)
+    # Stratified sample.
+    df = engine.sample('DS', n=10, stratify='B')
+    assert df['B'].value_counts().to_dict() == {'x': 5, 'y': 5}
+    # The stratify column is recorded with the sample operation.
+    args = engine.dataset('DS').log()[0].descriptor['arguments']
+    assert {a['name']: a['value'] for a in args} == {'n': 10, 'randomState': None, 'stratify': 'B'}
+    engine.sample('DS', n=10)
+    args = engine.dataset('DS').log()[0].descriptor['arguments']
+    assert [a['name'] for a in args] == ['n', 'randomState']
+
+
 def test_registry_id_collision():
     """Test to ensure that collisions for engine identifier during registration
     are handled properly.
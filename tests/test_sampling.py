@@ -0,0 +1,103 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for row sampling strategies."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from openclean_notebook.sampling import (
+    reservoir_positions, sample_rows, sample_stream, stratified_positions, uniform_positions
+)
+
+
+@pytest.mark.parametrize('sample', [reservoir_positions, uniform_positions])
+def test_sample_positions(sample):
+    """Test random selection of row positions."""
+    positions = sample(1000, 10, random_state=42)
+    assert len(positions) == 10
+    assert len(set(positions)) == 10
+    assert list(positions) == sorted(positions)
+    assert 0 <= positions[0] and positions[-1] < 1000
+    # Results are reproducible for a given random state.
+    assert list(sample(1000, 10, random_state=42)) == list(positions)
+    # Return all positions if the sample size exceeds the data size.
+    assert list(sample(5, 10)) == [0, 1, 2, 3, 4]
+
+
+def test_stratified_positions():
+    """Test stratified sampling of row positions."""
+    values = pd.Series(['a'] * 90 + ['b'] * 9 + [None])
+    positions = stratified_positions(values, 10, random_state=42)
+    assert len(positions) == 10
+    assert len(set(positions)) == 10
+    sample = values.iloc[positions]
+    # Each stratum is represented by at least one row.
+    assert sample.isna().sum() == 1
+    assert (sample == 'b').sum() == 2
+    assert (sample == 'a').sum() == 7
+    # More strata than rows in the sample.
+    values = pd.Series(np.arange(100))
+    assert len(stratified_positions(values, 10, random_state=42)) == 10
+
+
+def test_sample_rows():
+    """Test sampling rows from a data frame."""
+    df = pd.DataFrame(data={'A': np.arange(100), 'B': ['x', 'y'] * 50})
+    assert sample_rows(df, 200) is df
+    for method in ['reservoir', 'uniform']:
+        assert sample_rows(df, 10, method=method).shape == (10, 2)
+    sample = sample_rows(df, 10, method='stratified', stratify='B')
+    assert sample['B'].value_counts().to_dict() == {'x': 5, 'y': 5}
+    sample = sample_rows(df, 10, method='stratified', stratify=1)
+    assert sample.shape == (10, 2)
+    with pytest.raises(ValueError):
+        sample_rows(df, 10, method='stratified')
+    with pytest.raises(ValueError):
+        sample_rows(df, 10, method='unknown')
+
+
+def test_sample_stream():
+    """Test single-pass reservoir sampling of row streams."""
+    rows = [(i * 2, [i, 'v{}'.format(i % 3)]) for i in range(1000)]
+    df = sample_stream(rows, columns=['A', 'B'], n=10, random_state=42)
+    assert list(df.columns) == ['A', 'B']
+    # The stream sample selects the same positions as the reservoir sampler.
+    positions = reservoir_positions(1000, 10, random_state=42)
+    assert list(df['A']) == list(positions)
+    assert list(df.index) == [p * 2 for p in positions]
+    # The stream is only consumed once.
+    df = sample_stream(iter(rows), columns=['A', 'B'], n=10, random_state=42)
+    assert list(df['A']) == list(positions)
+    assert len(sample_stream(rows[:5], columns=['A', 'B'], n=10)) == 5
+    with pytest.raises(ValueError):
+        sample_stream(rows, columns=['A', 'B'], n=0)
+
+
+def test_sample_stream_stratified():
+    """Test stratified sampling of row streams."""
+    values = ['a'] * 90 + ['b'] * 9 + [None]
+    rows = [(i, [i, v]) for i, v in enumerate(values)]
+    df = sample_stream(rows, columns=['A', 'B'], n=10, stratify='B', random_state=42)
+    assert len(df) == 10
+    assert list(df['A']) == sorted(df['A'])
+    # Strata are represented in the same way as in stratified_positions.
+    assert df['B'].value_counts(dropna=False).to_dict() == {'a': 7, 'b': 2, None: 1}
+    expected = pd.Series(values).iloc[stratified_positions(pd.Series(values), 10)]
+    assert sorted(expected.fillna('-')) == sorted(df['B'].fillna('-'))
+    df = sample_stream(rows, columns=['A', 'B'], n=200, stratify=1)
+    assert list(df['A']) == list(range(100))
+    with pytest.raises(ValueError):
+        sample_stream(rows, columns=['A', 'B'], n=10, stratify='C')
+    # Bounded number of strata.
+    df = sample_stream(rows, columns=['A', 'B'], n=10, stratify='B', max_strata=3)
+    assert len(df) == 10
+    with pytest.raises(ValueError):
+        sample_stream(rows, columns=['A', 'B'], n=10, stratify='B', max_strata=2)
+    with pytest.raises(ValueError):
+        sample_stream(rows, columns=['A', 'B'], n=10, stratify='A', max_strata=50)
@@ -0,0 +1,32 @@
+# This file is part of the Data Cleaning Library (openclean).
+#
+# Copyright (c) 2018-2021 New York University.
+#
+# openclean is released under the Revised BSD License. See file LICENSE for
+# full license details.
+
+"""Unit tests for column sort orders."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from openclean_notebook.sorting import argsort
+
+
+@pytest.mark.parametrize(
+    'values,descending,order',
+    [
+        ([3, 1, np.nan, 1, 2], False, [1, 3, 4, 0, 2]),
+        ([3, 1, np.nan, 1, 2], True, [0, 4, 1, 3, 2]),
+        (['b', 'a', None, 'a'], False, [1, 3, 0, 2]),
+        (['b', 'a', None, 'a'], True, [0, 1, 3, 2]),
+        (['b', 3, None, 'a', 1.5, 3], False, [4, 1, 5, 3, 0, 2]),
+        (['b', 3, None, 'a', 1.5, 3], True, [1, 5, 4, 0, 3, 2])
+    ]
+)
+def test_argsort(values, descending, order):
+    """Test stable sort orders for columns with missing and mixed values."""
+    # Use a non-default index to ensure that positions are returned.
+    values = pd.Series(values, index=range(10, 10 + len(values)))
+    assert argsort(values, descending=descending).tolist() == order